@@ -1,5 +1,10 @@
 import streamlit as st
-import yfinance as yf
+import market_data
+import risk
+import timing
+from assets import INDEX_ETFS
+from dashboard_core import UNIVERSES, universe_controls
+from indicators import annual_growth_rates
 import pandas as pd
 
 # Function to inject CSS for equal table column widths
@@ -20,6 +25,15 @@ def add_table_style():
         unsafe_allow_html=True
     )
 
+# Function to show a risk table with returns, volatility, drawdowns and VaR as percentages
+def show_risk_table(table):
+    percent = ['CAGR', 'Volatility', 'Max drawdown', 'VaR', 'CVaR']
+    config = {c: st.column_config.NumberColumn(c, format='%.2f%%') for c in percent}
+    config.update({c: st.column_config.NumberColumn(c, format='%.2f') for c in ['Sharpe', 'Sortino', 'Calmar', 'Beta']})
+    st.dataframe(table.assign(**{c: table[c] * 100 for c in percent}), column_config=config)
+
+timing.begin_rerun('AnnualGrowthRate')
+
 # Streamlit app title
 st.title('Stock Annual Growth Rate Calculator')
 
@@ -32,6 +46,12 @@ ticker = st.text_input('Enter Stock Ticker Symbol:', 'AAPL')
 # User input for number of years
 num_years = st.slider('Select Number of Years:', min_value=1, max_value=20, value=10)
 
+# Benchmark for beta and universe for the risk comparison table; the universe
+# starts as the short custom list so the first view only loads a few tickers
+benchmark = st.selectbox('Benchmark:', list(INDEX_ETFS.values()))
+risk_free = st.number_input('Risk-free rate (% per year):', min_value=0.0, max_value=20.0, value=0.0, step=0.25) / 100
+tickers = universe_controls('risk', default=UNIVERSES[-1])
+
 # Fetch historical data
 if ticker:
     try:
@@ -40,21 +60,35 @@ if ticker:
         start_date = (pd.Timestamp.today() - pd.DateOffset(years=num_years)).strftime('%Y-%m-%d')
         
         # Fetch data
-        data = yf.download(ticker, start=start_date, end=end_date, interval='1mo')
+        with timing.stage('load_prices'):
+            data = market_data.load_prices(ticker, start_date, end_date, interval='1mo')
 
-        # Resample to annual data
-        annual_data = data['Adj Close'].resample('Y').last()
+        with timing.stage('indicators'):
+            # Resample to annual data and calculate the annual growth rate
+            annual_growth_rate = annual_growth_rates(data['Adj Close'])
 
-        # Calculate annual growth rate
-        annual_growth_rate = annual_data.pct_change() * 100
-
-        # Calculate average annual growth rate
-        average_growth_rate = annual_growth_rate.mean()
+            # Calculate average annual growth rate
+            average_growth_rate = annual_growth_rate.mean()
 
         # Display results in a styled table
         st.subheader(f'Annual Growth Rates for {ticker}')
         st.dataframe(pd.DataFrame(annual_growth_rate).rename(columns={'Adj Close': 'Annual Growth Rate (%)'}))
         st.write(f'Average Annual Growth Rate: {average_growth_rate:.2f}%')
-        
+
+        # Risk and return of the ticker against the benchmark from daily returns
+        with timing.stage('risk'):
+            table = risk.risk_table([ticker, benchmark], start_date, end_date, benchmark, risk_free)
+        st.subheader(f'Risk and Return vs {benchmark}')
+        show_risk_table(table)
+
+        # The same metrics for every ticker of the universe, cached per ticker
+        with timing.stage('risk_universe'):
+            table = risk.risk_table(tickers, start_date, end_date, benchmark, risk_free)
+        st.subheader(f'Risk and Return of {len(table)} Tickers')
+        with timing.stage('render'):
+            show_risk_table(table.sort_values('Sharpe', ascending=False))
+
     except Exception as e:
         st.error(f"Error fetching data for ticker {ticker}: {e}")
+
+timing.finish_rerun()
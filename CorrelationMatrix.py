@@ -0,0 +1,60 @@
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+import correlation
+import timing
+from dashboard_core import universe_controls
+
+timing.begin_rerun('CorrelationMatrix')
+
+# Streamlit app title
+st.set_page_config(page_title="Correlation Matrix", layout="wide")
+st.title('Correlation Matrix of Daily Returns')
+
+tickers = universe_controls('correlation')
+
+# Date window and matrix options
+st.sidebar.header('Window')
+num_years = st.sidebar.slider('Years of history', 1, 10, 5)
+end_date = pd.Timestamp.today().strftime('%Y-%m-%d')
+start_date = (pd.Timestamp.today() - pd.DateOffset(years=num_years)).strftime('%Y-%m-%d')
+use_window = st.sidebar.checkbox('Only the most recent days', value=False)
+window = st.sidebar.slider('Rolling window (trading days)', 21, 252, 63) if use_window else None
+kind = 'cov' if st.sidebar.radio('Matrix', ['Correlation', 'Covariance']) == 'Covariance' else 'corr'
+min_periods = st.sidebar.slider('Minimum shared days per pair', 5, 250, 20)
+show_rolling = st.sidebar.checkbox('Show average rolling correlation', value=False)
+
+if len(tickers) < 2:
+    st.error('Enter at least two tickers.')
+else:
+    with timing.stage('indicators'):
+        matrix = correlation.correlation_matrix(tickers, start_date, end_date, kind, window, min_periods)
+        order = correlation.clustered_order(tickers, start_date, end_date, window, min_periods)
+    missing = sorted(set(tickers) - set(matrix.index))
+    if missing:
+        st.warning(f"No data for {', '.join(missing)}")
+
+    if len(matrix) >= 2:
+        with timing.stage('figure'):
+            period = f'last {window} trading days' if window else f'{start_date} to {end_date}'
+            fig = correlation.heatmap(matrix, f"{'Correlation' if kind == 'corr' else 'Covariance'} of daily "
+                                              f"returns, {len(matrix)} tickers, {period}", order, kind)
+        with timing.stage('render'):
+            st.plotly_chart(fig)
+
+        # Most and least correlated pairs
+        col1, col2 = st.columns(2)
+        col1.subheader('Highest pairs')
+        col1.dataframe(correlation.top_pairs(matrix, 20), hide_index=True)
+        col2.subheader('Lowest pairs')
+        col2.dataframe(correlation.top_pairs(matrix, 20, ascending=True), hide_index=True)
+
+        if show_rolling:
+            with timing.stage('rolling'):
+                average = correlation.rolling_average(tickers, start_date, end_date, window or 63)
+            fig = go.Figure(go.Scatter(x=average.index, y=average, mode='lines', name='Average correlation'))
+            fig.update_layout(title=f'Average pairwise correlation over {window or 63}-day windows',
+                              xaxis_title='Date', yaxis_title='Correlation')
+            st.plotly_chart(fig)
+
+timing.finish_rerun()
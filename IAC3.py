@@ -1,19 +1,43 @@
 import streamlit as st
-import yfinance as yf
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
-import feedparser
-
-@st.cache_data
+import news
+import news_store
+import sentiment
+from cache_store import persistent_cache
+import fundamentals
+import compute_pool
+import history_store
+import indicators
+import market_data
+import ring_buffer
+import timing
+
+# Disk snapshots keep indicators warm across restarts for a day
+ONE_DAY = 24 * 60 * 60
+
+# Full histories are memory-mapped from the history store (topped up daily),
+# so every session and process shares the same pages instead of a copy.
+# Other data providers (e.g. a replay) have their own clock and skip the store.
 def load_data(ticker):
-    data = yf.download(ticker)
+    if market_data.PROVIDER != 'yahoo':
+        return market_data.load_prices(ticker)
+    data = history_store.get_store().load_or_fetch(ticker)
     return data
 
-def add_ema(data, periods):
-    for period in periods:
-        data[f'EMA_{period}'] = data['Close'].ewm(span=period, adjust=False).mean()
-    return data
+# The date and close of the last bar are part of the cache key, so bars the
+# history store adds or replaces compute new EMAs instead of stale ones
+@st.cache_data(ttl=ONE_DAY)
+@persistent_cache('iac3_indicators', ttl=ONE_DAY)
+def load_ema(ticker, period, last_bar):
+    data = load_data(ticker)
+    return compute_ema(ticker, data, period)
+
+# Long histories are computed in the compute pool; a rerun with other EMAs cancels the old job
+def compute_ema(ticker, data, period):
+    return compute_pool.run(indicators.ema, data[['Close']], period, key=('ema', ticker, period, len(data), data.index[-1]),
+                            name=f'ema:{period}', label=f'Computing EMA {period}')
 
 def add_rsi(data, window=14):
     delta = data['Close'].diff(1)
@@ -32,55 +56,61 @@ def add_macd(data):
     data['Signal Line'] = data['MACD'].ewm(span=9, adjust=False).mean()
     return data
 
-@st.cache_data
+# Fundamentals come from the TTL-based service (prices daily, ratios weekly)
 def get_fundamental_metrics(ticker):
-    stock = yf.Ticker(ticker)
-    info = stock.info
-    metrics = {
-        'P/E Ratio': info.get('trailingPE', 'N/A'),
-        'ROE': info.get('returnOnEquity', 'N/A'),
-        'ROA': info.get('returnOnAssets', 'N/A'),
-        'Gross Margin': info.get('grossMargins', 'N/A'),
-        'Profit Margin': info.get('profitMargins', 'N/A'),
-        'Debt to Equity': info.get('debtToEquity', 'N/A'),
-        'Current Ratio': info.get('currentRatio', 'N/A'),
-        'Price to Book': info.get('priceToBook', 'N/A'),
-        'Earnings Per Share': info.get('trailingEps', 'N/A'),
-        'Dividend Yield': info.get('dividendYield', 'N/A')
-    }
-
-    # Round off the metrics to 2 decimal points
-    for key, value in metrics.items():
-        if isinstance(value, (int, float)):
-            metrics[key] = round(value, 2)
-        elif value == 'N/A':
-            metrics[key] = 'N/A'
-        else:
-            try:
-                metrics[key] = round(float(value), 2)
-            except ValueError:
-                metrics[key] = 'N/A'
-
-    return metrics
-
-# Function to fetch and parse RSS feed
-def fetch_rss_feed(ticker):
-    # URL format for Yahoo Finance RSS feed
-    feed_url = f"https://finance.yahoo.com/rss/headline?s={ticker}"
-    feed = feedparser.parse(feed_url)
-    return feed
+    return fundamentals.get_fundamental_metrics(ticker)
+
+# Seconds between checks of a news refresh that is still running
+NEWS_POLL = 1
+
+# Tickers whose feeds are ingested into the searchable news store
+DEFAULT_WATCHLIST = 'GOOGL, AAPL, MSFT, AMZN, NVDA, META, TSLA'
+
+# Function to show the news of ticker; while a refresh is running it shows the
+# cached headlines and reruns the whole page once the refresh has landed
+def show_news(ticker, refreshing):
+    future = news.fetch_news_async(ticker)
+    if refreshing and future.done():
+        st.rerun()
+    entries = news.cached_news(ticker)
+    if refreshing:
+        st.caption('Fetching the latest headlines...')
+    if entries:
+        st.subheader(f"Recent News for {ticker}:")
+        scores = sentiment.score_headlines(entry['title'] for entry in entries)
+        for entry, score in zip(entries, scores):
+            st.write(f"**Title:** {entry['title']}")
+            st.write(f"**Sentiment:** {sentiment.sentiment_label(score)} ({score:+.2f})")
+            st.write(f"**Link:** [Read more]({entry['link']})")
+            st.write(f"**Published:** {entry['published']}")
+            st.write("---")
+    elif not refreshing:
+        st.write("No news found for the given ticker symbol.")
 
 # Streamlit app
 def main():
+    timing.begin_rerun('IAC3')
     st.title('Interactive Stock Chart with Technical Indicators and Fundamental Metrics')
 
     # User input for ticker symbol
     ticker = st.text_input('Enter Stock Ticker', 'GOOGL').upper()
 
-    data = load_data(ticker)
+    # Start the news fetch now so it runs while the chart is being built
+    news.fetch_news_async(ticker)
+
+    # Daily bars come from the history store, intraday bars from the ticker's ring buffer
+    interval = st.selectbox('Interval', ['1d'] + list(ring_buffer.INTRADAY_INTERVALS))
+
+    with timing.stage('load_data'):
+        if interval == '1d':
+            data = load_data(ticker)
+        else:
+            lookback = pd.Timedelta(days=ring_buffer.LOOKBACK_DAYS[interval] - 1)
+            data = market_data.load_prices(ticker, market_data.now().normalize() - lookback, interval=interval)
 
     # Select time period
-    periods = st.slider('Select Time Period (in days)', 30, 365, 180)
+    unit = 'days' if interval == '1d' else 'bars'
+    periods = st.slider(f'Select Time Period (in {unit})', 30, 365, 180)
 
     # Select EMA
     selected_emas = st.multiselect('Select EMA periods', [200, 50, 20], default=[200, 50, 20])
@@ -88,10 +118,12 @@ def main():
     # Choose to add RSI or MACD
     add_rsi_plot = st.checkbox('Add RSI Subplot')
     add_macd_plot = st.checkbox('Add MACD Subplot')
+    add_sentiment_overlay = st.checkbox('Overlay Daily News Sentiment')
 
     # Choose fundamental metrics to display
     st.subheader('Select Fundamental Metrics to Display')
-    metrics = get_fundamental_metrics(ticker)
+    with timing.stage('fundamentals'):
+        metrics = get_fundamental_metrics(ticker)
     selected_metrics = st.multiselect('Choose metrics', list(metrics.keys()), default=['P/E Ratio', 'ROE', 'Profit Margin'])
 
     # Display selected fundamental metrics
@@ -106,95 +138,131 @@ def main():
                     metric = selected_metrics[i + j]
                     cols[j].metric(label=metric, value=metrics[metric])
 
-    # Prepare data with selected EMAs
-    data = add_ema(data, selected_emas)
-
-    # Filter data for the selected period
-    data_period = data[-periods:]
-
-    # Add RSI if selected
-    if add_rsi_plot:
-        data_period = add_rsi(data_period)
-
-    # Add MACD if selected
-    if add_macd_plot:
-        data_period = add_macd(data_period)
-
-    # Define the number of rows for subplots
-    rows = 1 + add_rsi_plot + add_macd_plot
-
-    # Calculate dynamic y-axis ranges
-    price_range = [data_period['Close'].min() * 0.95, data_period['Close'].max() * 1.05]
-    rsi_range = [0, 100]
-
-    # Initialize macd_range with default values
-    macd_range = [0, 0]
-
-    # Update macd_range if MACD data is present
-    if add_macd_plot:
-        macd_range = [
-            min(data_period['MACD'].min(), data_period['Signal Line'].min()) * 1.05,
-            max(data_period['MACD'].max(), data_period['Signal Line'].max()) * 1.05
-        ]
-
-    # Create subplots
-    fig = make_subplots(rows=rows, cols=1, shared_xaxes=True,
-                        vertical_spacing=0.15,
-                        row_heights=[0.5] + [0.25] * (rows - 1),
-                        subplot_titles=('Price', 'RSI', 'MACD')[:rows])
-
-    # Candlestick chart
-    fig.add_trace(go.Candlestick(x=data_period.index,
-                                 open=data_period['Open'],
-                                 high=data_period['High'],
-                                 low=data_period['Low'],
-                                 close=data_period['Close'],
-                                 name='Candlesticks'), row=1, col=1)
-
-    # Add EMAs to the chart
-    for period in selected_emas:
-        fig.add_trace(go.Scatter(x=data_period.index, y=data_period[f'EMA_{period}'], mode='lines', name=f'EMA_{period}'), row=1, col=1)
-
-    current_row = 2
-    if add_rsi_plot:
-        fig.add_trace(go.Scatter(x=data_period.index, y=data_period['RSI'], mode='lines', name='RSI'), row=current_row, col=1)
-        fig.update_yaxes(range=rsi_range, row=current_row, col=1, title='RSI')
-        current_row += 1
-
-    if add_macd_plot:
-        fig.add_trace(go.Scatter(x=data_period.index, y=data_period['MACD'], mode='lines', name='MACD'), row=current_row, col=1)
-        fig.add_trace(go.Scatter(x=data_period.index, y=data_period['Signal Line'], mode='lines', name='Signal Line'), row=current_row, col=1)
-        fig.update_yaxes(range=macd_range, row=current_row, col=1, title='MACD')
-
-    # Update layout
-    fig.update_layout(
-        title=f'{ticker} Stock Price and Indicators',
-        xaxis_title='Date',
-        yaxis_title='Price',
-        height=400 + 200 * (rows - 1),
-        margin=dict(l=50, r=50, t=50, b=50),
-        legend=dict(x=0, y=1, traceorder='normal'),
-        xaxis_rangeslider_visible=False,
-        hovermode='x unified'  # Show hover information on x-axis
-    )
-
-    st.plotly_chart(fig)
-
-    # Fetch and display RSS feed
+    # Unknown or mistyped tickers download no bars
+    if data.empty:
+        st.error("No data found for this ticker.")
+    else:
+        with timing.stage('indicators'):
+            # Prepare data with selected EMAs (full-history EMAs come from the indicator cache)
+            for period in selected_emas:
+                if interval == '1d' and market_data.PROVIDER == 'yahoo':
+                    data[f'EMA_{period}'] = load_ema(ticker, period, (data.index[-1], float(data['Close'].iloc[-1])))
+                else:
+                    data[f'EMA_{period}'] = compute_ema(ticker, data, period)
+
+            # Filter data for the selected period
+            data_period = data[-periods:]
+
+            # Add RSI if selected
+            if add_rsi_plot:
+                data_period = add_rsi(data_period)
+
+            # Add MACD if selected
+            if add_macd_plot:
+                data_period = add_macd(data_period)
+
+        with timing.stage('figure'):
+            # Define the number of rows for subplots
+            rows = 1 + add_rsi_plot + add_macd_plot
+
+            # Calculate dynamic y-axis ranges
+            price_range = [data_period['Close'].min() * 0.95, data_period['Close'].max() * 1.05]
+            rsi_range = [0, 100]
+
+            # Initialize macd_range with default values
+            macd_range = [0, 0]
+
+            # Update macd_range if MACD data is present
+            if add_macd_plot:
+                macd_range = [
+                    min(data_period['MACD'].min(), data_period['Signal Line'].min()) * 1.05,
+                    max(data_period['MACD'].max(), data_period['Signal Line'].max()) * 1.05
+                ]
+
+            # Create subplots
+            fig = make_subplots(rows=rows, cols=1, shared_xaxes=True,
+                                vertical_spacing=0.15,
+                                row_heights=[0.5] + [0.25] * (rows - 1),
+                                subplot_titles=('Price', 'RSI', 'MACD')[:rows],
+                                specs=[[{'secondary_y': True}]] + [[{}]] * (rows - 1))
+
+            # Candlestick chart
+            fig.add_trace(go.Candlestick(x=data_period.index,
+                                         open=data_period['Open'],
+                                         high=data_period['High'],
+                                         low=data_period['Low'],
+                                         close=data_period['Close'],
+                                         name='Candlesticks'), row=1, col=1)
+
+            # Add EMAs to the chart
+            for period in selected_emas:
+                fig.add_trace(go.Scatter(x=data_period.index, y=data_period[f'EMA_{period}'], mode='lines', name=f'EMA_{period}'), row=1, col=1)
+
+            # Daily news sentiment from headlines already in the store (never waits on the feed)
+            if add_sentiment_overlay:
+                docs = news_store.get_store().search('', tickers=[ticker], limit=1000)
+                daily = sentiment.daily_sentiment(docs)
+                daily = daily[(daily['Ticker'] == ticker) & (daily['Date'] >= data_period.index.min())]
+                if not daily.empty:
+                    fig.add_trace(go.Bar(x=daily['Date'], y=daily['Sentiment'], name='News Sentiment',
+                                         marker_color=['green' if v >= 0 else 'red' for v in daily['Sentiment']],
+                                         opacity=0.4), row=1, col=1, secondary_y=True)
+                    fig.update_yaxes(range=[-1, 1], title='Sentiment', showgrid=False, row=1, col=1, secondary_y=True)
+
+            current_row = 2
+            if add_rsi_plot:
+                fig.add_trace(go.Scatter(x=data_period.index, y=data_period['RSI'], mode='lines', name='RSI'), row=current_row, col=1)
+                fig.update_yaxes(range=rsi_range, row=current_row, col=1, title='RSI')
+                current_row += 1
+
+            if add_macd_plot:
+                fig.add_trace(go.Scatter(x=data_period.index, y=data_period['MACD'], mode='lines', name='MACD'), row=current_row, col=1)
+                fig.add_trace(go.Scatter(x=data_period.index, y=data_period['Signal Line'], mode='lines', name='Signal Line'), row=current_row, col=1)
+                fig.update_yaxes(range=macd_range, row=current_row, col=1, title='MACD')
+
+            # Update layout
+            fig.update_layout(
+                title=f'{ticker} Stock Price and Indicators',
+                xaxis_title='Date',
+                yaxis_title='Price',
+                height=400 + 200 * (rows - 1),
+                margin=dict(l=50, r=50, t=50, b=50),
+                legend=dict(x=0, y=1, traceorder='normal'),
+                xaxis_rangeslider_visible=False,
+                hovermode='x unified'  # Show hover information on x-axis
+            )
+
+        with timing.stage('render'):
+            st.plotly_chart(fig)
+
+    # Display RSS feed; the chart above is already on screen
     st.title('Stock News RSS Feed')
-    
-    with st.spinner("Fetching news..."):
-        feed = fetch_rss_feed(ticker)
-        
-        if feed.entries:
-            st.subheader(f"Recent News for {ticker}:")
-            for entry in feed.entries:
-                st.write(f"**Title:** {entry.title}")
-                st.write(f"**Link:** [Read more]({entry.link})")
-                st.write(f"**Published:** {entry.published}")
-                st.write("---")
-        else:
-            st.write("No news found for the given ticker symbol.")
+
+    # The page does not wait for the feed: a fragment polls until it lands
+    with timing.stage('news'):
+        refreshing = not news.fetch_news_async(ticker).done()
+        st.fragment(show_news, run_every=NEWS_POLL if refreshing else None)(ticker, refreshing)
+    entries = news.cached_news(ticker)
+
+    # Search headlines across the whole watchlist
+    st.subheader('Search Watchlist News')
+    watchlist = st.text_input('Watchlist (comma separated)', DEFAULT_WATCHLIST)
+    watchlist = [t.strip().upper() for t in watchlist.split(',') if t.strip()]
+    store = news_store.get_store()
+    if entries:
+        store.add(ticker, entries)
+    news_store.ingest_watchlist_async(watchlist)
+
+    query = st.text_input('Search headlines')
+    if query:
+        with timing.stage('search'):
+            results = store.search(query, tickers=watchlist)
+        st.write(f"{len(results)} matching headlines")
+        for doc in results:
+            st.write(f"**{doc['title']}** ({', '.join(doc['tickers'])}) - [Read more]({doc['link']})")
+
+    timing.finish_rerun()
 
 if __name__ == "__main__":
+    market_data.enable_copy_on_write()
     main()
@@ -0,0 +1,39 @@
+import streamlit as st
+import screener
+import timing
+from assets import INDEX_ETFS
+from dashboard_core import universe_controls
+
+timing.begin_rerun('MomentumScreener')
+
+# Streamlit app title
+st.set_page_config(page_title="Momentum Screener", layout="wide")
+st.title('Relative Strength Screener')
+
+tickers = universe_controls('screener')
+
+# Benchmark and ordering
+st.sidebar.header('Ranking')
+benchmark = st.sidebar.selectbox('Benchmark', list(INDEX_ETFS.values()))
+with timing.stage('indicators'):
+    table = screener.screen(tickers, benchmark) if tickers else None
+
+if table is None or table.empty:
+    st.error('No prices for the selected tickers.')
+else:
+    sort_by = st.sidebar.selectbox('Sort by', list(table.columns), index=list(table.columns).index('Score'))
+    descending = st.sidebar.checkbox('Descending', value=sort_by != 'Rank')
+    top = st.sidebar.slider('Rows', 1, len(table), min(100, len(table))) if len(table) > 1 else 1
+    shown = table.sort_values(sort_by, ascending=not descending, na_position='last').head(top)
+
+    # Returns and distances are fractions; show them as percentages
+    percent = [c for c in table.columns if c not in ('Price', 'Score', 'Rank')]
+    config = {c: st.column_config.NumberColumn(c, format='%.1f%%') for c in percent}
+    config['Score'] = st.column_config.ProgressColumn('Score', min_value=0, max_value=100, format='%.0f')
+    st.caption(f"{len(table)} tickers ranked against {benchmark}, prices to "
+               f"{screener.get_screener(tickers, benchmark).last_date:%Y-%m-%d}")
+    with timing.stage('render'):
+        shown = shown.assign(**{c: shown[c] * 100 for c in percent})
+        st.dataframe(shown, column_config=config, height=min(35 * (len(shown) + 1) + 3, 900))
+
+timing.finish_rerun()
@@ -0,0 +1,56 @@
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+import market_data
+import pairs
+import timing
+from dashboard_core import universe_controls
+
+timing.begin_rerun('PairsScanner')
+
+# Streamlit app title
+st.set_page_config(page_title="Pairs Scanner", layout="wide")
+st.title('Pairs Trading Scanner')
+
+tickers = universe_controls('pairs')
+
+# Date window and test options
+st.sidebar.header('Test')
+num_years = st.sidebar.slider('Years of history', 1, 10, 5)
+end_date = pd.Timestamp.today().strftime('%Y-%m-%d')
+start_date = (pd.Timestamp.today() - pd.DateOffset(years=num_years)).strftime('%Y-%m-%d')
+min_correlation = st.sidebar.slider('Minimum return correlation', -1.0, 1.0, pairs.MIN_CORRELATION, 0.05)
+lags = st.sidebar.slider('ADF lags', 0, 10, pairs.ADF_LAGS)
+level = st.sidebar.selectbox('Significance', sorted(pairs.CRITICAL_VALUES), index=1, format_func=lambda v: f'{v:.0%}')
+only_cointegrated = st.sidebar.checkbox('Only cointegrated pairs', value=True)
+
+if len(tickers) < 2:
+    st.error('Enter at least two tickers.')
+else:
+    with timing.stage('indicators'):
+        table = pairs.scan(tickers, start_date, end_date, min_correlation, lags, level)
+    shown = table[table['Cointegrated']] if only_cointegrated else table
+    st.caption(f"{len(table):,} pairs with return correlation of at least {min_correlation:.2f} tested, "
+               f"{int(table['Cointegrated'].sum()):,} cointegrated at {level:.0%}")
+
+    with timing.stage('render'):
+        st.dataframe(shown.round(3), hide_index=True)
+
+    # Spread of one pair with its z-score bands
+    if not shown.empty:
+        labels = (shown['Ticker 1'] + ' / ' + shown['Ticker 2']).head(200).tolist()
+        choice = st.selectbox('Pair', labels)
+        row = shown.iloc[labels.index(choice)]
+        prices = market_data.price_matrix([row['Ticker 1'], row['Ticker 2']], start_date, end_date)
+        spread = pairs.spread(prices[row['Ticker 1']], prices[row['Ticker 2']], row['Hedge ratio'],
+                              row['Intercept']).dropna()
+        sigma = spread.std()
+        fig = go.Figure(go.Scatter(x=spread.index, y=spread, mode='lines', name='Spread'))
+        for z, dash in [(0, 'solid'), (1, 'dot'), (-1, 'dot'), (2, 'dash'), (-2, 'dash')]:
+            fig.add_hline(y=z * sigma, line_dash=dash, line_color='gray')
+        fig.update_layout(title=f"log {row['Ticker 1']} - {row['Hedge ratio']:.3f} x log {row['Ticker 2']} "
+                                f"- {row['Intercept']:.3f} (half-life {row['Half-life']:.1f} days)",
+                          xaxis_title='Date', yaxis_title='Spread')
+        st.plotly_chart(fig)
+
+timing.finish_rerun()
@@ -0,0 +1,337 @@
+"""
+Background alert scanner for a watchlist.
+
+    python alerts.py AAPL MSFT NVDA --every 300         # poll market_data every 5 minutes
+    python alerts.py --replay --interval 5m             # scan bars replayed from the history store
+    python alerts.py --synthetic 1000                   # time scan cycles over 1000 synthetic tickers
+
+Every ticker keeps streaming indicator states from incremental.py (RSI,
+Bollinger Bands and the 200-bar SMA), so a new bar costs a few O(1) updates
+instead of recomputing the history. On each bar the scanner evaluates the
+IAC8 rules from indicators.generate_signals (Combined_Signal > 1 is a buy,
+< -1 a sell) and the SMA trend of trend.py. It emits an alert only when a
+ticker's signal or trend state changes. Alerts go to Scanner.alerts (a
+queue.Queue) and are appended as JSON lines to ALERT_LOG.
+
+Trend flips follow indicators.trend_periods: a run of SMA moves in one
+direction becomes the ticker's trend once it is longer than min_days, the
+length that trend.py needs to keep a period.
+
+poll() feeds the newest bar of each download as partial: the states from
+before it are kept, and the next poll replaces it with the bar fetched again
+for the same timestamp, so today's bar is only final once a newer one
+arrives. Alerts compare against the states last announced.
+"""
+import argparse
+import copy
+import json
+import math
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import incremental
+from cache_store import CACHE_DIR
+
+ALERT_LOG = os.environ.get('PF_ALERT_LOG', os.path.join(CACHE_DIR, 'alerts.jsonl'))
+
+DAY_NS = 24 * 60 * 60 * 10 ** 9
+
+SIGNALS = {1: 'buy', -1: 'sell', 0: 'none'}
+TRENDS = {1: 'uptrend', -1: 'downtrend', 0: 'none'}
+
+
+class TickerState:
+    """Streaming indicators and the last signal and trend states of one ticker."""
+
+    def __init__(self, rsi_window, bb_window, bb_std, trend_window):
+        self.rsi = incremental.RSI(rsi_window)
+        self.bands = incremental.Bollinger(bb_window, bb_std)
+        self.sma = incremental.MovingAverage(trend_window)
+        self.last_timestamp = None
+        self.last_sma = math.nan
+        self.run_direction = 0  # direction of the SMA's latest moves
+        self.run_start = None  # timestamp of the bar before the run started
+        self.signal = 0
+        self.trend = 0
+        self.rollback = None  # copy of this state from before a partial last bar
+
+
+class Scanner:
+    def __init__(self, tickers=(), rsi_window=14, bb_window=20, bb_std=2, rsi_buy_level=30, rsi_sell_level=70,
+                 trend_window=200, min_days=50, log_path=ALERT_LOG):
+        """
+        :param tickers: Initial watchlist; tickers are also added on their first bar.
+        :param rsi_buy_level: RSI below which the RSI signal is a buy, as in IAC8.
+        :param rsi_sell_level: RSI above which the RSI signal is a sell.
+        :param trend_window: SMA window of the trend, as in trend.py.
+        :param min_days: Days a run of SMA moves must last to become the trend.
+        :param log_path: JSON lines file the alerts are appended to, or None.
+        """
+        self.params = (rsi_window, bb_window, bb_std, trend_window)
+        # Same clamping as generate_signals
+        self.rsi_buy_level = max(0, min(100, rsi_buy_level))
+        self.rsi_sell_level = max(0, min(100, rsi_sell_level))
+        self.min_ns = (min_days + 1) * DAY_NS
+        self.log_path = log_path
+        self.alerts = queue.Queue()
+        self.states = {}
+        self.lock = threading.Lock()
+        self.last_cycle_seconds = None
+        self._stopped = threading.Event()
+        self._thread = None
+        for ticker in tickers:
+            self._state(ticker)
+
+    def _state(self, ticker):
+        ticker = ticker.upper()
+        state = self.states.get(ticker)
+        if state is None:
+            state = self.states[ticker] = TickerState(*self.params)
+        return state
+
+    def warm_up(self, ticker, data):
+        """Feed the bars of an OHLCV DataFrame to ticker's states without emitting alerts."""
+        closes = data['Close'].to_numpy(dtype=float)
+        dates = pd.DatetimeIndex(data.index).as_unit('ns').asi8
+        with self.lock:
+            state = self._state(ticker)
+            for timestamp, close in zip(dates, closes):
+                state.signal, state.trend, _ = self._update(state, int(timestamp), close)
+
+    def _update(self, state, timestamp, close):
+        # Update the indicators with one bar; return the new signal and trend, and the RSI
+        bar = {'Close': close}
+        rsi = state.rsi.update(bar)
+        _, upper, lower = state.bands.update(bar)
+        sma = state.sma.update(bar)
+        if not state.sma.window.full():
+            sma = math.nan  # indicators.sma has no min_periods
+
+        rsi_signal = 1 if rsi < self.rsi_buy_level < 100 else -1 if rsi > self.rsi_sell_level > 0 else 0
+        bb_signal = 1 if close < lower else -1 if close > upper else 0
+        combined = rsi_signal + bb_signal
+        signal = 1 if combined > 1 else -1 if combined < -1 else 0
+
+        if not (math.isnan(sma) or math.isnan(state.last_sma)) and sma != state.last_sma:
+            direction = 1 if sma > state.last_sma else -1
+            if direction != state.run_direction:
+                state.run_direction, state.run_start = direction, state.last_timestamp
+        trend = state.trend
+        if state.run_direction != trend and state.run_start is not None and timestamp - state.run_start >= self.min_ns:
+            trend = state.run_direction
+
+        state.last_sma = sma
+        state.last_timestamp = timestamp
+        return signal, trend, rsi
+
+    def update(self, ticker, timestamp, bar):
+        """Feed one bar of ticker; return the alerts it raised (also queued and logged)."""
+        return self.on_bars(timestamp, {ticker: bar})
+
+    def on_bars(self, timestamp, bars, partial=()):
+        """
+        Feed one timestamp's bars ({ticker: bar}) and return the alerts raised.
+
+        Has the signature of a replay.Replay subscriber, so a scanner can be
+        subscribed to a replay directly.
+
+        :param partial: Tickers whose bar may still change; a later bar at
+            the same timestamp replaces it instead of being skipped.
+        """
+        started = time.perf_counter()
+        timestamp = pd.Timestamp(timestamp).value
+        partial = {ticker.upper() for ticker in partial}
+        raised = []
+        with self.lock:
+            for ticker, bar in bars.items():
+                ticker = ticker.upper()
+                state = announced = self._state(ticker)
+                if state.last_timestamp is not None and timestamp <= state.last_timestamp:
+                    if timestamp < state.last_timestamp or state.rollback is None:
+                        continue
+                    # Replace the partial last bar, starting from the states before it
+                    state = self.states[ticker] = state.rollback
+                state.rollback = None
+                if ticker in partial:
+                    state.rollback = copy.deepcopy(state)
+                close = float(bar['Close'])
+                signal, trend, rsi = self._update(state, timestamp, close)
+                if signal != announced.signal:
+                    raised.append(self._alert(ticker, timestamp, 'signal', SIGNALS[signal], SIGNALS[announced.signal],
+                                              close, rsi))
+                if trend != announced.trend:
+                    raised.append(self._alert(ticker, timestamp, 'trend', TRENDS[trend], TRENDS[announced.trend],
+                                              close, rsi))
+                state.signal, state.trend = signal, trend
+        self.last_cycle_seconds = time.perf_counter() - started
+        self._publish(raised)
+        return raised
+
+    def _alert(self, ticker, timestamp, kind, state, previous, close, rsi):
+        return {'time': pd.Timestamp(timestamp).isoformat(), 'ticker': ticker, 'kind': kind, 'state': state,
+                'previous': previous, 'close': close, 'rsi': None if math.isnan(rsi) else round(rsi, 2)}
+
+    def _publish(self, raised):
+        for alert in raised:
+            self.alerts.put(alert)
+        if raised and self.log_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.log_path)), exist_ok=True)
+            with open(self.log_path, 'a') as f:
+                f.writelines(json.dumps(alert) + '\n' for alert in raised)
+
+    def poll(self, download, interval='1d'):
+        """
+        Fetch and scan the bars that arrived since the last poll of every ticker.
+
+        New tickers are first warmed up with enough history for the SMA. The
+        newest bar of every ticker is fed as partial and replaced by the next
+        poll (see on_bars).
+
+        :param download: Function(ticker, start=, interval=) returning OHLCV,
+            e.g. market_data.download.
+        :return: The alerts raised.
+        """
+        trend_window = self.params[3]
+        frames = {}
+        for ticker in list(self.states):
+            state = self.states[ticker]
+            if state.last_timestamp is None:
+                # Calendar days covering about twice the SMA window of daily bars
+                days = 3 * trend_window if interval == '1d' else 7
+                start = pd.Timestamp.now().normalize() - pd.Timedelta(days=days)
+                history = download(ticker, start=start.strftime('%Y-%m-%d'), interval=interval)
+                if history is not None and len(history) > 1:
+                    self.warm_up(ticker, history.iloc[:-1])
+                    frames[ticker] = history.iloc[-1:]
+                continue
+            start = pd.Timestamp(state.last_timestamp).normalize().strftime('%Y-%m-%d')
+            data = download(ticker, start=start, interval=interval)
+            if data is not None and len(data):
+                frames[ticker] = data
+        grouped = list(_by_timestamp(frames))
+        newest = {ticker: timestamp for timestamp, bars in grouped for ticker in bars}
+        raised = []
+        for timestamp, bars in grouped:
+            raised += self.on_bars(timestamp, bars, partial=[t for t in bars if newest[t] == timestamp])
+        return raised
+
+    def run(self, download, interval='1d', every=60, on_alerts=None):
+        """Poll every `every` seconds until stop(), passing each poll's alerts to on_alerts."""
+        self._stopped.clear()
+        while not self._stopped.is_set():
+            started = time.perf_counter()
+            raised = self.poll(download, interval)
+            if on_alerts is not None:
+                on_alerts(raised)
+            self._stopped.wait(max(0.0, every - (time.perf_counter() - started)))
+
+    def start(self, download, interval='1d', every=60, on_alerts=None):
+        """Run the polling loop in a daemon thread."""
+        self._thread = threading.Thread(target=self.run, args=(download, interval, every, on_alerts),
+                                        daemon=True, name='alerts')
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def snapshot(self):
+        """Return the current signal and trend of every ticker as a DataFrame."""
+        with self.lock:
+            return pd.DataFrame({'signal': [SIGNALS[s.signal] for s in self.states.values()],
+                                 'trend': [TRENDS[s.trend] for s in self.states.values()],
+                                 'last_bar': [pd.Timestamp(s.last_timestamp) if s.last_timestamp is not None
+                                              else pd.NaT for s in self.states.values()]},
+                                index=pd.Index(list(self.states), name='Ticker'))
+
+
+def _by_timestamp(frames):
+    # Merge {ticker: OHLCV frame} into (timestamp, {ticker: bar}) in time order
+    rows = []
+    for ticker, data in frames.items():
+        index = data.index.tz_convert(None) if getattr(data.index, 'tz', None) else data.index
+        for timestamp, close in zip(pd.DatetimeIndex(index).as_unit('ns').asi8, data['Close'].to_numpy(dtype=float)):
+            rows.append((int(timestamp), ticker, close))
+    rows.sort()
+    grouped = {}
+    for timestamp, ticker, close in rows:
+        grouped.setdefault(timestamp, {})[ticker] = {'Close': close}
+    return grouped.items()
+
+
+def read_log(path=ALERT_LOG, limit=None):
+    """Return the logged alerts, newest last, as a DataFrame."""
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=['time', 'ticker', 'kind', 'state', 'previous', 'close', 'rsi'])
+    with open(path) as f:
+        lines = f.readlines()
+    return pd.DataFrame([json.loads(line) for line in (lines[-limit:] if limit else lines)])
+
+
+def _synthetic_cycles(n_tickers, n_bars, warm_bars):
+    # Time scan cycles of n_tickers synthetic tickers, one new bar each
+    from benchmarks.synthetic import ohlcv
+
+    closes = np.stack([ohlcv(warm_bars + n_bars, seed=i)['Close'].to_numpy() for i in range(n_tickers)])
+    dates = pd.bdate_range('2000-01-03', periods=warm_bars + n_bars).as_unit('ns').asi8
+    tickers = [f'T{i:04d}' for i in range(n_tickers)]
+    scanner = Scanner(tickers, log_path=None)
+    started = time.perf_counter()
+    for i in range(warm_bars):
+        scanner.on_bars(dates[i], {t: {'Close': closes[j, i]} for j, t in enumerate(tickers)})
+    warm = time.perf_counter() - started
+    while not scanner.alerts.empty():
+        scanner.alerts.get()
+    cycles, alerts = [], 0
+    for i in range(warm_bars, warm_bars + n_bars):
+        bars = {t: {'Close': closes[j, i]} for j, t in enumerate(tickers)}
+        alerts += len(scanner.on_bars(dates[i], bars))
+        cycles.append(scanner.last_cycle_seconds)
+    print(f'{n_tickers} tickers: warm-up of {warm_bars} bars {warm:.1f}s, scan cycle '
+          f'median {np.median(cycles) * 1000:.1f} ms, max {max(cycles) * 1000:.1f} ms, '
+          f'{alerts / n_bars:.1f} alerts per cycle')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scan a watchlist for IAC8 signal and SMA trend changes.')
+    parser.add_argument('tickers', nargs='*', help='Watchlist (default: every stored ticker)')
+    parser.add_argument('--interval', default='1d')
+    parser.add_argument('--every', type=float, default=60, help='Seconds between polls')
+    parser.add_argument('--replay', action='store_true', help='Scan bars replayed from the history store')
+    parser.add_argument('--speed', default='max', help='Replay speed, market seconds per second, or max')
+    parser.add_argument('--synthetic', type=int, metavar='TICKERS', help='Time scan cycles over synthetic tickers')
+    parser.add_argument('--bars', type=int, default=50, help='Cycles to time with --synthetic')
+    parser.add_argument('--log', default=ALERT_LOG, help='JSON lines file the alerts are appended to')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        _synthetic_cycles(args.synthetic, args.bars, 400)
+        raise SystemExit(0)
+
+    def show(alerts):
+        for alert in alerts:
+            print(f"{alert['time']} {alert['ticker']:<6} {alert['kind']:<6} {alert['previous']} -> {alert['state']}"
+                  f" (close {alert['close']:.2f}, RSI {alert['rsi']})")
+
+    tickers = [t.upper() for t in args.tickers]
+    if args.replay:
+        import replay
+
+        frames = replay.load_stored(tickers or None, args.interval)
+        scanner = Scanner(frames, log_path=args.log)
+        source = replay.Replay(frames, args.interval, replay.speed_from(args.speed))
+        source.subscribe(lambda timestamp, bars: show(scanner.on_bars(timestamp, bars)))
+        source.run()
+    else:
+        import market_data
+        from history_store import HistoryStore
+
+        scanner = Scanner(tickers or HistoryStore().tickers(), log_path=args.log)
+        scanner.run(market_data.download, args.interval, args.every, on_alerts=show)
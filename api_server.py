@@ -0,0 +1,267 @@
+"""
+Headless HTTP/JSON (and Arrow) API over the dashboard analytics.
+
+    python api_server.py --port 8765
+    curl 'http://127.0.0.1:8765/indicators?tickers=AAPL,MSFT&start=2023-01-01&names=RSI,MACD'
+
+Endpoints (all GET, tickers is a comma separated list):
+    /ohlcv       price data
+    /indicators  names=MA,RSI,Bollinger,MACD,Stochastic,MFI,SMA
+    /signals     IAC8 RSI/Bollinger signals (rsi_window, bb_window, bb_std, rsi_buy, rsi_sell)
+    /trends      200-day SMA trend periods from trend.py (window, min_days, merge_days)
+    /events      indexed chart events (events=golden_cross,..., optional tickers, start, end, days)
+    /health
+    /metrics     Prometheus text format timings per endpoint and stage
+    /memory      bytes held per cached ticker and per dashboard session
+
+Add format=arrow to get an Arrow IPC stream with a Ticker column instead of JSON.
+Data and indicators come from the same process-wide caches as the dashboards.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+import compact
+import market_data
+import timing
+
+HOST = os.environ.get('PF_API_HOST', '127.0.0.1')
+PORT = int(os.environ.get('PF_API_PORT', 8765))
+MAX_TICKERS = 500
+DEFAULT_INDICATORS = ['RSI', 'MACD', 'Bollinger']
+
+# Column names for indicators that return tuples
+TUPLE_COLUMNS = {
+    'MACD': ['MACD', 'Signal', 'Histogram'],
+    'Stochastic': ['Stochastic_K', 'Stochastic_D'],
+}
+
+_executor = ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4), thread_name_prefix='api',
+                               initializer=timing.set_page, initargs=('api',))
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _arg(query, name, default=None, cast=str):
+    values = query.get(name)
+    if not values:
+        return default
+    try:
+        return cast(values[0])
+    except ValueError:
+        raise BadRequest(f'invalid value for {name}: {values[0]}')
+
+
+def _tickers(query):
+    tickers = [t.strip().upper() for t in _arg(query, 'tickers', '').split(',') if t.strip()]
+    if not tickers:
+        raise BadRequest('tickers is required')
+    if len(tickers) > MAX_TICKERS:
+        raise BadRequest(f'at most {MAX_TICKERS} tickers per request')
+    return list(dict.fromkeys(tickers))
+
+
+def indicator_frame(ticker, start, end, names):
+    """Collect several cached indicators for ticker into one DataFrame."""
+    columns = {}
+    for name in names:
+        if name not in market_data.INDICATORS or name in ('Signals', 'Trends'):
+            raise BadRequest(f'unknown indicator: {name}')
+        result = market_data.indicator(ticker, start, end, name)
+        if isinstance(result, tuple):
+            columns.update(zip(TUPLE_COLUMNS[name], result))
+        elif isinstance(result, pd.DataFrame):
+            columns.update(result.items())
+        else:
+            columns[name] = result
+    return pd.DataFrame(columns)
+
+
+def trend_payload(ticker, start, end, window, min_days, merge_days):
+    result = market_data.indicator(ticker, start, end, 'Trends', window=window, min_days=min_days, merge_days=merge_days)
+
+    def periods(values):
+        return [{'start': s.strftime('%Y-%m-%d'), 'end': e.strftime('%Y-%m-%d'), 'days': (e - s).days} for s, e in values]
+
+    return {'uptrend': periods(result['uptrend']), 'downtrend': periods(result['downtrend'])}
+
+
+def frame_to_arrow(frames):
+    import pyarrow as pa
+
+    combined = compact.to_long(frames)
+    sink = pa.BufferOutputStream()
+    table = pa.Table.from_pandas(combined, preserve_index=False)
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def frames_to_json(frames, errors):
+    # Compact float32 columns are widened at the edge so JSON keeps full digits
+    parts = [f'{json.dumps(t)}:{compact.widen(frame).to_json(orient="split", date_format="iso")}'
+             for t, frame in frames.items()]
+    parts += [f'{json.dumps(t)}:{json.dumps({"error": message})}' for t, message in errors.items()]
+    return ('{' + ','.join(parts) + '}').encode()
+
+
+async def _per_ticker(tickers, func, *args):
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(*(loop.run_in_executor(_executor, func, t, *args) for t in tickers),
+                                   return_exceptions=True)
+    values, errors = {}, {}
+    for ticker, result in zip(tickers, results):
+        if isinstance(result, BadRequest):
+            raise result
+        if isinstance(result, Exception):
+            errors[ticker] = str(result)
+        else:
+            values[ticker] = result
+    return values, errors
+
+
+async def dispatch(path, query):
+    """Return (status, content type, body) for one request."""
+    if path == '/health':
+        return 200, 'application/json', b'{"status":"ok"}'
+    if path == '/metrics':
+        return 200, 'text/plain; version=0.0.4', timing.prometheus_text().encode()
+    if path == '/memory':
+        by_ticker, by_session = market_data.memory_report()
+        body = {'tickers': by_ticker.to_dict(orient='records'), 'sessions': by_session.to_dict(orient='records')}
+        return 200, 'application/json', json.dumps(body).encode()
+
+    start = _arg(query, 'start')
+    end = _arg(query, 'end')
+    fmt = _arg(query, 'format', 'json')
+
+    if path == '/trends':
+        tickers = _tickers(query)
+        args = (start, end, _arg(query, 'window', 200, int), _arg(query, 'min_days', 50, int),
+                _arg(query, 'merge_days', 50, int))
+        values, errors = await _per_ticker(tickers, trend_payload, *args)
+        values.update({t: {'error': message} for t, message in errors.items()})
+        return 200, 'application/json', json.dumps(values).encode()
+
+    if path == '/events':
+        import events
+
+        names = [n.strip() for n in _arg(query, 'events', '').split(',') if n.strip()] or None
+        tickers = [t.strip().upper() for t in _arg(query, 'tickers', '').split(',') if t.strip()] or None
+        try:
+            matches = events.get_index().query(names, tickers, start, end, _arg(query, 'days', None, int))
+        except ValueError as e:
+            raise BadRequest(str(e))
+        except FileNotFoundError as e:
+            return 503, 'application/json', json.dumps({'error': str(e)}).encode()
+        return 200, 'application/json', matches.to_json(orient='records', date_format='iso').encode()
+
+    if path == '/ohlcv':
+        tickers = _tickers(query)
+        frames, errors = await _per_ticker(tickers, market_data.load_prices, start, end)
+    elif path == '/indicators':
+        tickers = _tickers(query)
+        names = [n.strip() for n in _arg(query, 'names', ','.join(DEFAULT_INDICATORS)).split(',') if n.strip()]
+        frames, errors = await _per_ticker(tickers, indicator_frame, start, end, names)
+    elif path == '/signals':
+        tickers = _tickers(query)
+        params = {
+            'rsi_window': _arg(query, 'rsi_window', 14, int),
+            'bb_window': _arg(query, 'bb_window', 20, int),
+            'bb_std': _arg(query, 'bb_std', 2, float),
+            'rsi_buy_level': _arg(query, 'rsi_buy', 30, float),
+            'rsi_sell_level': _arg(query, 'rsi_sell', 70, float),
+        }
+
+        def signal_frame(ticker):
+            return market_data.indicator(ticker, start, end, 'Signals', **params)
+
+        frames, errors = await _per_ticker(tickers, signal_frame)
+    else:
+        return 404, 'application/json', b'{"error":"not found"}'
+
+    if fmt == 'arrow':
+        if errors:
+            return 502, 'application/json', json.dumps({'errors': errors}).encode()
+        try:
+            body = frame_to_arrow(frames)
+        except ImportError:
+            return 501, 'application/json', b'{"error":"pyarrow is not installed"}'
+        return 200, 'application/vnd.apache.arrow.stream', body
+    return 200, 'application/json', frames_to_json(frames, errors)
+
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           500: 'Internal Server Error', 501: 'Not Implemented', 502: 'Bad Gateway', 503: 'Service Unavailable'}
+
+
+async def handle_connection(reader, writer):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            try:
+                method, target, version = request_line.decode('latin-1').split()
+            except ValueError:
+                break
+            keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+
+            if method != 'GET':
+                status, content_type, body = 405, 'application/json', b'{"error":"only GET is supported"}'
+            else:
+                url = urlsplit(target)
+                started = time.perf_counter()
+                try:
+                    status, content_type, body = await dispatch(url.path, parse_qs(url.query))
+                except BadRequest as e:
+                    status, content_type, body = 400, 'application/json', json.dumps({'error': str(e)}).encode()
+                except Exception as e:
+                    status, content_type, body = 500, 'application/json', json.dumps({'error': str(e)}).encode()
+                if url.path != '/metrics':
+                    timing.observe('api', f'request:{url.path if status != 404 else "unknown"}',
+                                   time.perf_counter() - started)
+
+            head = (f'HTTP/1.1 {status} {REASONS.get(status, "")}\r\n'
+                    f'Content-Type: {content_type}\r\n'
+                    f'Content-Length: {len(body)}\r\n'
+                    f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+            writer.write(head.encode('latin-1') + body)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host=HOST, port=PORT):
+    server = await asyncio.start_server(handle_connection, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve indicators, trends and signals over HTTP.')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    args = parser.parse_args()
+    market_data.enable_copy_on_write()
+    asyncio.run(serve(args.host, args.port))
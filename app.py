@@ -0,0 +1,17 @@
+import streamlit as st
+from dashboard_core import render_dashboard
+from assets import DASHBOARDS
+
+# Multipage app serving every dashboard from one process, so all pages share
+# the price and indicator caches in market_data
+st.set_page_config(page_title="Finance Data Dashboard", layout="wide")
+
+
+def dashboard_page(name):
+    def page():
+        render_dashboard(name)
+    return st.Page(page, title=DASHBOARDS[name]['page_title'], url_path=name.lower())
+
+
+pages = [dashboard_page(name) for name in DASHBOARDS]
+st.navigation(pages).run()
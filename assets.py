@@ -0,0 +1,208 @@
+# Asset-class dictionaries and dashboard layouts shared by IAC4-IAC7 and app.py
+
+STOCKS = {
+    'Google': 'GOOGL',
+    'Apple': 'AAPL',
+    'Microsoft': 'MSFT',
+    'Amazon': 'AMZN',
+    'Nvidia': 'NVDA',
+    'Meta': 'META'
+}
+
+FOREX_PAIRS = {
+    'USD/EUR': 'EURUSD=X',
+    'USD/JPY': 'JPY=X',
+    'GBP/USD': 'GBPUSD=X',
+    'USD/CHF': 'CHF=X',
+    'AUD/USD': 'AUDUSD=X',
+    'USD/CAD': 'CAD=X',
+    'NZD/USD': 'NZDUSD=X',
+    'USD/SGD': 'SGD=X'
+}
+
+MAJOR_FOREX_PAIRS = {
+    'EUR/USD': 'EURUSD=X',
+    'USD/JPY': 'JPY=X',
+    'GBP/USD': 'GBPUSD=X',
+    'USD/CHF': 'CHF=X',
+    'AUD/USD': 'AUDUSD=X',
+    'USD/CAD': 'CAD=X'
+}
+
+BROAD_ETFS = {
+    'SPDR S&P 500 ETF Trust': 'SPY',
+    'Invesco QQQ Trust': 'QQQ',
+    'iShares Russell 2000 ETF': 'IWM',
+    'iShares MSCI Emerging Markets ETF': 'EEM',
+    'Vanguard Total Stock Market ETF': 'VTI'
+}
+
+SECTOR_ETFS = {
+    'SPY': 'SPY',
+    'IVV': 'IVV',
+    'VTI': 'VTI',
+    'XLF': 'XLF',
+    'XLI': 'XLI',
+    'XLB': 'XLB'
+}
+
+INDEX_ETFS = {
+    'SPY (S&P 500)': 'SPY',
+    'QQQ (Nasdaq 100)': 'QQQ',
+    'DIA (Dow Jones)': 'DIA',
+    'IWM (Russell 2000)': 'IWM',
+    'VTI (Total Stock Market)': 'VTI',
+    'GLD (Gold)': 'GLD'
+}
+
+CRYPTOS = {
+    'Bitcoin': 'BTC-USD',
+    'Ethereum': 'ETH-USD',
+    'Ripple': 'XRP-USD',
+    'Litecoin': 'LTC-USD',
+    'Bitcoin Cash': 'BCH-USD'
+}
+
+ALT_CRYPTOS = {
+    'Bitcoin': 'BTC-USD',
+    'Ethereum': 'ETH-USD',
+    'Ripple': 'XRP-USD',
+    'Litecoin': 'LTC-USD',
+    'Cardano': 'ADA-USD'
+}
+
+MAJOR_CRYPTOS = {
+    'Bitcoin': 'BTC-USD',
+    'Ethereum': 'ETH-USD',
+    'Cardano': 'ADA-USD',
+    'Dogecoin': 'DOGE-USD',
+    'Ripple': 'XRP-USD',
+    'Litecoin': 'LTC-USD'
+}
+
+
+# Universe of trend.py
+TREND_TICKERS = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'FB', 'TSLA', 'BRK-B', 'NVDA', 'JPM', 'JNJ',
+    'V', 'PG', 'UNH', 'HD', 'MA', 'DIS', 'PYPL', 'NFLX', 'CMCSA', 'PEP',
+    'VZ', 'T', 'MRK', 'INTC', 'CSCO', 'ABT', 'NKE', 'PFE', 'XOM', 'TMO',
+    'ACN', 'IBM', 'CVX', 'LLY', 'PM', 'WMT', 'MDT', 'COST', 'AMGN', 'TXN',
+    'AVGO', 'ADBE', 'IBM', 'QCOM', 'BMY', 'NOW', 'LMT', 'ISRG', 'SBUX', 'CAT',
+    'HON', 'NEM', 'SYY', 'AMAT', 'ATVI', 'CHTR', 'GILD', 'ADI', 'SYK', 'FISV',
+    'DHR', 'MMC', 'LRCX', 'SPGI', 'C', 'BA', 'ADP', 'CME', 'BIIB', 'MS',
+    'ZTS', 'GS', 'NTRS', 'LHX', 'MET', 'SRE', 'KMB', 'ADSK', 'NTES', 'CDW',
+    'CB', 'PXD', 'LNT', 'DOW', 'CARR', 'MPC', 'ETR', 'HIG', 'VRTX', 'NDAQ',
+    'NKE', 'FIS', 'DTE', 'TSN', 'OXY', 'MDLZ', 'PSA', 'CDK', 'MAR', 'FANG'
+'GOOGL', 'AAPL', 'MSFT', 'AMZN', 'META', 'TSLA', 'NFLX', 'NVDA', 'INTC', 'CSCO']
+
+
+# An asset class: sidebar prompt, name -> ticker choices, the word used in chart
+# titles, and any chart templates or subplots that do not apply to it.
+def asset_class(prompt, choices, label, exclude_templates=(), subplots=True):
+    return {
+        'prompt': prompt,
+        'choices': choices,
+        'label': label,
+        'exclude_templates': tuple(exclude_templates),
+        'subplots': subplots,
+    }
+
+
+MA_TEMPLATES = ['Candlestick with MA', 'Line Chart', 'Moving Averages Only', 'OHLC Chart']
+INDICATOR_TEMPLATES = ['Candlestick with Indicators', 'Line Chart', 'OHLC Chart']
+
+# Each dashboard is pure configuration for dashboard_core.render_dashboard:
+#   templates:       chart templates offered in the sidebar
+#   ma_templates:    templates that draw the short/long moving averages
+#   bollinger:       draw Bollinger Bands on candlestick templates
+#   subplots:        subplots always shown under the price chart
+#   optional:        subplots toggled by sidebar checkboxes, name -> default
+#   subplot_templates: templates the subplots apply to (None means all)
+#   row_height:      figure height per subplot row
+DASHBOARDS = {
+    'IAC4': {
+        'title': 'Finance Data Dashboard',
+        'page_title': 'Moving Averages',
+        'asset_classes': {
+            'Stock': asset_class('Choose a stock', STOCKS, 'Stock'),
+            'Forex': asset_class('Choose a forex pair', FOREX_PAIRS, 'Forex', exclude_templates=['Candlestick with MA']),
+            'ETF': asset_class('Choose an ETF', BROAD_ETFS, 'ETF'),
+            'Crypto': asset_class('Choose a cryptocurrency', CRYPTOS, 'Crypto'),
+        },
+        'end_date': '2024-07-30',
+        'templates': MA_TEMPLATES,
+        'ma_templates': ['Candlestick with MA', 'Moving Averages Only'],
+        'bollinger': False,
+        'subplots': [],
+        'optional': {},
+        'subplot_templates': None,
+        'row_height': 600,
+        'raw_data': True,
+    },
+    'IAC5': {
+        'title': 'Finance Data Dashboard',
+        'page_title': 'Moving Averages and RSI',
+        'asset_classes': {
+            'Stock': asset_class('Choose a stock', STOCKS, 'Stock'),
+            'Forex': asset_class('Choose a forex pair', FOREX_PAIRS, 'Forex', exclude_templates=['Candlestick with MA'], subplots=False),
+            'ETF': asset_class('Choose an ETF', SECTOR_ETFS, 'ETF'),
+            'Crypto': asset_class('Choose a cryptocurrency', ALT_CRYPTOS, 'Cryptocurrency'),
+        },
+        'end_date': '2024-07-30',
+        'templates': MA_TEMPLATES,
+        'ma_templates': ['Candlestick with MA', 'Moving Averages Only'],
+        'bollinger': False,
+        'subplots': ['RSI'],
+        'optional': {},
+        'subplot_templates': ['Candlestick with MA', 'Moving Averages Only', 'Line Chart'],
+        'row_height': 400,
+        'raw_data': False,
+    },
+    'IAC6': {
+        'title': 'Finance Data Dashboard',
+        'page_title': 'Bollinger Bands',
+        'asset_classes': {
+            'Stock': asset_class('Choose a stock', STOCKS, 'Stock'),
+            'Forex': asset_class('Choose a forex pair', MAJOR_FOREX_PAIRS, 'Forex'),
+            'ETF': asset_class('Choose an ETF', INDEX_ETFS, 'ETF'),
+            'Crypto': asset_class('Choose a cryptocurrency', MAJOR_CRYPTOS, 'Cryptocurrency'),
+        },
+        'end_date': '2024-07-30',
+        'templates': INDICATOR_TEMPLATES,
+        'ma_templates': ['Candlestick with Indicators'],
+        'bollinger': True,
+        'subplots': ['Volume', 'RSI'],
+        'optional': {'Beta': False},
+        'subplot_templates': None,
+        'row_height': 333,
+        'raw_data': False,
+    },
+    'IAC7': {
+        'title': 'Finance Data Dashboard',
+        'page_title': 'Technical Indicators',
+        'asset_classes': {
+            'Stock': asset_class('Choose a stock', STOCKS, 'Stock'),
+            'Forex': asset_class('Choose a forex pair', MAJOR_FOREX_PAIRS, 'Forex'),
+            'ETF': asset_class('Choose an ETF', INDEX_ETFS, 'ETF'),
+            'Crypto': asset_class('Choose a cryptocurrency', MAJOR_CRYPTOS, 'Cryptocurrency'),
+        },
+        'end_date': '2024-08-31',
+        'templates': INDICATOR_TEMPLATES,
+        'ma_templates': ['Candlestick with Indicators'],
+        'bollinger': True,
+        'subplots': ['Volume'],
+        'optional': {'RSI': True, 'MACD': False, 'Stochastic': False, 'MFI': False, 'Beta': False},
+        'subplot_templates': None,
+        'row_height': 250,
+        'raw_data': False,
+    },
+}
+
+
+def universe():
+    """Every ticker used by the dashboards and trend.py, without duplicates."""
+    tickers = []
+    for config in DASHBOARDS.values():
+        for asset in config['asset_classes'].values():
+            tickers.extend(asset['choices'].values())
+    tickers.extend(TREND_TICKERS)
+    return list(dict.fromkeys(tickers))
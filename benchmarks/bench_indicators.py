@@ -0,0 +1,184 @@
+"""
+Benchmarks for the indicator functions over synthetic OHLCV.
+
+    python benchmarks/bench_indicators.py                 # 1k and 100k bars, 1-100 tickers
+    python benchmarks/bench_indicators.py --full          # adds 10M bars and 1000 tickers
+    python benchmarks/bench_indicators.py --save          # record the results as the local baseline
+    python benchmarks/bench_indicators.py -k rsi --threshold 1.5
+
+Each case is timed asv-style: the call is repeated until a sample takes at
+least MIN_SAMPLE_SECONDS, and the best of --repeat samples is kept. Results
+are compared with benchmarks/baselines.json and the run fails if a case is
+more than --threshold times slower.
+
+Baselines are saved locally with --save and are not committed. Every run
+also times a fixed calibration workload, and baselines are scaled by how
+much faster or slower it ran than when they were saved, so a busier or
+slower machine does not show up as a regression.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(BENCH_DIR), BENCH_DIR]
+
+import indicators
+from synthetic import ohlcv
+
+BASELINES = os.path.join(BENCH_DIR, 'baselines.json')
+CALIBRATION = '_calibration'
+DEFAULT_THRESHOLD = 1.25
+MIN_SAMPLE_SECONDS = 0.1
+
+BARS = [1_000, 100_000]
+FULL_BARS = BARS + [10_000_000]
+TICKERS = [1, 10, 100]
+FULL_TICKERS = TICKERS + [1000]
+BARS_PER_TICKER = 1_000
+
+
+def _with_signal_inputs(data):
+    data = data.copy()
+    data['RSI'] = indicators.calculate_rsi(data)
+    indicators.add_bollinger_bands(data)
+    return data
+
+
+def _growth_input(data):
+    return data['Adj Close']
+
+
+# Benchmark name -> (setup(data) -> argument, function(argument))
+CASES = {
+    'calculate_rsi': (None, indicators.calculate_rsi),
+    'add_bollinger_bands': (lambda data: data.copy(), indicators.add_bollinger_bands),
+    'calculate_macd': (None, indicators.calculate_macd),
+    'calculate_stochastic': (None, indicators.calculate_stochastic),
+    'calculate_mfi': (None, indicators.calculate_mfi),
+    'generate_signals': (_with_signal_inputs, lambda data: indicators.generate_signals(data, 30, 70)),
+    'trend_segmentation': (indicators.sma, indicators.trend_periods),
+    'annual_growth_rates': (_growth_input, indicators.annual_growth_rates),
+}
+
+
+def synthetic_bars(n_bars, seed=0):
+    # Business days run out of calendar after a few hundred thousand bars,
+    # so large series use minute bars instead
+    return ohlcv(n_bars, seed=seed, freq='B' if n_bars <= 50_000 else 'min')
+
+
+def measure(func, repeat):
+    """Return the best time per call in seconds."""
+    number = 1
+    while True:
+        t = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - t
+        if elapsed >= MIN_SAMPLE_SECONDS or number >= 1_000_000:
+            break
+        number *= 10
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        t = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - t) / number)
+    return min(samples)
+
+
+def calibrate(repeat=5):
+    """Return the time of a fixed pandas workload, run alongside the cases to scale their baselines."""
+    close = synthetic_bars(100_000)['Close']
+    return measure(lambda: close.rolling(20).std().ewm(span=26, adjust=False).mean(), repeat)
+
+
+def run(names, bars, tickers, repeat=5):
+    """Time every case at every size; return {case id: seconds}."""
+    results = {}
+    for n_bars in bars:
+        data = synthetic_bars(n_bars)
+        for name in names:
+            setup, func = CASES[name]
+            argument = setup(data) if setup else data
+            results[f'{name}[bars={n_bars}]'] = measure(lambda: func(argument), repeat)
+            print(f'{name}[bars={n_bars}]: {results[f"{name}[bars={n_bars}]"]:.6f}s', flush=True)
+
+    for n_tickers in tickers:
+        universe = [synthetic_bars(BARS_PER_TICKER, seed) for seed in range(n_tickers)]
+        for name in names:
+            setup, func = CASES[name]
+            arguments = [setup(data) if setup else data for data in universe]
+
+            def run_all():
+                for argument in arguments:
+                    func(argument)
+
+            results[f'{name}[tickers={n_tickers}]'] = measure(run_all, repeat)
+            print(f'{name}[tickers={n_tickers}]: {results[f"{name}[tickers={n_tickers}]"]:.6f}s', flush=True)
+    return results
+
+
+def load_baselines(path=BASELINES):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_baselines(results, calibration, path=BASELINES):
+    """Store results in units of the calibration time, merged into the baselines at path."""
+    baselines = load_baselines(path)
+    if CALIBRATION not in baselines:
+        baselines = {CALIBRATION: 1.0}
+    baselines.update({case: seconds / calibration for case, seconds in results.items()})
+    with open(path, 'w') as f:
+        json.dump(baselines, f, indent=1, sort_keys=True)
+
+
+def scaled_baselines(baselines, calibration):
+    """Return the baselines in seconds on a machine where the calibration workload takes calibration seconds."""
+    # Files without a calibration entry hold plain seconds
+    unit = calibration / baselines[CALIBRATION] if CALIBRATION in baselines else 1.0
+    return {case: seconds * unit for case, seconds in baselines.items() if case != CALIBRATION}
+
+
+def regressions(results, baselines, threshold=DEFAULT_THRESHOLD):
+    """Return [(case id, baseline, result)] for cases slower than threshold x baseline."""
+    return [(case, baselines[case], seconds) for case, seconds in results.items()
+            if case in baselines and seconds > baselines[case] * threshold]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the indicator functions over synthetic OHLCV.')
+    parser.add_argument('-k', dest='pattern', default='', help='Only run cases whose name contains this')
+    parser.add_argument('--full', action='store_true', help='Include 10M bars and 1000 tickers')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Fail when a case is this many times slower than its baseline')
+    parser.add_argument('--save', action='store_true', help='Store the results as the new baselines')
+    parser.add_argument('--baselines', default=BASELINES)
+    args = parser.parse_args()
+
+    names = [name for name in CASES if args.pattern in name]
+    calibration = calibrate(args.repeat)
+    print(f'calibration: {calibration:.6f}s', flush=True)
+    results = run(names, FULL_BARS if args.full else BARS, FULL_TICKERS if args.full else TICKERS, args.repeat)
+
+    if args.save:
+        save_baselines(results, calibration, args.baselines)
+        print(f'Saved {len(results)} baselines to {args.baselines}')
+        sys.exit(0)
+
+    baselines = scaled_baselines(load_baselines(args.baselines), calibration)
+    missing = [case for case in results if case not in baselines]
+    if missing:
+        print(f'No baseline for {len(missing)} cases; run with --save to record them')
+    slower = regressions(results, baselines, args.threshold)
+    for case, baseline, seconds in slower:
+        print(f'REGRESSION {case}: {seconds:.6f}s vs baseline {baseline:.6f}s ({seconds / baseline:.2f}x)')
+    sys.exit(1 if slower else 0)
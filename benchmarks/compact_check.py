@@ -0,0 +1,76 @@
+"""
+Check that compact (float32) storage stays accurate and measure what it saves.
+
+    python benchmarks/compact_check.py --tickers 200 --bars 2500
+
+For every synthetic ticker the indicators computed from float32 prices are
+compared with float64 (compact.float32_report). The run fails if any
+indicator's error relative to its range exceeds --tolerance or more than
+--max-signal-changes of the IAC8 signals flip. It then fills the market_data
+caches with the same universe in both modes and prints their size.
+"""
+import argparse
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(BENCH_DIR), BENCH_DIR]
+
+import pandas as pd
+
+import compact
+import market_data
+import synthetic
+
+DEFAULT_TOLERANCE = 1e-5
+DEFAULT_MAX_SIGNAL_CHANGES = 0.001
+
+
+def accuracy(tickers, bars):
+    reports, changes = [], 0
+    for seed in range(tickers):
+        report = compact.float32_report(synthetic.ohlcv(bars, seed=seed))
+        changes += report.attrs['signal_changes']
+        reports.append(report)
+    worst = pd.concat(reports).groupby('Indicator', sort=False).max()
+    return worst, changes / (tickers * bars)
+
+
+def cache_bytes(tickers, bars, compact_mode):
+    market_data.clear()
+    compact.COMPACT = compact_mode
+    market_data.MAX_CACHE_BYTES = float('inf')
+    market_data.download = lambda ticker, start=None, end=None, interval='1d': synthetic.ohlcv(bars, seed=ticker)
+    for i in range(tickers):
+        ticker = f'T{i}'
+        market_data.load_prices(ticker)
+        for name, params in [('MA', {'window': 20}), ('MA', {'window': 100}), ('RSI', {'window': 14}),
+                             ('Bollinger', {'window': 20, 'num_std': 2}), ('MACD', {}), ('Stochastic', {}), ('MFI', {})]:
+            market_data.indicator(ticker, None, None, name, **params)
+    # Count memory shared between entries (e.g. the date index) once
+    return market_data.nbytes(list(market_data._prices.values()) + list(market_data._indicators.values()))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check float32 accuracy and memory savings of compact mode.')
+    parser.add_argument('--tickers', type=int, default=50)
+    parser.add_argument('--bars', type=int, default=2500)
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--max-signal-changes', type=float, default=DEFAULT_MAX_SIGNAL_CHANGES,
+                        help='Fraction of bars whose combined signal may differ')
+    args = parser.parse_args()
+
+    worst, signal_changes = accuracy(args.tickers, args.bars)
+    print(worst.to_string(float_format='{:.3g}'.format))
+    print(f'Signal changes: {signal_changes:.5%} of bars')
+
+    full = cache_bytes(args.tickers, args.bars, False)
+    small = cache_bytes(args.tickers, args.bars, True)
+    print(f'Cache bytes: float64 {full / 2 ** 20:.1f} MiB, compact {small / 2 ** 20:.1f} MiB ({small / full:.0%})')
+
+    failed = worst[worst['Max rel error'] > args.tolerance].index.tolist()
+    if failed:
+        print(f'Over the {args.tolerance:g} relative error tolerance: {", ".join(failed)}')
+    if signal_changes > args.max_signal_changes:
+        print(f'Too many signal changes (limit {args.max_signal_changes:.3%})')
+    sys.exit(1 if failed or signal_changes > args.max_signal_changes else 0)
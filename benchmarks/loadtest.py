@@ -0,0 +1,214 @@
+"""
+Concurrent-session load test of the Streamlit scripts.
+
+    python benchmarks/loadtest.py --sessions 1 5 10 20 --duration 30
+    python benchmarks/loadtest.py trend.py --sessions 8 --max-p95 1.5 --json
+
+Every simulated session is its own streamlit AppTest (own session state, as
+in a browser tab) driven from its own thread inside one process, as the
+Streamlit server runs sessions. Each session loops over a randomized
+interaction: enter or pick a ticker, move a slider, toggle a checkbox (e.g.
+Show MACD/Stochastic/MFI) or pick a chart template, then reruns the script.
+Data comes from an offline provider (synthetic by default, or replay) so the
+network is not measured.
+
+For each session count the run reports rerun latency percentiles, reruns per
+second, CPU use and RSS growth. Throughput that stops growing while latency
+keeps rising marks the saturation point. Exits with status 1 if p95 latency
+exceeds --max-p95 or any rerun raised.
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path[:0] = [REPO_DIR, BENCH_DIR]
+
+DEFAULT_SCRIPTS = ['IAC8.py', 'trend.py']
+TICKERS = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'NVDA', 'META', 'TSLA', 'JPM', 'V', 'WMT']
+
+# Sessions start one at a time: the first run compiles the script, and
+# compiling concurrently trips a CPython 3.11 ast.parse race
+_first_run_lock = threading.Lock()
+
+
+def rss_bytes():
+    """Current resident set size, or the peak where /proc is not available."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def interact(app, rng, intervals):
+    """Change one random widget of app; return a short description of the change."""
+    choices = []
+    for widget in app.text_input:
+        if 'ticker' in widget.label.lower():
+            choices.append(('text', widget))
+    for widget in list(app.selectbox) + list(app.sidebar.selectbox):
+        if widget.label.startswith('Interval') and not intervals:
+            continue
+        choices.append(('select', widget))
+    for widget in list(app.slider) + list(app.sidebar.slider):
+        if not isinstance(widget.value, tuple):
+            choices.append(('slider', widget))
+    for widget in list(app.checkbox) + list(app.sidebar.checkbox):
+        if widget.label != 'Show raw data':
+            choices.append(('checkbox', widget))
+    if not choices:
+        return 'rerun'
+    kind, widget = rng.choice(choices)
+    if kind == 'text':
+        widget.input(rng.choice(TICKERS))
+    elif kind == 'select':
+        options = [o for o in widget.options if o in intervals] if widget.label.startswith('Interval') else widget.options
+        widget.select(rng.choice(options))
+    elif kind == 'slider':
+        step = widget.step or 1
+        steps = int((widget.max - widget.min) / step)
+        widget.set_value(type(widget.value)(widget.min + step * rng.randint(0, steps)))
+    else:
+        widget.set_value(not widget.value)
+    return f'{kind}:{widget.label}'
+
+
+def session(script, index, seed, deadline, think, intervals, results):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(f'{seed}:{script}:{index}')
+    app = AppTest.from_file(os.path.join(REPO_DIR, script), default_timeout=120)
+    with _first_run_lock:
+        started = time.perf_counter()
+        app.run()
+        results['first_run'].append(time.perf_counter() - started)
+    while time.perf_counter() < deadline:
+        try:
+            action = interact(app, rng, intervals)
+        except Exception as e:  # a widget disappeared between reruns
+            action = f'skipped: {e}'
+        started = time.perf_counter()
+        app.run()
+        results['latency'].append(time.perf_counter() - started)
+        if app.exception:
+            results['errors'].append(f'{script} after {action}: {app.exception[0].value}')
+        if think:
+            time.sleep(rng.uniform(0, 2 * think))
+
+
+def run(scripts, sessions, duration, think=0.0, seed=0, intervals=('1d',)):
+    """Run sessions concurrent sessions spread over scripts for duration seconds."""
+    results = {'latency': [], 'first_run': [], 'errors': []}
+    rss_before, cpu_before = rss_bytes(), cpu_seconds()
+    started = time.perf_counter()
+    deadline = started + duration
+    threads = [threading.Thread(target=session, daemon=True,
+                                args=(scripts[i % len(scripts)], i, seed, deadline, think, intervals, results))
+               for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    latency = results['latency']
+    return {
+        'sessions': sessions,
+        'reruns': len(latency),
+        'reruns_per_second': len(latency) / wall,
+        'p50': percentile(latency, 50),
+        'p95': percentile(latency, 95),
+        'p99': percentile(latency, 99),
+        'mean': statistics.fmean(latency) if latency else None,
+        'first_run_p50': percentile(results['first_run'], 50),
+        'cpu_cores': (cpu_seconds() - cpu_before) / wall,
+        'rss_start_mib': rss_before / 2 ** 20,
+        'rss_growth_mib': (rss_bytes() - rss_before) / 2 ** 20,
+        'errors': results['errors'][:20],
+        'error_count': len(results['errors']),
+    }
+
+
+def use_provider(name):
+    import market_data
+
+    market_data.set_provider(name)
+    if name == 'replay':
+        import replay
+        replay.get_replay()
+
+
+def print_table(rows):
+    def ms(value):
+        return f'{value * 1000:.0f}' if value is not None else '-'
+
+    print(f"{'sessions':>8}{'reruns':>8}{'rerun/s':>9}{'p50 ms':>8}{'p95 ms':>8}{'p99 ms':>8}"
+          f"{'cpu':>6}{'rss MiB':>9}{'+rss':>7}{'errors':>8}")
+    for r in rows:
+        print(f"{r['sessions']:>8}{r['reruns']:>8}{r['reruns_per_second']:>9.1f}{ms(r['p50']):>8}{ms(r['p95']):>8}"
+              f"{ms(r['p99']):>8}{r['cpu_cores']:>6.2f}{r['rss_start_mib']:>9.0f}{r['rss_growth_mib']:>+7.0f}"
+              f"{r['error_count']:>8}")
+
+
+def saturation(rows, gain=1.1):
+    """Return the first session count whose throughput is less than gain times the previous one's."""
+    for previous, row in zip(rows, rows[1:]):
+        if row['reruns_per_second'] < previous['reruns_per_second'] * gain:
+            return row['sessions']
+    return None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Drive concurrent simulated sessions against the Streamlit scripts.')
+    parser.add_argument('scripts', nargs='*', default=DEFAULT_SCRIPTS)
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 4, 8, 16],
+                        help='Concurrent session counts to run, one after another')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds per session count')
+    parser.add_argument('--think', type=float, default=0.0, help='Mean seconds a session waits between reruns')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--provider', choices=['synthetic', 'replay'], default='synthetic')
+    parser.add_argument('--intervals', nargs='+', default=['1d'],
+                        help='Intervals sessions may switch to, e.g. 1d 5m')
+    parser.add_argument('--max-p95', type=float, help='Fail if any p95 rerun latency exceeds this many seconds')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    os.chdir(REPO_DIR)
+    use_provider(args.provider)
+    rows = [run(args.scripts, n, args.duration, args.think, args.seed, args.intervals) for n in args.sessions]
+
+    if args.json:
+        print(json.dumps(rows, indent=1))
+    else:
+        print_table(rows)
+        saturated = saturation(rows)
+        if saturated is not None:
+            print(f'Throughput stops scaling at about {saturated} sessions')
+    for row in rows:
+        for error in row['errors']:
+            print(f"[{row['sessions']} sessions] {error}")
+
+    slow = [r['sessions'] for r in rows if args.max_p95 is not None and r['p95'] is not None and r['p95'] > args.max_p95]
+    if slow:
+        print(f'p95 over {args.max_p95:.2f}s at {", ".join(map(str, slow))} sessions')
+    sys.exit(1 if slow or any(r['error_count'] for r in rows) else 0)
@@ -0,0 +1,109 @@
+"""
+Cold-start and per-rerun overhead of the Streamlit scripts.
+
+    python benchmarks/startup.py --synthetic
+    python benchmarks/startup.py IAC8.py trend.py --reruns 20 --budget 2.5
+
+Every script is run in a fresh interpreter through streamlit's AppTest:
+time to first chart is measured from interpreter start to the end of the first
+script run, and rerun overhead is the median of the following reruns (which
+hit the process-wide caches). --synthetic replaces Yahoo Finance with
+benchmarks/synthetic.py so network latency does not drown out startup cost.
+Exits with status 1 if any script's time to first chart exceeds --budget.
+"""
+import time
+
+STARTED = time.perf_counter()
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+DEFAULT_SCRIPTS = ['IAC4.py', 'IAC5.py', 'IAC6.py', 'IAC7.py', 'IAC8.py', 'trend.py', 'AnnualGrowthRate.py', 'app.py']
+DEFAULT_BUDGET = 3.0
+
+
+def child(script, reruns, synthetic):
+    """Run in the fresh interpreter: time one script and print a JSON result."""
+    sys.path[:0] = [REPO_DIR, BENCH_DIR]
+    os.chdir(REPO_DIR)
+    from streamlit.testing.v1 import AppTest
+    imported = time.perf_counter()
+
+    if synthetic:
+        import market_data
+        import synthetic as synthetic_data
+        market_data.download = synthetic_data.download
+
+    app = AppTest.from_file(os.path.join(REPO_DIR, script), default_timeout=120)
+    run_started = time.perf_counter()
+    app.run()
+    first_chart = time.perf_counter()
+    rerun_times = []
+    for _ in range(reruns):
+        t = time.perf_counter()
+        app.run()
+        rerun_times.append(time.perf_counter() - t)
+
+    print(json.dumps({
+        'script': script,
+        'streamlit_import': imported - STARTED,
+        'first_run': first_chart - run_started,
+        'time_to_first_chart': first_chart - STARTED,
+        'rerun_median': statistics.median(rerun_times) if rerun_times else None,
+        'exceptions': len(app.exception),
+    }))
+
+
+def run(scripts, reruns=10, synthetic=False):
+    results = []
+    for script in scripts:
+        command = [sys.executable, os.path.abspath(__file__), '--child', script, '--reruns', str(reruns)]
+        if synthetic:
+            command.append('--synthetic')
+        t = time.perf_counter()
+        process = subprocess.run(command, capture_output=True, text=True)
+        if process.returncode != 0:
+            sys.exit(f'{script} failed:\n{process.stderr}')
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        result['process_wall'] = time.perf_counter() - t
+        results.append(result)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure cold start and rerun overhead of the Streamlit scripts.')
+    parser.add_argument('scripts', nargs='*', default=DEFAULT_SCRIPTS)
+    parser.add_argument('--reruns', type=int, default=10)
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET, help='Seconds allowed to the first chart')
+    parser.add_argument('--synthetic', action='store_true', help='Use synthetic prices instead of Yahoo Finance')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.reruns, args.synthetic)
+        sys.exit(0)
+
+    results = run(args.scripts, args.reruns, args.synthetic)
+    if args.json:
+        print(json.dumps(results, indent=1))
+    else:
+        print(f"{'script':<22}{'import':>9}{'first run':>11}{'to chart':>10}{'rerun':>9}")
+        for r in results:
+            rerun = f"{r['rerun_median']:.3f}" if r['rerun_median'] is not None else '-'
+            print(f"{r['script']:<22}{r['streamlit_import']:>9.3f}{r['first_run']:>11.3f}"
+                  f"{r['time_to_first_chart']:>10.3f}{rerun:>9}")
+
+    over = [r['script'] for r in results if r['time_to_first_chart'] > args.budget]
+    failed = [r['script'] for r in results if r['exceptions']]
+    if over:
+        print(f'Over the {args.budget:.1f}s time-to-first-chart budget: {", ".join(over)}')
+    if failed:
+        print(f'Raised exceptions: {", ".join(failed)}')
+    sys.exit(1 if over or failed else 0)
@@ -0,0 +1,248 @@
+import atexit
+import hashlib
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+from functools import wraps
+
+# Snapshots live next to the scripts unless PF_CACHE_DIR says otherwise
+CACHE_DIR = os.environ.get('PF_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache'))
+
+# Bump when the layout of cached values changes so old snapshots are ignored
+CACHE_VERSION = 1
+
+# Seconds between automatic snapshots of a dirty cache
+SNAPSHOT_INTERVAL = float(os.environ.get('PF_CACHE_SNAPSHOT_INTERVAL', 300))
+
+# Entries kept per cache; the oldest are dropped beyond this
+MAX_ENTRIES = int(os.environ.get('PF_CACHE_MAX_ENTRIES', 4096))
+
+# A full cache drops this fraction of its entries at once, so the sort of a
+# prune is paid once per many writes rather than on every write
+PRUNE_FRACTION = 0.125
+
+# Header: magic, format version, payload length, sha256 of the payload
+_MAGIC = b'PFCS'
+_HEADER = struct.Struct('>4sHQ32s')
+
+_caches = {}
+
+
+def _snapshot_path(name):
+    return os.path.join(CACHE_DIR, f'{name}.bin')
+
+
+def write_snapshot(path, entries, version=CACHE_VERSION):
+    """
+    Write cache entries to disk as a compressed, checksummed binary snapshot.
+
+    :param path: Destination file; written atomically through a temp file.
+    :param entries: Dict of key -> (timestamp, value).
+    :param version: Version tag stored in the header.
+    """
+    payload = zlib.compress(pickle.dumps(entries, protocol=pickle.HIGHEST_PROTOCOL), 6)
+    header = _HEADER.pack(_MAGIC, version, len(payload), hashlib.sha256(payload).digest())
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path, version=CACHE_VERSION):
+    """
+    Read a snapshot written by write_snapshot.
+
+    :return: Dict of entries, or None if the file is missing, from another
+        version, truncated or fails its checksum.
+    """
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return None
+            magic, file_version, length, digest = _HEADER.unpack(header)
+            if magic != _MAGIC or file_version != version:
+                return None
+            payload = f.read(length)
+    except OSError:
+        return None
+    if len(payload) != length or hashlib.sha256(payload).digest() != digest:
+        return None
+    try:
+        return pickle.loads(zlib.decompress(payload))
+    except Exception:
+        return None
+
+
+class PersistentCache:
+    """
+    In-memory cache that is lazily restored from and periodically snapshotted to disk.
+
+    The snapshot is only read on first access, so importing a script stays
+    cheap, and it is rewritten at most once per snapshot interval (and at exit)
+    when something changed. Expired entries are dropped when snapshotting,
+    and the oldest entries once there are more than max_entries (down to
+    PRUNE_FRACTION below it).
+    """
+
+    def __init__(self, name, ttl=None, snapshot_interval=SNAPSHOT_INTERVAL, max_entries=MAX_ENTRIES):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.snapshot_interval = snapshot_interval
+        self.path = _snapshot_path(name)
+        self._entries = None
+        self._dirty = False
+        self._last_snapshot = time.time()
+        self._lock = threading.RLock()
+
+    def _load(self):
+        if self._entries is None:
+            self._entries = read_snapshot(self.path) or {}
+
+    def _fresh(self, timestamp):
+        return self.ttl is None or time.time() - timestamp < self.ttl
+
+    def _prune(self, limit=None):
+        # Drop expired entries, then the oldest ones over limit (default max_entries)
+        limit = self.max_entries if limit is None else limit
+        stale = [key for key, (timestamp, _) in self._entries.items() if not self._fresh(timestamp)]
+        excess = len(self._entries) - len(stale) - limit
+        if excess > 0:
+            live = sorted((timestamp, i, key) for i, (key, (timestamp, _)) in enumerate(self._entries.items())
+                          if self._fresh(timestamp))
+            stale += [key for _, _, key in live[:excess]]
+        for key in stale:
+            del self._entries[key]
+        if stale:
+            self._dirty = True
+
+    def _shrink(self):
+        # Called after writes: make room for many more once the cache is full
+        if len(self._entries) > self.max_entries:
+            self._prune(int(self.max_entries * (1 - PRUNE_FRACTION)))
+
+    def get(self, key, default=None):
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry is None or not self._fresh(entry[0]):
+                return default
+            return entry[1]
+
+    def __contains__(self, key):
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            return entry is not None and self._fresh(entry[0])
+
+    def set(self, key, value):
+        with self._lock:
+            self._load()
+            self._entries[key] = (time.time(), value)
+            self._dirty = True
+            self._shrink()
+            if time.time() - self._last_snapshot >= self.snapshot_interval:
+                self.snapshot()
+
+    def get_many(self, keys):
+        """Return a dict of the fresh entries among keys."""
+        with self._lock:
+            self._load()
+            found = {}
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and self._fresh(entry[0]):
+                    found[key] = entry[1]
+            return found
+
+    def set_many(self, items):
+        with self._lock:
+            self._load()
+            now = time.time()
+            for key, value in items.items():
+                self._entries[key] = (now, value)
+            self._dirty = True
+            self._shrink()
+            if now - self._last_snapshot >= self.snapshot_interval:
+                self.snapshot()
+
+    def pop(self, key, default=None):
+        with self._lock:
+            self._load()
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return default
+            self._dirty = True
+            return entry[1]
+
+    def keys(self):
+        with self._lock:
+            self._load()
+            return list(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._dirty = True
+
+    def snapshot(self):
+        with self._lock:
+            if self._entries is None:
+                return
+            self._prune()
+            if not self._dirty:
+                return
+            write_snapshot(self.path, self._entries)
+            self._dirty = False
+            self._last_snapshot = time.time()
+
+
+def get_cache(name, ttl=None, max_entries=MAX_ENTRIES):
+    """Return the process-wide PersistentCache registered under name."""
+    cache = _caches.get(name)
+    if cache is None:
+        cache = _caches.setdefault(name, PersistentCache(name, ttl=ttl, max_entries=max_entries))
+    return cache
+
+
+def snapshot_all():
+    for cache in list(_caches.values()):
+        try:
+            cache.snapshot()
+        except OSError:
+            pass
+
+
+atexit.register(snapshot_all)
+
+
+def persistent_cache(name, ttl=None):
+    """
+    Decorator that memoises a function in a named PersistentCache.
+
+    Stack it under st.cache_data so Streamlit keeps its fast in-memory hit
+    path while a restarted server falls back to the disk snapshot instead of
+    downloading again.
+    """
+    def decorator(func):
+        cache = get_cache(name, ttl=ttl)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            result = cache.get(key)
+            if result is None:
+                result = func(*args, **kwargs)
+                cache.set(key, result)
+            return result
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
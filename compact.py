@@ -0,0 +1,111 @@
+"""
+Compact storage dtypes for price and indicator frames (opt in with PF_COMPACT=1).
+
+In compact mode the caches, the precomputed Parquet tables and the Arrow
+output hold float32 prices and indicators and the smallest integer type that
+fits the volume. The DatetimeIndex is already stored as int64 epoch
+nanoseconds and is kept as is, since every chart and date slice needs it.
+widen() converts back to float64 at the edge where full precision is
+expected, e.g. JSON responses.
+
+Indicators are still computed in float64 (pandas rolling and ewm windows
+accumulate in double precision) and only stored as float32; see
+float32_report() for the resulting error.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+COMPACT = os.environ.get('PF_COMPACT', '') == '1'
+
+INTEGER_COLUMNS = ('Volume', 'RSI_Signal', 'BB_Signal', 'Combined_Signal', 'Trend')
+
+
+def _compact_series(series):
+    if series.name in INTEGER_COLUMNS and series.notna().all():
+        kind = 'unsigned' if (series >= 0).all() else 'integer'
+        return pd.to_numeric(series.astype('int64'), downcast=kind)
+    if series.dtype == np.float64:
+        return series.astype(np.float32)
+    return series
+
+
+def compact(obj):
+    """Return obj (frame, series, or a tuple or dict of them) in compact dtypes."""
+    if isinstance(obj, pd.DataFrame):
+        return pd.DataFrame({c: _compact_series(obj[c]) for c in obj.columns}, index=obj.index)
+    if isinstance(obj, pd.Series):
+        return _compact_series(obj)
+    if isinstance(obj, tuple):
+        return tuple(compact(value) for value in obj)
+    if isinstance(obj, dict):
+        return {name: compact(value) for name, value in obj.items()}
+    return obj
+
+
+def widen(obj):
+    """Return obj with float32 columns converted back to float64."""
+    if isinstance(obj, pd.DataFrame):
+        floats = [c for c in obj.columns if obj[c].dtype == np.float32]
+        return obj.astype({c: np.float64 for c in floats}) if floats else obj
+    if isinstance(obj, pd.Series):
+        return obj.astype(np.float64) if obj.dtype == np.float32 else obj
+    if isinstance(obj, tuple):
+        return tuple(widen(value) for value in obj)
+    if isinstance(obj, dict):
+        return {name: widen(value) for name, value in obj.items()}
+    return obj
+
+
+def to_long(frames):
+    """
+    Stack {ticker: frame} into one long frame with a categorical Ticker column.
+
+    The categorical keeps one copy of each ticker string however many rows it
+    has, and becomes a dictionary-encoded column in Arrow.
+    """
+    combined = pd.concat(frames, names=['Ticker']).reset_index()
+    combined['Ticker'] = combined['Ticker'].astype(pd.CategoricalDtype(list(frames)))
+    return combined
+
+
+def float32_report(data, rsi_buy_level=30, rsi_sell_level=70):
+    """
+    Compare every indicator computed from float32 prices with float64.
+
+    :param data: OHLCV DataFrame in float64.
+    :return: DataFrame with the maximum absolute and relative error of each
+        indicator column and the number of bars whose IAC8 signal changes.
+    """
+    import indicators
+
+    def table(prices, store):
+        frame = prices.copy()
+        frame['MA'] = indicators.moving_average(prices, 20)
+        frame['RSI'] = indicators.calculate_rsi(prices, 14)
+        bands = indicators.bollinger_bands(prices, 20, 2)
+        frame['BB_upper'], frame['BB_lower'] = bands['BB_upper'], bands['BB_lower']
+        frame['MACD'], frame['Signal'], frame['Histogram'] = indicators.calculate_macd(prices)
+        frame['Stochastic_K'], frame['Stochastic_D'] = indicators.calculate_stochastic(prices)
+        frame['MFI'] = indicators.calculate_mfi(prices)
+        frame['SMA_200'] = indicators.sma(prices, 200)
+        indicators.generate_signals(frame, rsi_buy_level, rsi_sell_level)
+        return store(frame)
+
+    exact = table(data, lambda frame: frame)
+    approx = table(compact(data), compact)
+    rows = []
+    # Errors are relative to each indicator's largest value, since MACD and
+    # the histogram cross zero
+    for column in ['MA', 'RSI', 'BB_upper', 'BB_lower', 'MACD', 'Signal', 'Histogram',
+                   'Stochastic_K', 'Stochastic_D', 'MFI', 'SMA_200']:
+        a = exact[column].to_numpy(dtype=np.float64)
+        b = approx[column].to_numpy(dtype=np.float64)
+        error = np.abs(a - b)
+        scale = max(np.nanmax(np.abs(a), initial=0), 1e-12)
+        rows.append({'Indicator': column, 'Max abs error': np.nanmax(error, initial=0),
+                     'Max rel error': np.nanmax(error, initial=0) / scale})
+    report = pd.DataFrame(rows)
+    report.attrs['signal_changes'] = int((exact['Combined_Signal'] != approx['Combined_Signal']).sum())
+    return report
@@ -0,0 +1,465 @@
+"""
+Process pool for heavy computations submitted by the Streamlit scripts.
+
+    result = compute_pool.run(indicators.trends, data, window=200,
+                              key=('trends', ticker), name='trends', label='Finding trends')
+
+Jobs run in worker processes, so a long computation holds neither the GIL
+nor a Streamlit server thread's CPU and other sessions stay interactive.
+Inside a script run, wait() draws a progress bar; if the run is interrupted
+(e.g. the user changed an input and Streamlit reruns) the job is cancelled.
+Submitting a job with the same owner and name as an unfinished one cancels
+that one too, so a superseded rerun never keeps a worker busy.
+
+Jobs are dispatched round robin across owners (Streamlit sessions), each
+with at most MAX_RUNNING_PER_OWNER running at once, so one user's scan cannot
+queue ahead of everybody else. Results with a key are kept in an LRU cache
+and identical running jobs are shared.
+
+Job functions must be importable module-level functions. They may call
+report(fraction) to publish progress, which also raises Cancelled once the
+job has been cancelled. A cancelled job that has not stopped after
+CANCEL_GRACE_SECONDS (e.g. one long pandas call that never reports) has its
+worker terminated; every slot has its own single-process executor, so the
+other running jobs are unaffected.
+
+run() computes a job inline when shipping it to a worker would cost more
+than computing it: the pool measures the seconds per row of every job
+function and the time a worker round trip adds, and until a function has
+been measured uses MIN_ROWS instead. PF_COMPUTE_WORKERS=0 runs everything
+inline.
+"""
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+import types
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+WORKERS = int(os.environ.get('PF_COMPUTE_WORKERS', max(1, (os.cpu_count() or 2) - 1)))
+MAX_RUNNING_PER_OWNER = int(os.environ.get('PF_COMPUTE_PER_SESSION', 2))
+MAX_RESULTS = 256
+
+# Jobs of a function whose cost has not been measured yet run inline below this many rows
+MIN_ROWS = int(os.environ.get('PF_COMPUTE_MIN_ROWS', 10000))
+
+# Estimated run time below which jobs run inline, until a worker round trip has been timed
+INLINE_SECONDS = 0.05
+
+# Weight of the newest measurement in the running cost estimates
+COST_SMOOTHING = 0.3
+
+CANCEL_GRACE_SECONDS = float(os.environ.get('PF_COMPUTE_CANCEL_GRACE', 1.0))
+
+
+class Cancelled(Exception):
+    """Raised in a job (by report) and by Job.result once the job has been cancelled."""
+
+
+# Set in each worker process: shared progress and cancel flags per slot
+_progress = None
+_cancel = None
+_slot = None
+
+
+def _init_worker(progress, cancel, pids, slot):
+    global _progress, _cancel
+    _progress, _cancel = progress, cancel
+    pids[slot] = os.getpid()
+
+
+def _run_job(slot, func, args, kwargs):
+    # Returns the result and the seconds it took, for the cost estimates
+    global _slot
+    _slot = slot
+    try:
+        if _cancel[slot]:
+            raise Cancelled()
+        started = time.perf_counter()
+        value = func(*args, **kwargs)
+        return value, time.perf_counter() - started
+    finally:
+        _slot = None
+
+
+def _cost_key(func):
+    return getattr(func, '__module__', None), getattr(func, '__qualname__', repr(func))
+
+
+@contextmanager
+def _plain_main():
+    # Spawned workers import the parent's __main__; under Streamlit that is the
+    # page script, which would run again in every worker. Job functions are
+    # importable module-level functions, so the workers do not need it.
+    main = sys.modules.get('__main__')
+    sys.modules['__main__'] = types.ModuleType('__main__')
+    try:
+        yield
+    finally:
+        sys.modules['__main__'] = main
+
+
+def report(fraction):
+    """Publish the progress (0-1) of the current job; raise Cancelled if it was cancelled. No-op outside jobs."""
+    if _slot is None:
+        return
+    _progress[_slot] = fraction
+    if _cancel[_slot]:
+        raise Cancelled()
+
+
+class Job:
+    def __init__(self, pool, func, args, kwargs, key, owner, name, rows=None):
+        self.pool = pool
+        self.func, self.args, self.kwargs = func, args, kwargs
+        self.key, self.owner, self.name, self.rows = key, owner, name, rows
+        self.owners = {owner}  # everyone waiting for the result
+        self.state = 'queued'  # queued, running, done, failed or cancelled
+        self.slot = None
+        self.submitted = time.monotonic()
+        self.launched = None
+        self._value = None
+        self._error = None
+        self._event = threading.Event()
+
+    @property
+    def progress(self):
+        if self.state == 'done':
+            return 1.0
+        if self.state == 'running' and self.slot is not None:
+            return self.pool.progress_of(self.slot)
+        return 0.0
+
+    def done(self):
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        return self._event.wait(timeout)
+
+    def result(self, timeout=None):
+        if not self._event.wait(timeout):
+            raise TimeoutError(f'{self.name} still running')
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+    def cancel(self):
+        self.pool.cancel(self)
+
+    def _finish(self, state, value=None, error=None):
+        self.state, self._value, self._error = state, value, error
+        self._event.set()
+
+
+class ComputePool:
+    def __init__(self, workers=WORKERS, per_owner=MAX_RUNNING_PER_OWNER, max_results=MAX_RESULTS):
+        self.workers = workers
+        self.per_owner = per_owner
+        self.max_results = max_results
+        self._lock = threading.RLock()
+        self._context = None
+        self._executors = [None] * max(workers, 0)  # one single-process executor per slot
+        self._progress = self._cancel = self._pids = None
+        self._closed = False
+        self._costs = {}  # _cost_key(func) -> seconds per row
+        self._overhead = None  # seconds a worker round trip adds to a job
+        self._free_slots = list(range(workers))
+        self._queues = OrderedDict()  # owner -> deque of queued jobs, in round-robin order
+        self._running = {}  # job -> slot
+        self._by_key = {}  # key -> unfinished job
+        self._by_name = {}  # (owner, name) -> latest unfinished job
+        self._results = OrderedDict()
+
+    def _executor(self, slot):
+        if self._context is None:
+            # Spawned workers do not inherit the Streamlit server's threads and locks
+            self._context = multiprocessing.get_context('spawn')
+            self._progress = self._context.Array('d', self.workers, lock=False)
+            self._cancel = self._context.Array('b', self.workers, lock=False)
+            self._pids = self._context.Array('q', self.workers, lock=False)
+        if self._executors[slot] is None:
+            self._pids[slot] = 0
+            self._executors[slot] = ProcessPoolExecutor(1, mp_context=self._context, initializer=_init_worker,
+                                                        initargs=(self._progress, self._cancel, self._pids, slot))
+        return self._executors[slot]
+
+    def _drop_executor(self, slot):
+        executor, self._executors[slot] = self._executors[slot], None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def runs_inline(self, func, rows):
+        """Whether a job of func over rows rows is cheaper to compute in the calling thread than in a worker."""
+        if self.workers <= 0 or self._closed:
+            return True
+        with self._lock:
+            cost = self._costs.get(_cost_key(func))
+            overhead = self._overhead
+        if cost is None:
+            return rows < MIN_ROWS
+        return cost * rows < (INLINE_SECONDS if overhead is None else overhead)
+
+    def _measure(self, job, seconds, elapsed=None):
+        # Update the cost estimates with a finished job's run time (and wall time in a worker)
+        def smooth(old, new):
+            return new if old is None else old + COST_SMOOTHING * (new - old)
+
+        with self._lock:
+            if job.rows:
+                key = _cost_key(job.func)
+                self._costs[key] = smooth(self._costs.get(key), seconds / job.rows)
+            if elapsed is not None:
+                self._overhead = smooth(self._overhead, max(elapsed - seconds, 0.0))
+
+    def progress_of(self, slot):
+        return self._progress[slot] if self._progress is not None else 0.0
+
+    def submit(self, func, *args, key=None, owner=None, name=None, inline=False, rows=None, **kwargs):
+        """
+        Queue func(*args, **kwargs) and return its Job.
+
+        :param key: Optional hashable cache key; a cached or running job with
+            the same key is reused.
+        :param owner: Who the job runs for; defaults to the current Streamlit
+            session (see current_owner).
+        :param name: Optional job name; an unfinished job of the same owner
+            and name with a different key is cancelled.
+        :param inline: Run in the calling thread instead of a worker.
+        :param rows: Optional amount of work in rows, to measure func's cost
+            per row (see runs_inline).
+        """
+        owner = current_owner() if owner is None else owner
+        name = name or func.__name__
+        with self._lock:
+            if key is not None and key in self._results:
+                self._results.move_to_end(key)
+                job = Job(self, func, args, kwargs, key, owner, name, rows)
+                job._finish('done', self._results[key])
+                return job
+            previous = self._by_name.get((owner, name))
+            if previous is not None and (key is None or previous.key != key):
+                self.release(previous, owner)
+            if key is not None and key in self._by_key:
+                job = self._by_key[key]
+                job.owners.add(owner)
+                self._by_name[(owner, name)] = job
+                return job
+            job = Job(self, func, args, kwargs, key, owner, name, rows)
+            if not (inline or self.workers <= 0 or self._closed):
+                if key is not None:
+                    self._by_key[key] = job
+                self._by_name[(owner, name)] = job
+                self._queues.setdefault(owner, deque()).append(job)
+                self._dispatch()
+                return job
+        try:
+            started = time.perf_counter()
+            value = func(*args, **kwargs)
+            self._measure(job, time.perf_counter() - started)
+            job._finish('done', value)
+        except Exception as e:
+            job._finish('failed', error=e)
+        self._store(job)
+        return job
+
+    def _dispatch(self):
+        # Hand queued jobs to free workers, taking owners in turn
+        while self._free_slots and self._queues and not self._closed:
+            for owner in list(self._queues):
+                queue = self._queues[owner]
+                running = sum(1 for job in self._running if job.owner == owner)
+                if running >= self.per_owner:
+                    continue
+                job = queue.popleft()
+                if not queue:
+                    del self._queues[owner]
+                else:
+                    self._queues.move_to_end(owner)
+                self._launch(job)
+                break
+            else:
+                return
+
+    def _launch(self, job):
+        slot = self._free_slots.pop()
+        executor = self._executor(slot)
+        self._progress[slot] = 0.0
+        self._cancel[slot] = 0
+        job.slot, job.state, job.launched = slot, 'running', time.perf_counter()
+        self._running[job] = slot
+        # Workers are spawned on demand inside submit
+        with _plain_main():
+            try:
+                future = executor.submit(_run_job, slot, job.func, job.args, job.kwargs)
+            except BrokenProcessPool:
+                # The worker died (e.g. killed for memory); start a fresh one
+                self._drop_executor(slot)
+                future = self._executor(slot).submit(_run_job, slot, job.func, job.args, job.kwargs)
+        future.add_done_callback(lambda f: self._finished(job, f))
+
+    def _finished(self, job, future):
+        with self._lock:
+            self._free_slots.append(self._running.pop(job))
+            error = future.exception()
+            if isinstance(error, BrokenProcessPool):
+                # The worker died or was terminated after a cancel
+                self._drop_executor(job.slot)
+            if job.state == 'cancelled':
+                pass
+            elif error is None:
+                value, seconds = future.result()
+                self._measure(job, seconds, time.perf_counter() - job.launched)
+                job._finish('done', value)
+            elif isinstance(error, Cancelled):
+                job._finish('cancelled', error=error)
+            else:
+                job._finish('failed', error=error)
+            self._forget(job)
+            self._store(job)
+            self._dispatch()
+
+    def _forget(self, job):
+        if self._by_key.get(job.key) is job:
+            del self._by_key[job.key]
+        for owner in job.owners:
+            if self._by_name.get((owner, job.name)) is job:
+                del self._by_name[(owner, job.name)]
+
+    def _store(self, job):
+        if job.key is not None and job.state == 'done':
+            with self._lock:
+                self._results[job.key] = job._value
+                self._results.move_to_end(job.key)
+                while len(self._results) > self.max_results:
+                    self._results.popitem(last=False)
+
+    def release(self, job, owner):
+        """Drop owner's interest in job and cancel it if no other owner is waiting for it."""
+        with self._lock:
+            job.owners.discard(owner)
+            if self._by_name.get((owner, job.name)) is job:
+                del self._by_name[(owner, job.name)]
+            if not job.owners:
+                self.cancel(job)
+
+    def cancel(self, job):
+        """
+        Cancel job: drop it if queued, or ask its worker to stop at the next
+        report() and terminate the worker if it is still running the job
+        CANCEL_GRACE_SECONDS later.
+        """
+        with self._lock:
+            if job.done():
+                return
+            queue = self._queues.get(job.owner)
+            if queue is not None and job in queue:
+                queue.remove(job)
+                if not queue:
+                    del self._queues[job.owner]
+            elif job in self._running:
+                self._cancel[job.slot] = 1
+                timer = threading.Timer(CANCEL_GRACE_SECONDS, self._terminate, (job,))
+                timer.daemon = True
+                timer.start()
+            self._forget(job)
+            job._finish('cancelled', error=Cancelled())
+
+    def _terminate(self, job):
+        # Kill the worker of a cancelled job that is still running
+        with self._lock:
+            if job not in self._running:
+                return
+            pid = self._pids[job.slot]
+        if pid:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {'workers': self.workers, 'running': len(self._running),
+                    'queued': sum(len(q) for q in self._queues.values()), 'cached': len(self._results)}
+
+    def shutdown(self):
+        """Cancel every queued and running job and stop the workers; later jobs run inline."""
+        with self._lock:
+            self._closed = True
+            for queue in list(self._queues.values()):
+                for job in list(queue):
+                    self.cancel(job)
+            running = list(self._running)
+            for job in running:
+                self.cancel(job)
+                self._terminate(job)
+            for slot in range(len(self._executors)):
+                self._drop_executor(slot)
+
+
+def current_owner():
+    """Return the current Streamlit session id, or 'background' outside script runs."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return 'background'
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else 'background'
+
+
+def wait(job, label=None, poll=0.1):
+    """
+    Return the result of job, showing a progress bar while it runs in a Streamlit script.
+
+    If the script run stops before the job finishes (a rerun supersedes it or
+    the session ends) the job is cancelled.
+    """
+    bar = None
+    try:
+        while not job.wait(poll):
+            if label and current_owner() != 'background':
+                import streamlit as st
+
+                text = f'{label} ({time.monotonic() - job.submitted:.0f}s)'
+                if bar is None:
+                    bar = st.progress(job.progress, text=text)
+                else:
+                    bar.progress(job.progress, text=text)
+        return job.result()
+    except BaseException:
+        # Other sessions may be waiting for the same job, so only give up our interest
+        job.pool.release(job, current_owner())
+        raise
+    finally:
+        if bar is not None:
+            bar.empty()
+
+
+def run(func, data, *args, key=None, name=None, label=None, size=None, **kwargs):
+    """
+    Compute func(data, *args, **kwargs) in the pool and wait for it (see wait).
+
+    data is anything with a length, e.g. a DataFrame; its rows (or a size of
+    work given in rows) decide whether the call runs inline (see
+    ComputePool.runs_inline).
+    """
+    size = len(data) if size is None else size
+    pool = get_pool()
+    job = pool.submit(func, data, *args, key=key, name=name, inline=pool.runs_inline(func, size), rows=size, **kwargs)
+    return wait(job, label)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ComputePool()
+        return _pool
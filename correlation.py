@@ -0,0 +1,233 @@
+"""
+Cross-sectional correlation and covariance of returns across a ticker universe.
+
+    matrix = correlation.correlation_matrix(TREND_TICKERS, '2019-01-01', '2024-01-01')
+    order = correlation.cluster_order(matrix)
+
+Prices come from market_data.price_matrix, aligned on the union of the
+tickers' dates. Missing bars are handled pairwise-complete, like
+DataFrame.corr(min_periods=...): each pair uses exactly the dates where both
+tickers have a return. All pairs are computed at once from a handful of
+matrix products between the zero-filled returns and their validity mask,
+BLOCK columns at a time so memory stays bounded for thousands of tickers.
+
+Results are cached per (tickers, date window, parameters), and the heavy
+products run in the compute pool.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import compute_pool
+import market_data
+
+# Columns per block of the pairwise products
+BLOCK = int(os.environ.get('PF_CORR_BLOCK', 512))
+
+# Number of matrices kept in the cache
+MAX_RESULTS = 16
+
+DEFAULT_MIN_PERIODS = 20
+
+
+def returns(prices, log=False):
+    """Return simple (or log) returns of a dates x tickers price matrix, NaN where a bar is missing."""
+    if log:
+        return np.log(prices).diff().iloc[1:]
+    return prices.pct_change(fill_method=None).iloc[1:]
+
+
+def _pairwise_block(x, valid, squares, columns, min_periods, kind):
+    # Moments of columns against every column over the rows where both are valid
+    xb, vb, sb = x[:, columns], valid[:, columns], squares[:, columns]
+    n = vb.T @ valid
+    sum_x = xb.T @ valid  # sum of the block column over the shared rows
+    sum_y = vb.T @ x  # sum of the other column over the shared rows
+    sum_xy = xb.T @ x
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if kind == 'cov':
+            result = (sum_xy - sum_x * sum_y / n) / (n - 1)
+        else:
+            sum_xx = sb.T @ valid
+            sum_yy = vb.T @ squares
+            var_x = n * sum_xx - sum_x ** 2
+            var_y = n * sum_yy - sum_y ** 2
+            result = (n * sum_xy - sum_x * sum_y) / np.sqrt(var_x * var_y)
+            result = np.clip(result, -1.0, 1.0)
+    result[n < max(min_periods, 2)] = np.nan
+    return result
+
+
+def pairwise(returns, min_periods=DEFAULT_MIN_PERIODS, kind='corr', block=BLOCK):
+    """
+    Pairwise-complete correlation (kind='corr') or covariance ('cov') matrix of the columns of returns.
+
+    Matches returns.corr(min_periods=...) / returns.cov(min_periods=...).
+
+    :param returns: DataFrame of returns, dates x tickers, NaN where missing.
+    :param min_periods: Pairs with fewer shared dates are NaN.
+    :param block: Number of columns multiplied at a time.
+    """
+    values = returns.to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    # Centring every column first keeps the sum formulas accurate; it does
+    # not change covariances or correlations
+    counts = valid.sum(axis=0)
+    means = np.where(valid, values, 0.0).sum(axis=0) / np.maximum(counts, 1)
+    x = np.where(valid, values - means, 0.0)
+    squares = x * x
+    mask = valid.astype(float)
+    n_columns = x.shape[1]
+    result = np.empty((n_columns, n_columns))
+    for first in range(0, n_columns, block):
+        columns = slice(first, min(first + block, n_columns))
+        compute_pool.report(first / max(n_columns, 1))
+        result[columns] = _pairwise_block(x, mask, squares, columns, min_periods, kind)
+    if kind == 'corr':
+        diagonal = np.diag(result).copy()
+        np.fill_diagonal(result, np.where(np.isnan(diagonal), np.nan, 1.0))
+    return pd.DataFrame(result, index=returns.columns, columns=returns.columns)
+
+
+def rolling(returns, window, step=21, min_periods=None, kind='corr'):
+    """
+    Yield (end date, matrix) for windows of window bars ending every step bars, newest last.
+
+    :param min_periods: Shared returns a pair needs in a window; all of it by default.
+    """
+    min_periods = window if min_periods is None else min_periods
+    for end in range(len(returns), window - 1, -step)[::-1]:
+        yield returns.index[end - 1], pairwise(returns.iloc[end - window:end], min_periods, kind)
+
+
+def average_correlation(returns, window=63, step=5, min_periods=None):
+    """Return the mean off-diagonal rolling correlation per window end date, a market-wide co-movement gauge."""
+    dates, means = [], []
+    for date, matrix in rolling(returns, window, step, min_periods):
+        values = matrix.to_numpy()
+        off_diagonal = values[~np.eye(len(values), dtype=bool)]
+        dates.append(date)
+        means.append(np.nanmean(off_diagonal) if np.isfinite(off_diagonal).any() else np.nan)
+    return pd.Series(means, index=pd.DatetimeIndex(dates, name='Date'), name='Average correlation')
+
+
+def cluster_order(matrix):
+    """
+    Return the tickers of a correlation matrix ordered by average-linkage clustering.
+
+    Distances are sqrt((1 - correlation) / 2); pairs without a correlation
+    count as uncorrelated. Merged clusters keep their members next to each
+    other, so correlated groups show up as blocks along the diagonal.
+    """
+    n = len(matrix)
+    if n < 3:
+        return list(matrix.index)
+    distance = np.sqrt((1 - np.nan_to_num(matrix.to_numpy(dtype=float), nan=0.0)) / 2)
+    np.fill_diagonal(distance, np.inf)
+    members = {i: [i] for i in range(n)}
+    sizes = np.ones(n)
+    for _ in range(n - 1):
+        a, b = np.unravel_index(np.argmin(distance), distance.shape)
+        a, b = min(a, b), max(a, b)
+        # Lance-Williams update for average linkage; cluster b is folded into a
+        merged = (sizes[a] * distance[a] + sizes[b] * distance[b]) / (sizes[a] + sizes[b])
+        distance[a], distance[:, a] = merged, merged
+        distance[a, a] = np.inf
+        distance[b], distance[:, b] = np.inf, np.inf
+        sizes[a] += sizes[b]
+        members[a] += members.pop(b)
+    order = next(iter(members.values()))
+    return [matrix.index[i] for i in order]
+
+
+def top_pairs(matrix, count=20, ascending=False):
+    """Return the count most (or least) correlated distinct pairs as a DataFrame."""
+    values = matrix.to_numpy()
+    rows, cols = np.triu_indices(len(values), k=1)
+    pairs = pd.DataFrame({'Ticker 1': matrix.index[rows], 'Ticker 2': matrix.columns[cols], 'Value': values[rows, cols]})
+    return pairs.dropna().sort_values('Value', ascending=ascending).head(count).reset_index(drop=True)
+
+
+_results = OrderedDict()
+_lock = threading.Lock()
+
+
+def _cached(key, compute):
+    with _lock:
+        result = _results.get(key)
+        if result is not None:
+            _results.move_to_end(key)
+            return result
+    result = compute()
+    with _lock:
+        _results[key] = result
+        while len(_results) > MAX_RESULTS:
+            _results.popitem(last=False)
+    return result
+
+
+def daily_returns(tickers, start=None, end=None, field='Adj Close', log=False):
+    """Return the aligned daily returns of tickers between start and end (see market_data.price_matrix)."""
+    return returns(market_data.price_matrix(tickers, start, end, field), log)
+
+
+def _key(tickers, start, end, *params):
+    return (tuple(t.upper() for t in tickers), None if start is None else str(start),
+            None if end is None else str(end)) + params
+
+
+def correlation_matrix(tickers, start=None, end=None, kind='corr', window=None, min_periods=DEFAULT_MIN_PERIODS,
+                       field='Adj Close', log=False):
+    """
+    Return the cached correlation or covariance matrix of daily returns of tickers between start and end.
+
+    Tickers without data are left out of the matrix.
+
+    :param kind: 'corr' or 'cov'.
+    :param window: Only use the last window returns, e.g. 63 for the latest quarter.
+    """
+    def compute():
+        daily = daily_returns(tickers, start, end, field, log)
+        if window is not None:
+            daily = daily.iloc[-window:]
+        # Big results are cached here rather than in the pool, which does not count bytes
+        return compute_pool.run(pairwise, daily, min_periods, kind, name=f'correlation:{kind}', size=daily.size,
+                                label=f'Computing {len(daily.columns)}x{len(daily.columns)} {kind} matrix')
+
+    return _cached(_key(tickers, start, end, 'matrix', kind, window, min_periods, field, log), compute)
+
+
+def rolling_average(tickers, start=None, end=None, window=63, step=5, field='Adj Close'):
+    """Return the cached average_correlation of the daily returns of tickers."""
+    def compute():
+        daily = daily_returns(tickers, start, end, field)
+        return compute_pool.run(average_correlation, daily, window, step, name='correlation:rolling',
+                                size=daily.size * window // step, label='Computing rolling correlation')
+
+    return _cached(_key(tickers, start, end, 'rolling', window, step, field), compute)
+
+
+def clustered_order(tickers, start=None, end=None, window=None, min_periods=DEFAULT_MIN_PERIODS, field='Adj Close'):
+    """Return the cached cluster_order of the correlation matrix of tickers."""
+    return _cached(_key(tickers, start, end, 'order', window, min_periods, field),
+                   lambda: cluster_order(correlation_matrix(tickers, start, end, 'corr', window, min_periods, field)))
+
+
+def heatmap(matrix, title=None, order=None, kind='corr'):
+    """Return a plotly heatmap of matrix with rows and columns in order (by default clustered by correlation)."""
+    import plotly.graph_objects as go
+
+    order = cluster_order(matrix) if order is None else order
+    values = matrix.loc[order, order].to_numpy()
+    limits = dict(zmin=-1, zmax=1) if kind == 'corr' else dict(zmid=0)
+    fig = go.Figure(go.Heatmap(z=values.round(3 if kind == 'corr' else 8), x=order, y=order, colorscale='RdBu_r',
+                               **limits))
+    # Labels of more than a few hundred tickers would just overlap
+    labels = len(order) <= 150
+    fig.update_layout(title=title, height=min(1200, max(500, 12 * len(order))))
+    fig.update_xaxes(showticklabels=labels)
+    fig.update_yaxes(showticklabels=labels, autorange='reversed')
+    return fig
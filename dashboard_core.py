@@ -0,0 +1,345 @@
+import base64
+import os
+from functools import lru_cache
+
+import streamlit as st
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+import pandas as pd
+
+import market_data
+import ring_buffer
+import timing
+from assets import DASHBOARDS, INDEX_ETFS, TREND_TICKERS, universe
+
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEBUG_MEMORY = os.environ.get('PF_DEBUG_MEMORY', '') == '1'
+
+market_data.enable_copy_on_write()
+
+
+# Function to load a static file as base64, read once per process
+@lru_cache(maxsize=None)
+def static_base64(path):
+    with open(os.path.join(APP_DIR, path), 'rb') as f:
+        return base64.b64encode(f.read()).decode()
+
+
+# Function to pin the QR code image to the top-right corner of the page
+def render_qr_code(path='qrcode.png'):
+    st.markdown(
+        f"""
+        <style>
+        .qr-code {{
+            position: fixed;  /* Keeps the QR code fixed in the viewport */
+            top: 10px;       /* Sets the distance from the top of the viewport */
+            right: 10px;     /* Sets the distance from the right of the viewport */
+            width: 200px;    /* Adjusts the width of the QR code */
+            z-index: 100;    /* Ensures the QR code stays above other elements */
+        }}
+        </style>
+        <img src="data:image/png;base64,{static_base64(path)}" class="qr-code">
+        """,
+        unsafe_allow_html=True
+    )
+
+
+def session_store():
+    """Return this session's market_data.SessionStore for data derived from the shared frames."""
+    store = st.session_state.get('pf_session_store')
+    if store is None:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+        store = st.session_state['pf_session_store'] = market_data.SessionStore()
+        ctx = get_script_run_ctx()
+        market_data.register_session(ctx.session_id if ctx else 'local', store)
+    return store
+
+
+# Function to show cache and session memory in the sidebar (PF_DEBUG_MEMORY=1 or ?debug=memory)
+def render_memory_report():
+    if not DEBUG_MEMORY and st.query_params.get('debug') != 'memory':
+        return
+    by_ticker, by_session = market_data.memory_report()
+    st.sidebar.header('Memory')
+    st.sidebar.write(f"Cached: {by_ticker['Total bytes'].sum() / 2 ** 20:.1f} MiB "
+                     f"of {market_data.MAX_CACHE_BYTES / 2 ** 20:.0f} MiB")
+    st.sidebar.dataframe(by_ticker, hide_index=True)
+    st.sidebar.dataframe(by_session, hide_index=True)
+
+
+# Function to show pause, speed and seek controls when the data comes from replay.py
+def render_replay_controls():
+    if market_data.PROVIDER == 'replay':
+        import replay
+
+        replay.render_controls()
+
+
+INTERVALS = ['1d'] + list(ring_buffer.INTRADAY_INTERVALS)
+
+
+# Function to choose the bar interval and date range; intraday bars only go back
+# ring_buffer.LOOKBACK_DAYS, so they get a number of days instead of dates
+def interval_controls(key, default_start, default_end, intervals=INTERVALS):
+    interval = st.sidebar.selectbox('Interval', intervals, key=f"{key}_interval")
+    if interval == '1d':
+        col1, col2 = st.sidebar.columns(2)
+        start_date = col1.date_input('Start date', pd.to_datetime(default_start), key=f"{key}_start")
+        end_date = col2.date_input('End date', pd.to_datetime(default_end), key=f"{key}_end")
+        return interval, start_date, end_date
+    limit = ring_buffer.LOOKBACK_DAYS[interval]
+    days = st.sidebar.slider('Days of history', 1, limit, min(5, limit), key=f"{key}_{interval}_days")
+    today = market_data.now().normalize()
+    return interval, today - pd.Timedelta(days=days - 1), None
+
+
+UNIVERSES = ['Top 100 (trend.py)', 'All dashboard tickers', 'Custom list']
+
+
+# Function to choose a ticker universe: trend.py's top 100, every dashboard ticker, or a user list;
+# default is the option selected on the first view
+def universe_controls(key, default_custom='AAPL, MSFT, GOOGL, AMZN, NVDA, META, SPY, QQQ', default=UNIVERSES[0]):
+    st.sidebar.header('Universe')
+    choice = st.sidebar.selectbox('Tickers', UNIVERSES, index=UNIVERSES.index(default), key=f"{key}_universe")
+    if choice == UNIVERSES[0]:
+        return TREND_TICKERS
+    if choice == UNIVERSES[1]:
+        return universe()
+    text = st.sidebar.text_area('Tickers (comma or newline separated)', default_custom, key=f"{key}_custom")
+    return list(dict.fromkeys(t.strip().upper() for t in text.replace('\n', ',').split(',') if t.strip()))
+
+
+def pin_end(data, interval, end_date):
+    """
+    Return the end date to pass to market_data.indicator for the bars in data.
+
+    Intraday series keep growing between calls, so indicators are asked for
+    exactly the loaded bars rather than everything up to now.
+    """
+    if interval == '1d' or data.empty:
+        return end_date
+    return data.index[-1] + pd.Timedelta(1, 'ns')
+
+
+# Function to create OHLC or Candlestick trace
+def create_ohlc_candlestick(data, chart_type='ohlc'):
+    if 'Open' in data.columns and 'High' in data.columns and 'Low' in data.columns and 'Close' in data.columns:
+        if chart_type == 'ohlc':
+            return go.Ohlc(x=data.index, open=data['Open'], high=data['High'], low=data['Low'], close=data['Close'], name='OHLC')
+        else:
+            return go.Candlestick(x=data.index, open=data['Open'], high=data['High'], low=data['Low'], close=data['Close'], name='Candlestick')
+    else:
+        st.error("Data does not have required columns for Candlestick or OHLC charts.")
+        return go.Figure()
+
+
+# Subplot builders: each takes (data, series) and returns (traces, y-axis title).
+# series holds the indicator results computed for this rerun.
+def volume_subplot(data, series):
+    return [go.Bar(x=data.index, y=data['Volume'], name='Volume', marker_color='blue')], 'Volume'
+
+
+def rsi_subplot(data, series):
+    return [go.Scatter(x=data.index, y=series['RSI'], mode='lines', name='RSI', line=dict(color='purple'))], 'RSI'
+
+
+def macd_subplot(data, series):
+    macd, signal, histogram = series['MACD']
+    return [
+        go.Scatter(x=data.index, y=macd, mode='lines', name='MACD', line=dict(color='blue')),
+        go.Scatter(x=data.index, y=signal, mode='lines', name='Signal', line=dict(color='orange')),
+        go.Bar(x=data.index, y=histogram, name='Histogram', marker_color='gray'),
+    ], 'MACD'
+
+
+def stochastic_subplot(data, series):
+    k, d = series['Stochastic']
+    return [
+        go.Scatter(x=data.index, y=k, mode='lines', name='Stochastic %K', line=dict(color='blue')),
+        go.Scatter(x=data.index, y=d, mode='lines', name='Stochastic %D', line=dict(color='red')),
+    ], 'Stochastic'
+
+
+def mfi_subplot(data, series):
+    return [go.Scatter(x=data.index, y=series['MFI'], mode='lines', name='MFI', line=dict(color='green'))], 'MFI'
+
+
+def beta_subplot(data, series):
+    regression = series['Beta']
+    return [
+        # Alpha is per bar, so it goes in the hover text rather than on the beta scale
+        go.Scatter(x=data.index, y=regression['Beta'], mode='lines', name='Beta', line=dict(color='orange'),
+                   customdata=regression['Alpha'], hovertemplate='Beta %{y:.2f}<br>Alpha per bar %{customdata:.3%}'),
+        go.Scatter(x=data.index, y=regression['R2'], mode='lines', name='R²', line=dict(color='gray', dash='dot')),
+    ], 'Beta'
+
+
+SUBPLOTS = {
+    'Volume': volume_subplot,
+    'RSI': rsi_subplot,
+    'MACD': macd_subplot,
+    'Stochastic': stochastic_subplot,
+    'MFI': mfi_subplot,
+    'Beta': beta_subplot,
+}
+
+
+def sidebar_controls(config, chart_template, subplots, key):
+    """Render the indicator sidebar widgets and return the chosen parameters."""
+    params = {}
+    if chart_template in config['ma_templates']:
+        st.sidebar.header('Moving Averages')
+        params['short_window'] = st.sidebar.slider('Short window (days)', 5, 50, 20, key=f"{key}_short_ma")
+        params['long_window'] = st.sidebar.slider('Long window (days)', 50, 200, 100, key=f"{key}_long_ma")
+
+    if 'RSI' in subplots or 'RSI' in config['optional']:
+        st.sidebar.header('RSI')
+        params['rsi_window'] = st.sidebar.slider('RSI window (days)', 5, 30, 14, key=f"{key}_rsi")
+
+    if config['bollinger']:
+        st.sidebar.header('Bollinger Bands')
+        params['bb_window'] = st.sidebar.slider('Bollinger Bands window (days)', 5, 50, 20, key=f"{key}_bb")
+        params['bb_std'] = st.sidebar.slider('Number of standard deviations', 1, 3, 2, key=f"{key}_bb_std")
+
+    if 'Beta' in subplots or 'Beta' in config['optional']:
+        st.sidebar.header('Beta')
+        params['beta_benchmark'] = st.sidebar.selectbox('Benchmark', list(INDEX_ETFS.values()), key=f"{key}_beta_benchmark")
+        params['beta_window'] = st.sidebar.slider('Beta window (bars)', 20, 252, 60, key=f"{key}_beta_window")
+
+    if config['optional']:
+        st.sidebar.header('Additional Indicators')
+        for name, default in config['optional'].items():
+            label = 'Show Stochastic Oscillator' if name == 'Stochastic' else f'Show {name}'
+            if st.sidebar.checkbox(label, value=default, key=f"{key}_show_{name}"):
+                subplots.append(name)
+    return params
+
+
+def compute_series(ticker, start_date, end_date, config, params, subplots, interval='1d'):
+    """Fetch every indicator needed for this rerun from the shared indicator cache."""
+    def indicator(name, **kwargs):
+        return market_data.indicator(ticker, start_date, end_date, name, interval=interval, **kwargs)
+
+    series = {}
+    if 'short_window' in params:
+        series['Short_MA'] = indicator('MA', window=params['short_window'])
+        series['Long_MA'] = indicator('MA', window=params['long_window'])
+    if 'RSI' in subplots:
+        series['RSI'] = indicator('RSI', window=params['rsi_window'])
+    if config['bollinger']:
+        series['Bollinger'] = indicator('Bollinger', window=params['bb_window'], num_std=params['bb_std'])
+    for name in ('MACD', 'Stochastic', 'MFI'):
+        if name in subplots:
+            series[name] = indicator(name)
+    if 'Beta' in subplots:
+        series['Beta'] = market_data.rolling_beta(ticker, params['beta_benchmark'], start_date, end_date,
+                                                  params['beta_window'], interval)
+    return series
+
+
+def main_traces(data, series, chart_template, params):
+    traces = []
+    if chart_template.startswith('Candlestick'):
+        traces.append(create_ohlc_candlestick(data, 'candlestick'))
+    elif chart_template == 'Line Chart':
+        traces.append(go.Scatter(x=data.index, y=data['Close'], mode='lines', name='Close Price'))
+    elif chart_template == 'OHLC Chart':
+        traces.append(create_ohlc_candlestick(data, 'ohlc'))
+
+    if 'Short_MA' in series and chart_template != 'Line Chart':
+        traces.append(go.Scatter(x=data.index, y=series['Short_MA'], mode='lines', name=f"Short {params['short_window']}-day MA", line=dict(color='blue')))
+        traces.append(go.Scatter(x=data.index, y=series['Long_MA'], mode='lines', name=f"Long {params['long_window']}-day MA", line=dict(color='red')))
+
+    if 'Bollinger' in series and chart_template.startswith('Candlestick'):
+        bands = series['Bollinger']
+        traces.append(go.Scatter(x=data.index, y=bands['BB_upper'], mode='lines', name='Upper BB', line=dict(color='gray', dash='dash')))
+        traces.append(go.Scatter(x=data.index, y=bands['BB_lower'], mode='lines', name='Lower BB', line=dict(color='gray', dash='dash')))
+    return traces
+
+
+# Function to create the chart for one asset from a dashboard configuration
+def create_chart(data, series, title, chart_template, config, params, subplots):
+    num_subplots = 1 + len(subplots)
+    row_heights = [0.5] + [0.5 / (num_subplots - 1)] * (num_subplots - 1) if num_subplots > 1 else [1]
+    fig = make_subplots(rows=num_subplots, cols=1, shared_xaxes=True,
+                        vertical_spacing=0.05,
+                        row_heights=row_heights)
+
+    for trace in main_traces(data, series, chart_template, params):
+        fig.add_trace(trace, row=1, col=1)
+
+    for row, name in enumerate(subplots, start=2):
+        traces, axis_title = SUBPLOTS[name](data, series)
+        for trace in traces:
+            fig.add_trace(trace, row=row, col=1)
+        fig.update_yaxes(title_text=axis_title, row=row, col=1)
+
+    fig.update_layout(
+        title=title,
+        xaxis_title='Date',
+        yaxis_title='Price',
+        xaxis_rangeslider_visible=False,
+        template='plotly_dark',
+        height=config['row_height'] * num_subplots
+    )
+    return fig
+
+
+def render_dashboard(name):
+    """
+    Render one of the dashboards described in assets.DASHBOARDS.
+
+    All dashboards go through the same pipeline and share the process-wide
+    price and indicator caches in market_data.
+    """
+    timing.begin_rerun(name)
+    config = DASHBOARDS[name]
+    st.title(config['title'])
+    render_replay_controls()
+
+    # Sidebar for data type selection
+    st.sidebar.header('Select Data Type')
+    data_type = st.sidebar.radio('Choose data type', list(config['asset_classes']), key=f"{name}_data_type")
+    asset_class = config['asset_classes'][data_type]
+
+    # Sidebar for chart template selection
+    st.sidebar.header('Select Chart Template')
+    chart_templates = [t for t in config['templates'] if t not in asset_class['exclude_templates']]
+    chart_template = st.sidebar.selectbox('Choose chart template', chart_templates, key=f"{name}_template")
+
+    # Bar interval and date range selection
+    interval, start_date, end_date = interval_controls(name, '2023-01-01', config['end_date'])
+
+    choice = st.sidebar.selectbox(asset_class['prompt'], list(asset_class['choices']), key=f"{name}_{data_type}_choice")
+    ticker = asset_class['choices'][choice]
+    title = f"{choice} {asset_class['label']}"
+
+    subplots = []
+    if asset_class['subplots'] and (config['subplot_templates'] is None or chart_template in config['subplot_templates']):
+        subplots = list(config['subplots'])
+    params = sidebar_controls(config, chart_template, subplots, key=f"{name}_{title}")
+
+    with timing.stage('load_prices'):
+        data = market_data.load_prices(ticker, start_date, end_date, interval=interval)
+    if data.empty:
+        st.error("No data found for this ticker.")
+        timing.finish_rerun()
+        return
+    end_date = pin_end(data, interval, end_date)
+
+    with timing.stage('indicators'):
+        series = session_store().put(name, compute_series(ticker, start_date, end_date, config, params,
+                                                          subplots, interval))
+    with timing.stage('figure'):
+        fig = create_chart(data, series, f'{title} Chart', chart_template, config, params, subplots)
+    with timing.stage('render'):
+        st.plotly_chart(fig, use_container_width=True)
+
+    # Display data table
+    if config['raw_data'] and st.checkbox('Show raw data', key=f"{name}_raw"):
+        st.write(data)
+    render_memory_report()
+    timing.finish_rerun()
@@ -0,0 +1,310 @@
+"""
+Index of chart events across the precomputed universe.
+
+    python events.py build                                 # after precompute.py (which also builds it)
+    python events.py query golden_cross --days 5           # tickers with a 20/100 golden cross this week
+    python events.py query bb_lower_breach --tickers AAPL,MSFT --start 2024-01-01
+
+precompute.py extracts each ticker's events from its indicator table while
+ingesting it (EVENT_TYPES below, with the windows and levels of
+precompute.PARAMS) and writes them next to the table. build() merges every
+ticker's events into one date-sorted columnar table under
+PRECOMPUTED_DIR/_events:
+
+    dates.npy           int64 epoch nanoseconds, sorted
+    ticker.npy          int32 codes into meta.json tickers
+    event.npy           int8 codes into EVENT_TYPES
+    value.npy           float32 level at the event (see EVENT_TYPES)
+    by_ticker.npy       row ids grouped by ticker, dates sorted within each group
+    by_ticker_dates.npy dates of by_ticker, for binary searches inside a group
+    ticker_offsets.npy  start of each ticker's group in by_ticker
+    by_event*.npy, event_offsets.npy   the same per event type
+
+Arrays are memory mapped, and a query binary-searches the dates of the
+smallest matching group, so it touches only the rows it returns.
+"""
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import precompute
+from indicators import trend_periods
+
+EVENTS_DIR = os.path.join(precompute.PRECOMPUTED_DIR, '_events')
+
+# Event type -> what value holds
+EVENT_TYPES = {
+    'golden_cross': 'Close',  # short MA crosses above the long MA
+    'death_cross': 'Close',  # short MA crosses below the long MA
+    'bb_upper_breach': 'Close',  # close crosses above the upper Bollinger Band
+    'bb_lower_breach': 'Close',  # close crosses below the lower Bollinger Band
+    'rsi_oversold': 'RSI',  # RSI crosses below the buy level
+    'rsi_oversold_exit': 'RSI',  # RSI crosses back above the buy level
+    'rsi_overbought': 'RSI',  # RSI crosses above the sell level
+    'rsi_overbought_exit': 'RSI',  # RSI crosses back below the sell level
+    'uptrend_start': 'SMA_200',  # trend.py periods of the 200-day SMA
+    'uptrend_end': 'SMA_200',
+    'downtrend_start': 'SMA_200',
+    'downtrend_end': 'SMA_200',
+}
+EVENT_CODES = {name: code for code, name in enumerate(EVENT_TYPES)}
+
+
+def events_path(out_dir, ticker):
+    return os.path.join(out_dir, f'ticker={ticker}', 'events.parquet')
+
+
+def _crossings(a, b):
+    # Bars where a moves above b (up) and where it moves back to or below b
+    # (down); comparisons with NaN count as neither
+    valid = ~(np.isnan(a) | np.isnan(b))
+    above = a > b
+    both = valid[1:] & valid[:-1]
+    up = np.flatnonzero(both & above[1:] & ~above[:-1]) + 1
+    down = np.flatnonzero(both & ~above[1:] & above[:-1]) + 1
+    return up, down
+
+
+def extract_events(table, params=precompute.PARAMS):
+    """
+    Return the events in an indicator table from precompute.compute_indicator_table.
+
+    :return: DataFrame with Date, Event and Value columns, sorted by date.
+    """
+    def column(name):
+        return table[name].to_numpy(dtype=float)
+
+    close, rsi = column('Close'), column('RSI')
+    found = []  # (positions, event type, values)
+
+    up, down = _crossings(column('Short_MA'), column('Long_MA'))
+    found += [(up, 'golden_cross', close), (down, 'death_cross', close)]
+    up, _ = _crossings(close, column('BB_upper'))
+    _, down = _crossings(close, column('BB_lower'))
+    found += [(up, 'bb_upper_breach', close), (down, 'bb_lower_breach', close)]
+    buy, sell = np.full(len(rsi), float(params['rsi_buy_level'])), np.full(len(rsi), float(params['rsi_sell_level']))
+    exit_oversold, oversold = _crossings(rsi, buy)
+    overbought, exit_overbought = _crossings(rsi, sell)
+    found += [(oversold, 'rsi_oversold', rsi), (exit_oversold, 'rsi_oversold_exit', rsi),
+              (overbought, 'rsi_overbought', rsi), (exit_overbought, 'rsi_overbought_exit', rsi)]
+
+    sma = table['SMA_200']
+    uptrend, downtrend = trend_periods(sma)
+    for kind, periods in (('uptrend', uptrend), ('downtrend', downtrend)):
+        starts = table.index.get_indexer([p[0] for p in periods]).astype(np.int64)
+        ends = table.index.get_indexer([p[1] for p in periods]).astype(np.int64)
+        # The last period runs to the latest bar and has not ended yet
+        ends = ends[ends < len(table) - 1]
+        found += [(starts, f'{kind}_start', sma.to_numpy(dtype=float)), (ends, f'{kind}_end', sma.to_numpy(dtype=float))]
+
+    positions = np.concatenate([p for p, _, _ in found]).astype(np.int64)
+    codes = np.concatenate([np.full(len(p), EVENT_CODES[e], dtype=np.int8) for p, e, _ in found])
+    values = np.concatenate([v[p] for p, _, v in found])
+    order = np.lexsort((codes, positions))
+    return pd.DataFrame({'Date': table.index[positions[order]],
+                         'Event': pd.Categorical.from_codes(codes[order], list(EVENT_TYPES)),
+                         'Value': values[order].astype(np.float32)})
+
+
+def write_events(table, ticker, out_dir=precompute.PRECOMPUTED_DIR):
+    """Extract and write one ticker's events next to its precomputed table."""
+    path = events_path(out_dir, ticker)
+    events = extract_events(table)
+    events['Event'] = events['Event'].astype(str)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    events.to_parquet(f'{path}.tmp', engine='pyarrow', index=False)
+    os.replace(f'{path}.tmp', path)
+    return len(events)
+
+
+def _group(keys, dates, n_groups):
+    # Row ids grouped by key with dates sorted inside each group (rows are
+    # already date-sorted and the sort is stable), plus each group's offset
+    order = np.argsort(keys, kind='stable').astype(np.int32)
+    offsets = np.searchsorted(keys[order], np.arange(n_groups + 1)).astype(np.int64)
+    return order, dates[order], offsets
+
+
+def build(out_dir=precompute.PRECOMPUTED_DIR, events_dir=None):
+    """
+    Merge every ticker's events into the columnar index; return the number of events.
+
+    Tickers precomputed before events were extracted get them from their table.
+    """
+    events_dir = events_dir or os.path.join(out_dir, '_events')
+    tickers, frames = [], []
+    for ticker in sorted(precompute.load_manifest(out_dir)):
+        path = events_path(out_dir, ticker)
+        table_path = precompute.partition_path(out_dir, ticker)
+        if not os.path.exists(table_path):
+            continue
+        if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(table_path):
+            write_events(pd.read_parquet(table_path), ticker, out_dir)
+        events = pd.read_parquet(path)
+        events['Ticker'] = len(tickers)
+        tickers.append(ticker)
+        frames.append(events)
+    events = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['Date', 'Event', 'Value', 'Ticker'])
+
+    dates = pd.DatetimeIndex(events['Date']).as_unit('ns').asi8
+    codes = events['Event'].map(EVENT_CODES).to_numpy(dtype=np.int8)
+    ticker_codes = events['Ticker'].to_numpy(dtype=np.int32)
+    order = np.lexsort((codes, ticker_codes, dates))
+    arrays = {'dates': dates[order], 'ticker': ticker_codes[order], 'event': codes[order],
+              'value': events['Value'].to_numpy(dtype=np.float32)[order]}
+    for name, keys, n_groups in (('ticker', arrays['ticker'], len(tickers)), ('event', arrays['event'], len(EVENT_TYPES))):
+        arrays[f'by_{name}'], arrays[f'by_{name}_dates'], arrays[f'{name}_offsets'] = _group(keys, arrays['dates'], n_groups)
+
+    # Write a new version and switch the CURRENT pointer, so readers never
+    # see a half-written index
+    version = f'v{time.time_ns()}'
+    directory = os.path.join(events_dir, version)
+    os.makedirs(directory)
+    for name, values in arrays.items():
+        np.save(os.path.join(directory, f'{name}.npy'), values)
+    with open(os.path.join(directory, 'meta.json'), 'w') as f:
+        json.dump({'tickers': tickers, 'events': list(EVENT_TYPES), 'params': precompute.PARAMS,
+                   'built': pd.Timestamp.now(tz='UTC').isoformat()}, f)
+    pointer = os.path.join(events_dir, 'CURRENT')
+    with open(f'{pointer}.tmp', 'w') as f:
+        f.write(version)
+    os.replace(f'{pointer}.tmp', pointer)
+    for name in os.listdir(events_dir):
+        if name.startswith('v') and name != version:
+            shutil.rmtree(os.path.join(events_dir, name), ignore_errors=True)
+    return len(events)
+
+
+class EventIndex:
+    """Read-only view of a built event index; reloads itself when build() publishes a new one."""
+
+    def __init__(self, events_dir=EVENTS_DIR):
+        self.events_dir = events_dir
+        self.version = None
+        self.snapshot = None  # (arrays, tickers, ticker codes) of the loaded version
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(os.path.join(self.events_dir, 'CURRENT')) as f:
+                version = f.read().strip()
+        except OSError:
+            raise FileNotFoundError(f'no event index in {self.events_dir}; run python events.py build')
+        with self._lock:
+            if version != self.version:
+                directory = os.path.join(self.events_dir, version)
+                with open(os.path.join(directory, 'meta.json')) as f:
+                    meta = json.load(f)
+                arrays = {name[:-4]: np.load(os.path.join(directory, name), mmap_mode='r')
+                          for name in os.listdir(directory) if name.endswith('.npy')}
+                tickers = meta['tickers']
+                # One tuple, so a query keeps every part of the version it started with
+                self.snapshot = (arrays, tickers, {t: i for i, t in enumerate(tickers)})
+                self.version = version
+            return self.snapshot
+
+    def __len__(self):
+        return len(self._load()[0]['dates'])
+
+    @staticmethod
+    def _rows(arrays, name, code, first, last):
+        # Row ids of one ticker or event type with first <= date < last
+        lo, hi = arrays[f'{name}_offsets'][code], arrays[f'{name}_offsets'][code + 1]
+        dates = arrays[f'by_{name}_dates'][lo:hi]
+        return arrays[f'by_{name}'][lo + np.searchsorted(dates, first):lo + np.searchsorted(dates, last)]
+
+    def query(self, events=None, tickers=None, start=None, end=None, days=None):
+        """
+        Return matching events as a DataFrame with Date, Ticker, Event and Value, by date.
+
+        :param events: Event type or list of types (see EVENT_TYPES); all by default.
+        :param tickers: Ticker or list of tickers; all by default.
+        :param start: Optional first date (inclusive).
+        :param end: Optional end date (exclusive).
+        :param days: Instead of start, only the last days calendar days.
+        """
+        arrays, ticker_names, ticker_index = self._load()
+        if days is not None:
+            start = pd.Timestamp.now().normalize() - pd.Timedelta(days=days)
+        first = pd.Timestamp(start).value if start is not None else np.iinfo(np.int64).min
+        last = pd.Timestamp(end).value if end is not None else np.iinfo(np.int64).max
+        events = [events] if isinstance(events, str) else events
+        tickers = [tickers] if isinstance(tickers, str) else tickers
+        for event in events or ():
+            if event not in EVENT_CODES:
+                raise ValueError(f'unknown event type: {event}')
+        event_codes = [EVENT_CODES[e] for e in events] if events else None
+        ticker_codes = [ticker_index[t.upper()] for t in tickers if t.upper() in ticker_index] \
+            if tickers else None
+
+        # Start from whichever index gives the fewest candidate rows
+        offsets = {'ticker': arrays['ticker_offsets'], 'event': arrays['event_offsets']}
+        groups = [(name, codes) for name, codes in (('ticker', ticker_codes), ('event', event_codes)) if codes is not None]
+        groups.sort(key=lambda g: sum(int(offsets[g[0]][c + 1] - offsets[g[0]][c]) for c in g[1]))
+        if groups:
+            name, codes = groups[0]
+            rows = np.sort(np.concatenate([self._rows(arrays, name, c, first, last) for c in codes]
+                                          + [np.empty(0, np.int32)]))
+        else:
+            dates = arrays['dates']
+            rows = np.arange(np.searchsorted(dates, first), np.searchsorted(dates, last))
+        for name, codes in groups[1:]:
+            rows = rows[np.isin(arrays[name][rows], codes)]
+
+        return pd.DataFrame({
+            'Date': pd.DatetimeIndex(np.asarray(arrays['dates'][rows]).view('M8[ns]')),
+            'Ticker': pd.Categorical.from_codes(np.asarray(arrays['ticker'][rows]), ticker_names),
+            'Event': pd.Categorical.from_codes(np.asarray(arrays['event'][rows]), list(EVENT_TYPES)),
+            'Value': np.asarray(arrays['value'][rows]),
+        })
+
+    def tickers_with(self, event, start=None, end=None, days=None):
+        """Return the sorted tickers that had event in the date range."""
+        matches = self.query(event, start=start, end=end, days=days)
+        return sorted(matches['Ticker'].unique().tolist())
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = EventIndex()
+        return _index
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build or query the event index of the precomputed universe.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build_parser = commands.add_parser('build', help='Merge the per-ticker events into the index')
+    build_parser.add_argument('--out', default=precompute.PRECOMPUTED_DIR)
+    query_parser = commands.add_parser('query', help='List matching events')
+    query_parser.add_argument('events', nargs='*', metavar='EVENT', help=', '.join(EVENT_TYPES))
+    query_parser.add_argument('--tickers', help='Comma separated tickers')
+    query_parser.add_argument('--start')
+    query_parser.add_argument('--end')
+    query_parser.add_argument('--days', type=int, help='Only the last DAYS calendar days')
+    query_parser.add_argument('--out', default=precompute.PRECOMPUTED_DIR)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        started = time.perf_counter()
+        count = build(args.out)
+        print(f'Indexed {count:,} events in {time.perf_counter() - started:.1f}s')
+    else:
+        index = EventIndex(os.path.join(args.out, '_events'))
+        tickers = [t.strip() for t in args.tickers.split(',') if t.strip()] if args.tickers else None
+        started = time.perf_counter()
+        matches = index.query(args.events or None, tickers, args.start, args.end, args.days)
+        seconds = time.perf_counter() - started
+        print(matches.to_string(index=False))
+        print(f'{len(matches):,} of {len(index):,} events in {seconds * 1000:.1f} ms')
@@ -0,0 +1,148 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from cache_store import get_cache
+
+ONE_DAY = 24 * 60 * 60
+ONE_WEEK = 7 * ONE_DAY
+
+# Metric label -> (yfinance info key, time-to-live in seconds).
+# Price-driven figures move daily; balance-sheet ratios only change with filings.
+FUNDAMENTAL_FIELDS = {
+    'P/E Ratio': ('trailingPE', ONE_DAY),
+    'ROE': ('returnOnEquity', ONE_WEEK),
+    'ROA': ('returnOnAssets', ONE_WEEK),
+    'Gross Margin': ('grossMargins', ONE_WEEK),
+    'Profit Margin': ('profitMargins', ONE_WEEK),
+    'Debt to Equity': ('debtToEquity', ONE_WEEK),
+    'Current Ratio': ('currentRatio', ONE_WEEK),
+    'Price to Book': ('priceToBook', ONE_DAY),
+    'Earnings Per Share': ('trailingEps', ONE_WEEK),
+    'Dividend Yield': ('dividendYield', ONE_DAY),
+}
+
+MAX_WORKERS = 8
+
+# Seconds before a ticker whose fetch failed is tried again
+RETRY_AFTER = 5 * 60
+
+_cache = get_cache('fundamentals')
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='fundamentals')
+_in_flight = set()
+_in_flight_lock = threading.Lock()
+_failed = {}  # ticker -> time of the last failed fetch
+
+
+def _stale_fields(entry, now):
+    fetched = entry['fetched']
+    return [label for label, (_, ttl) in FUNDAMENTAL_FIELDS.items() if now - fetched.get(label, 0) >= ttl]
+
+
+# Function to fetch the raw metric values for one ticker; only fields past
+# their TTL are replaced, and a failed fetch keeps the previous entry
+def _fetch_one(ticker):
+    import yfinance as yf
+
+    previous = _cache.get(ticker)
+    try:
+        info = yf.Ticker(ticker).info
+    except Exception:
+        info = None
+    if not info:
+        _failed[ticker] = time.time()
+        return ticker, previous or {'values': dict.fromkeys(FUNDAMENTAL_FIELDS), 'fetched': {}}
+    _failed.pop(ticker, None)
+    now = time.time()
+    entry = previous or {'values': {}, 'fetched': {}}
+    entry = {'values': dict(entry['values']), 'fetched': dict(entry['fetched'])}
+    for label in _stale_fields(entry, now):
+        entry['values'][label] = info.get(FUNDAMENTAL_FIELDS[label][0])
+        entry['fetched'][label] = now
+    _cache.set(ticker, entry)
+    return ticker, entry
+
+
+def _retry_due(ticker, now):
+    return now - _failed.get(ticker, 0) >= RETRY_AFTER
+
+
+def _refresh_in_background(tickers):
+    with _in_flight_lock:
+        pending = [t for t in tickers if t not in _in_flight]
+        _in_flight.update(pending)
+
+    def run(ticker):
+        try:
+            _fetch_one(ticker)
+        finally:
+            with _in_flight_lock:
+                _in_flight.discard(ticker)
+
+    for ticker in pending:
+        _executor.submit(run, ticker)
+
+
+def fetch_fundamentals(tickers, background=True):
+    """
+    Return the raw cached entries for tickers, fetching what is missing.
+
+    :param tickers: Iterable of ticker symbols.
+    :param background: Serve stale entries immediately and refresh them on the
+        worker pool; otherwise refresh stale entries before returning.
+    :return: Dict of ticker -> {'values': ..., 'fetched': ...}.
+    """
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    now = time.time()
+    entries = {}
+    missing, stale = [], []
+    for ticker in tickers:
+        entry = _cache.get(ticker)
+        if entry is None:
+            if _retry_due(ticker, now):
+                missing.append(ticker)
+            else:
+                entries[ticker] = {'values': dict.fromkeys(FUNDAMENTAL_FIELDS), 'fetched': {}}
+        else:
+            entries[ticker] = entry
+            if _stale_fields(entry, now) and _retry_due(ticker, now):
+                stale.append(ticker)
+
+    if not background:
+        missing += stale
+        stale = []
+
+    # Missing tickers are fetched concurrently and waited for
+    for ticker, entry in _executor.map(_fetch_one, missing):
+        entries[ticker] = entry
+
+    if stale:
+        _refresh_in_background(stale)
+
+    return entries
+
+
+def get_fundamentals_table(tickers, background=True):
+    """
+    Build a ticker x metric table of all fundamental metrics rounded to 2 decimals.
+
+    Missing or non-numeric values come back as NaN.
+    """
+    tickers = list(tickers)
+    entries = fetch_fundamentals(tickers, background=background)
+    table = pd.DataFrame.from_dict(
+        {ticker: entry['values'] for ticker, entry in entries.items()},
+        orient='index',
+        columns=list(FUNDAMENTAL_FIELDS),
+    )
+    table = table.apply(pd.to_numeric, errors='coerce').round(2)
+    table.index.name = 'Ticker'
+    return table.reindex([t.upper() for t in dict.fromkeys(tickers)])
+
+
+def get_fundamental_metrics(ticker):
+    """Return the metrics of one ticker as a dict, with 'N/A' for missing values."""
+    row = get_fundamentals_table([ticker]).iloc[0]
+    return {label: ('N/A' if pd.isna(value) else value) for label, value in row.items()}
@@ -0,0 +1,310 @@
+"""
+Memory-mapped columnar store of full price histories.
+
+Each ticker is a directory with one raw file per field plus a dates file:
+
+    history/AAPL/meta.json      field dtypes and the time of the last update
+    history/AAPL/dates.i8       sorted int64 epoch nanoseconds
+    history/AAPL/Close.f8       one value per date, same order
+    ...
+
+Loads are zero-copy views of np.memmap arrays, a date range is found with a
+binary search on the dates file, and every process reading the same ticker
+shares its pages through the OS page cache. Appends write the field files
+first and the dates file last; readers size everything from the dates file,
+so they never see a half-written row.
+
+Rows are only rewritten in two cases. An update re-downloads the last
+OVERLAP_ROWS stored rows and overwrites them in place, so a bar stored while
+its day was still trading is replaced by the final one. If the adjusted close
+of any of those rows but the newest has changed, a dividend or split has
+been applied to the whole history, which is then downloaded again and
+rewritten under a new generation number in meta.json.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+import compact
+from cache_store import CACHE_DIR
+
+HISTORY_DIR = os.environ.get('PF_HISTORY_DIR', os.path.join(CACHE_DIR, 'history'))
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
+
+# Histories older than this are topped up from Yahoo Finance on load
+REFRESH_SECONDS = 24 * 60 * 60
+
+# Stored rows downloaded again by each update (see the module docstring)
+OVERLAP_ROWS = 5
+
+
+@contextmanager
+def _file_lock(directory):
+    """Serialise appends to one ticker across processes where flock is available."""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(os.path.join(directory, '.lock'), 'w') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _file_name(field, dtype):
+    return f"{field.replace(' ', '_')}.{np.dtype(dtype).kind}{np.dtype(dtype).itemsize}"
+
+
+class HistoryStore:
+    def __init__(self, path=HISTORY_DIR):
+        self.path = path
+        self._lock = threading.Lock()
+        self._append_lock = threading.Lock()
+        self._maps = {}  # (ticker, file name) -> (rows, generation, memmap)
+
+    def _dir(self, ticker):
+        return os.path.join(self.path, ticker.upper())
+
+    def meta(self, ticker):
+        try:
+            with open(os.path.join(self._dir(ticker), 'meta.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, ticker, meta):
+        path = os.path.join(self._dir(ticker), 'meta.json')
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(f'{path}.tmp', path)
+
+    def _map(self, ticker, name, dtype, rows, generation=0):
+        """Return a read-only memmap of the first rows values of one file."""
+        key = (ticker, name)
+        with self._lock:
+            cached = self._maps.get(key)
+            if cached is not None and cached[:2] == (rows, generation):
+                return cached[2]
+            if rows == 0:
+                array = np.empty(0, dtype=dtype)
+            else:
+                array = np.memmap(os.path.join(self._dir(ticker), name), dtype=dtype, mode='r', shape=(rows,))
+            self._maps[key] = (rows, generation, array)
+            return array
+
+    def __len__(self):
+        return len(self.tickers())
+
+    def tickers(self):
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(t for t in os.listdir(self.path) if os.path.exists(os.path.join(self.path, t, 'meta.json')))
+
+    def rows(self, ticker):
+        try:
+            return os.path.getsize(os.path.join(self._dir(ticker), 'dates.i8')) // 8
+        except OSError:
+            return 0
+
+    def _generation(self, ticker):
+        meta = self.meta(ticker)
+        return meta.get('generation', 0) if meta is not None else 0
+
+    def dates(self, ticker):
+        """Return the int64 epoch-nanosecond dates of ticker as a memmap."""
+        return self._map(ticker.upper(), 'dates.i8', np.int64, self.rows(ticker), self._generation(ticker))
+
+    def last_date(self, ticker):
+        dates = self.dates(ticker)
+        return pd.Timestamp(dates[-1]) if len(dates) else None
+
+    def append(self, ticker, data):
+        """
+        Append the rows of data that are newer than the stored history.
+
+        Rows of data on dates that are already stored overwrite them in place.
+
+        :param data: OHLCV DataFrame indexed by date.
+        :return: Number of rows appended.
+        """
+        ticker = ticker.upper()
+        directory = self._dir(ticker)
+        os.makedirs(directory, exist_ok=True)
+        with self._append_lock, _file_lock(directory):
+            return self._append(ticker, directory, data)
+
+    def rewrite(self, ticker, data):
+        """
+        Replace the whole stored history of ticker with data.
+
+        :return: Number of rows written.
+        """
+        ticker = ticker.upper()
+        directory = self._dir(ticker)
+        os.makedirs(directory, exist_ok=True)
+        with self._append_lock, _file_lock(directory):
+            meta = self.meta(ticker)
+            # The dates file goes first, so readers see an empty history
+            # rather than new dates over old values
+            for name in ['dates.i8'] + ([_file_name(f, d) for f, d in meta['fields'].items()] if meta else []):
+                if os.path.exists(os.path.join(directory, name)):
+                    os.remove(os.path.join(directory, name))
+            generation = meta.get('generation', 0) + 1 if meta is not None else 0
+            return self._append(ticker, directory, data, generation)
+
+    def _append(self, ticker, directory, data, generation=None):
+        meta = self.meta(ticker)
+        if meta is None or generation is not None:
+            dtypes = {field: ('int64' if field == 'Volume' else ('float32' if compact.COMPACT else 'float64'))
+                      for field in FIELDS if field in data.columns}
+            meta = {'fields': dtypes, 'updated': 0, 'generation': generation or 0}
+
+        dates = data.index.tz_localize(None) if getattr(data.index, 'tz', None) else data.index
+        dates = pd.DatetimeIndex(dates).as_unit('ns').asi8
+        rows = self.rows(ticker)
+        last = self.last_date(ticker)
+        if last is not None:
+            self._overwrite(ticker, directory, meta, data, dates, rows)
+        new = np.flatnonzero(dates > last.value) if last is not None else np.arange(len(dates))
+        # Keep appended dates strictly increasing even if data is unsorted or repeats days
+        new = new[np.argsort(dates[new], kind='stable')]
+        if len(new):
+            new = new[np.concatenate(([True], np.diff(dates[new]) > 0))]
+
+        if len(new):
+            for field, dtype in meta['fields'].items():
+                path = os.path.join(directory, _file_name(field, dtype))
+                # Drop anything past the last complete row, left by an interrupted append
+                if os.path.exists(path) and os.path.getsize(path) > rows * np.dtype(dtype).itemsize:
+                    os.truncate(path, rows * np.dtype(dtype).itemsize)
+                values = data[field].to_numpy()[new] if field in data.columns else np.zeros(len(new))
+                if np.dtype(dtype).kind == 'i':
+                    values = np.nan_to_num(values)
+                with open(path, 'ab') as f:
+                    f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+            with open(os.path.join(directory, 'dates.i8'), 'ab') as f:
+                f.write(dates[new].astype(np.int64).tobytes())
+
+        meta['updated'] = time.time()
+        self._write_meta(ticker, meta)
+        return int(len(new))
+
+    def _overwrite(self, ticker, directory, meta, data, dates, rows):
+        # Write the rows of data on already stored dates over the stored values
+        stored = self.dates(ticker)
+        positions = np.searchsorted(stored, dates)
+        found = positions < rows
+        found[found] = stored[positions[found]] == dates[found]
+        if not found.any():
+            return
+        positions = positions[found]
+        for field, dtype in meta['fields'].items():
+            if field not in data.columns:
+                continue
+            values = data[field].to_numpy()[found]
+            if np.dtype(dtype).kind == 'i':
+                values = np.nan_to_num(values)
+            values = np.ascontiguousarray(values, dtype=dtype)
+            with open(os.path.join(directory, _file_name(field, dtype)), 'r+b') as f:
+                for position, value in zip(positions, values):
+                    f.seek(int(position) * values.itemsize)
+                    f.write(value.tobytes())
+
+    def slice_rows(self, ticker, start=None, end=None, dates=None):
+        """Return the row range [first, last) of dates in [start, end), by binary search."""
+        if dates is None:
+            dates = self.dates(ticker)
+        first = 0 if start is None else int(np.searchsorted(dates, pd.Timestamp(start).value, side='left'))
+        last = len(dates) if end is None else int(np.searchsorted(dates, pd.Timestamp(end).value, side='left'))
+        return first, max(first, last)
+
+    def load(self, ticker, start=None, end=None, fields=None):
+        """
+        Return stored OHLCV for ticker as a DataFrame of read-only memmap views.
+
+        Nothing is copied: only the pages of the requested rows are read, when
+        they are first touched.
+
+        :param start: Optional first date (inclusive).
+        :param end: Optional end date (exclusive).
+        :param fields: Optional list of fields, all by default.
+        """
+        ticker = ticker.upper()
+        meta = self.meta(ticker)
+        if meta is None:
+            return pd.DataFrame(columns=fields or FIELDS, index=pd.DatetimeIndex([], name='Date'))
+        rows = self.rows(ticker)
+        generation = meta.get('generation', 0)
+        dates = self._map(ticker, 'dates.i8', np.int64, rows, generation)
+        first, last = self.slice_rows(ticker, start, end, dates)
+        dates = dates[first:last]
+        index = pd.DatetimeIndex(dates.view('M8[ns]'), name='Date', copy=False)
+        columns = {}
+        for field in fields or meta['fields']:
+            dtype = meta['fields'][field]
+            columns[field] = self._map(ticker, _file_name(field, dtype), dtype, rows, generation)[first:last]
+        return pd.DataFrame(columns, index=index, copy=False)
+
+    def update(self, ticker, refresh_seconds=REFRESH_SECONDS):
+        """
+        Bring the history up to date if it is older than refresh_seconds.
+
+        Downloads from the last OVERLAP_ROWS stored rows on, overwriting them,
+        or the whole history again if their adjusted closes have changed.
+
+        :return: Number of rows appended, or written by a full download.
+        """
+        import market_data
+
+        meta = self.meta(ticker)
+        if meta is not None and time.time() - meta['updated'] < refresh_seconds:
+            return 0
+        dates = self.dates(ticker)
+        if not len(dates):
+            data = market_data.download(ticker)
+            return self.append(ticker, data) if data is not None and not data.empty else 0
+        since = pd.Timestamp(dates[max(len(dates) - OVERLAP_ROWS, 0)])
+        data = market_data.download(ticker, start=since.strftime('%Y-%m-%d'))
+        if data is None or data.empty:
+            return 0
+        if self._adjusted(ticker, data, since, pd.Timestamp(dates[-1])):
+            data = market_data.download(ticker)
+            return self.rewrite(ticker, data) if data is not None and not data.empty else 0
+        return self.append(ticker, data)
+
+    def _adjusted(self, ticker, data, start, end):
+        # Whether the downloaded adjusted closes of the stored rows in [start, end) differ from the stored ones
+        if 'Adj Close' not in data.columns:
+            return False
+        stored = self.load(ticker, start, end, ['Adj Close'])['Adj Close']
+        index = data.index.tz_localize(None) if getattr(data.index, 'tz', None) else data.index
+        fresh = pd.Series(data['Adj Close'].to_numpy(dtype=float), index=index).reindex(stored.index)
+        both = fresh.notna().to_numpy()
+        # Dividends and splits move adjusted closes by far more than float32 rounding
+        return not np.allclose(stored.to_numpy(dtype=float)[both], fresh.to_numpy()[both], rtol=1e-6)
+
+    def load_or_fetch(self, ticker, start=None, end=None, fields=None):
+        """Bring ticker's history up to date if needed, then load() it."""
+        self.update(ticker)
+        return self.load(ticker, start, end, fields)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = HistoryStore()
+        return _store
@@ -0,0 +1,230 @@
+"""
+Streaming versions of the indicators in indicators.py.
+
+Each class keeps just enough state to produce the next value from one new
+bar in O(1) (O(window) worst case for the stochastic min/max), and gives the
+same values as the batch function run over all bars so far, missing (NaN)
+values included. update() takes a bar as a mapping with
+Open/High/Low/Close/Volume keys.
+"""
+import math
+from collections import deque
+
+import numpy as np
+
+NAN = float('nan')
+
+
+def _divide(a, b):
+    # Same results as NumPy/pandas float division: x/0 is +-inf, 0/0 is nan
+    if b == 0:
+        return NAN if a == 0 or math.isnan(a) else math.copysign(math.inf, a)
+    return a / b
+
+
+class _Window:
+    """Running sum (and sum of squares) of the values that are not NaN among the last window values."""
+
+    def __init__(self, window):
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.squares = 0.0
+        self.nans = 0
+
+    def push(self, value):
+        if len(self.values) == self.values.maxlen:
+            old = self.values[0]
+            if math.isnan(old):
+                self.nans -= 1
+            else:
+                self.total -= old
+                self.squares -= old * old
+        self.values.append(value)
+        if math.isnan(value):
+            self.nans += 1
+        else:
+            self.total += value
+            self.squares += value * value
+
+    def full(self):
+        """Whether the window holds window values and none of them is NaN, as rolling(window) requires."""
+        return len(self.values) == self.values.maxlen and not self.nans
+
+    def mean(self):
+        count = len(self.values) - self.nans
+        return self.total / count if count else NAN
+
+
+class MovingAverage:
+    """indicators.moving_average"""
+    columns = ('MA',)
+
+    def __init__(self, window):
+        self.window = _Window(window)
+
+    def update(self, bar):
+        self.window.push(bar['Close'])
+        return self.window.mean()
+
+
+class RSI:
+    """indicators.calculate_rsi"""
+    columns = ('RSI',)
+
+    def __init__(self, window=14):
+        self.gains = _Window(window)
+        self.losses = _Window(window)
+        self.previous = None
+
+    def update(self, bar):
+        close = bar['Close']
+        delta = close - self.previous if self.previous is not None else 0.0
+        self.previous = close
+        self.gains.push(delta if delta > 0 else 0.0)
+        self.losses.push(-delta if delta < 0 else 0.0)
+        rs = _divide(self.gains.mean(), self.losses.mean())
+        return 100 - 100 / (1 + rs) if not math.isnan(rs) else NAN
+
+
+class Bollinger:
+    """indicators.bollinger_bands"""
+    columns = ('MA', 'BB_upper', 'BB_lower')
+
+    def __init__(self, window=20, num_std=2):
+        self.window = _Window(window)
+        self.num_std = num_std
+
+    def update(self, bar):
+        self.window.push(bar['Close'])
+        if not self.window.full():
+            return NAN, NAN, NAN
+        n = len(self.window.values)
+        mean = self.window.total / n
+        variance = max(self.window.squares - self.window.total * mean, 0.0) / (n - 1) if n > 1 else NAN
+        std = math.sqrt(variance)
+        return mean, mean + std * self.num_std, mean - std * self.num_std
+
+
+class _EWM:
+    """ewm(span, adjust=False).mean()"""
+
+    def __init__(self, span):
+        self.alpha = 2 / (span + 1)
+        self.value = None
+        # Weight of the current value relative to a value one bar old;
+        # shrinks over NaNs, which pandas skips but still counts in time
+        self.weight = 1.0
+
+    def push(self, x):
+        if math.isnan(x):
+            if self.value is None:
+                return NAN
+            self.weight *= 1 - self.alpha
+        elif self.value is None:
+            self.value = x
+        else:
+            old = self.weight * (1 - self.alpha)
+            self.value = (old * self.value + self.alpha * x) / (old + self.alpha)
+            self.weight = 1.0
+        return self.value
+
+
+class MACD:
+    """indicators.calculate_macd"""
+    columns = ('MACD', 'Signal', 'Histogram')
+
+    def __init__(self, short_window=12, long_window=26, signal_window=9):
+        self.short = _EWM(short_window)
+        self.long = _EWM(long_window)
+        self.signal = _EWM(signal_window)
+
+    def update(self, bar):
+        macd = self.short.push(bar['Close']) - self.long.push(bar['Close'])
+        signal = self.signal.push(macd)
+        return macd, signal, macd - signal
+
+
+class _Extreme:
+    """Rolling min or max over the last window values with a monotonic deque; NaN while a NaN is in the window."""
+
+    def __init__(self, window, better):
+        self.window = window
+        self.better = better
+        self.items = deque()  # (position, value)
+        self.position = 0
+        self.last_nan = -window
+
+    def push(self, value):
+        if math.isnan(value):
+            self.last_nan = self.position
+        else:
+            while self.items and not self.better(self.items[-1][1], value):
+                self.items.pop()
+            self.items.append((self.position, value))
+        if self.items and self.items[0][0] <= self.position - self.window:
+            self.items.popleft()
+        self.position += 1
+        full = self.position >= self.window and self.position - self.last_nan > self.window
+        return self.items[0][1] if full else NAN
+
+
+class Stochastic:
+    """indicators.calculate_stochastic"""
+    columns = ('Stochastic_K', 'Stochastic_D')
+
+    def __init__(self, window=14, smooth_window=3):
+        self.low = _Extreme(window, lambda kept, new: kept < new)
+        self.high = _Extreme(window, lambda kept, new: kept > new)
+        self.k_values = deque(maxlen=smooth_window)
+
+    def update(self, bar):
+        low_min = self.low.push(bar['Low'])
+        high_max = self.high.push(bar['High'])
+        k = 100 * _divide(bar['Close'] - low_min, high_max - low_min)
+        self.k_values.append(k)
+        full = len(self.k_values) == self.k_values.maxlen
+        d = sum(self.k_values) / len(self.k_values) if full and not any(map(math.isnan, self.k_values)) else NAN
+        return k, d
+
+
+class MFI:
+    """indicators.calculate_mfi"""
+    columns = ('MFI',)
+
+    def __init__(self, period=14):
+        self.positive = _Window(period)
+        self.negative = _Window(period)
+        self.previous = None
+
+    def update(self, bar):
+        typical_price = (bar['High'] + bar['Low'] + bar['Close']) / 3
+        money_flow = typical_price * bar['Volume']
+        previous, self.previous = self.previous, typical_price
+        self.positive.push(money_flow if previous is not None and typical_price > previous else 0.0)
+        self.negative.push(money_flow if previous is not None and typical_price < previous else 0.0)
+        if not (self.positive.full() and self.negative.full()):
+            return NAN
+        ratio = _divide(self.positive.total, self.negative.total)
+        return 100 - 100 / (1 + ratio) if not math.isnan(ratio) else NAN
+
+
+# market_data indicator name -> streaming class taking the same parameters
+INCREMENTAL = {
+    'MA': MovingAverage,
+    'RSI': RSI,
+    'Bollinger': Bollinger,
+    'MACD': MACD,
+    'Stochastic': Stochastic,
+    'MFI': MFI,
+}
+
+
+def replay(state, bars):
+    """Feed every row of an OHLCV DataFrame to state; return an array of outputs per column."""
+    columns = {field: bars[field].to_numpy(dtype=float) for field in ('Open', 'High', 'Low', 'Close', 'Volume')
+               if field in bars.columns}
+    out = np.full((len(bars), len(state.columns)), np.nan)
+    for i in range(len(bars)):
+        value = state.update({field: values[i] for field, values in columns.items()})
+        out[i] = value
+    return out
@@ -0,0 +1,259 @@
+import numpy as np
+import pandas as pd
+
+
+# Function to calculate moving averages
+def add_moving_averages(data, short_window, long_window):
+    data['Short_MA'] = moving_average(data, short_window)
+    data['Long_MA'] = moving_average(data, long_window)
+
+
+def moving_average(data, window):
+    return data['Close'].rolling(window=window, min_periods=1).mean()
+
+
+# Function to calculate RSI
+def calculate_rsi(data, window=14):
+    delta = data['Close'].diff()
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+    avg_gain = gain.rolling(window=window, min_periods=1).mean()
+    avg_loss = loss.rolling(window=window, min_periods=1).mean()
+    rs = avg_gain / avg_loss
+    rsi = 100 - (100 / (1 + rs))
+    return rsi
+
+
+# Function to calculate Bollinger Bands
+def bollinger_bands(data, window=20, num_std=2):
+    """
+    Calculate Bollinger Bands.
+
+    :param data: DataFrame containing stock data.
+    :param window: Rolling window for the middle band.
+    :param num_std: Number of standard deviations for the outer bands.
+    :return: DataFrame with MA, BB_upper and BB_lower columns.
+    """
+    rolling = data['Close'].rolling(window=window)
+    ma = rolling.mean()
+    std = rolling.std()
+    return pd.DataFrame({'MA': ma, 'BB_upper': ma + std * num_std, 'BB_lower': ma - std * num_std})
+
+
+def add_bollinger_bands(data, window=20, num_std=2):
+    bands = bollinger_bands(data, window, num_std)
+    for column in bands:
+        data[column] = bands[column]
+
+
+# Function to calculate MACD
+def calculate_macd(data, short_window=12, long_window=26, signal_window=9):
+    """
+    Calculate the MACD and signal line.
+
+    :param data: DataFrame containing stock data.
+    :param short_window: Short window for MACD calculation.
+    :param long_window: Long window for MACD calculation.
+    :param signal_window: Signal window for MACD calculation.
+    :return: Tuple of MACD, Signal line, and Histogram values.
+    """
+    short_ema = data['Close'].ewm(span=short_window, adjust=False).mean()
+    long_ema = data['Close'].ewm(span=long_window, adjust=False).mean()
+    macd = short_ema - long_ema
+    signal = macd.ewm(span=signal_window, adjust=False).mean()
+    histogram = macd - signal
+    return macd, signal, histogram
+
+
+# Function to calculate Stochastic Oscillator
+def calculate_stochastic(data, window=14, smooth_window=3):
+    """
+    Calculate Stochastic Oscillator %K and %D.
+
+    :param data: DataFrame containing stock data.
+    :param window: Window for %K calculation.
+    :param smooth_window: Window for %D calculation.
+    :return: Tuple of %K and %D values.
+    """
+    low_min = data['Low'].rolling(window=window).min()
+    high_max = data['High'].rolling(window=window).max()
+    k = 100 * ((data['Close'] - low_min) / (high_max - low_min))
+    d = k.rolling(window=smooth_window).mean()
+    return k, d
+
+
+# Function to calculate Money Flow Index (MFI)
+def calculate_mfi(data, period=14):
+    """
+    Calculate the Money Flow Index (MFI).
+
+    :param data: DataFrame containing stock data.
+    :param period: Lookback period for MFI calculation.
+    :return: MFI values.
+    """
+    typical_price = (data['High'] + data['Low'] + data['Close']) / 3
+    money_flow = typical_price * data['Volume']
+    positive_flow = pd.Series(np.where(typical_price > typical_price.shift(1), money_flow, 0), index=data.index)
+    negative_flow = pd.Series(np.where(typical_price < typical_price.shift(1), money_flow, 0), index=data.index)
+
+    positive_mf = positive_flow.rolling(window=period).sum()
+    negative_mf = negative_flow.rolling(window=period).sum()
+
+    mfi = 100 - (100 / (1 + positive_mf / negative_mf))
+    return mfi
+
+
+# Function to generate trading signals
+def generate_signals(data, rsi_buy_level, rsi_sell_level):
+    """
+    Add RSI_Signal, BB_Signal and Combined_Signal columns to data.
+
+    Expects RSI, BB_upper and BB_lower columns. Combined_Signal > 1 is a buy,
+    < -1 a sell.
+    """
+    # Ensure RSI thresholds are within a reasonable range
+    rsi_buy_level = max(0, min(100, rsi_buy_level))
+    rsi_sell_level = max(0, min(100, rsi_sell_level))
+
+    # RSI Signal
+    data['RSI_Signal'] = np.where((data['RSI'] < rsi_buy_level) & (rsi_buy_level < 100), 1,
+                                  np.where((data['RSI'] > rsi_sell_level) & (rsi_sell_level > 0), -1, 0))
+
+    # Bollinger Bands Signal
+    data['BB_Signal'] = np.where(data['Close'] < data['BB_lower'], 1,
+                                 np.where(data['Close'] > data['BB_upper'], -1, 0))
+
+    # Combined Signal
+    data['Combined_Signal'] = data['RSI_Signal'] + data['BB_Signal']
+
+
+def signals(data, rsi_window=14, bb_window=20, bb_std=2, rsi_buy_level=30, rsi_sell_level=70):
+    """Return RSI, Bollinger Bands and the IAC8 signal columns without touching data."""
+    frame = bollinger_bands(data, bb_window, bb_std)
+    frame['Close'] = data['Close']
+    frame['RSI'] = calculate_rsi(data, rsi_window)
+    generate_signals(frame, rsi_buy_level, rsi_sell_level)
+    return frame.drop(columns='Close')
+
+
+def sma(data, window=200):
+    return data['Close'].rolling(window=window).mean()
+
+
+def ema(data, span):
+    return data['Close'].ewm(span=span, adjust=False).mean()
+
+
+# Function to calculate rolling beta, alpha and R-squared against a benchmark
+def rolling_regression(returns, benchmark, window=60, min_periods=None):
+    """
+    Regress returns on benchmark returns over rolling windows of window bars.
+
+    Each window's sums of x, y, xy, x^2 and y^2 are differences of cumulative
+    sums, so the cost is O(n) whatever the window, and every column of a
+    DataFrame of returns is regressed against the same benchmark at once.
+
+    :param returns: Series or DataFrame of returns, NaN where missing.
+    :param benchmark: Series of benchmark returns on the same index.
+    :param min_periods: Bars with both returns a window needs (default: window).
+    :return: Tuple of (beta, alpha, r_squared) shaped like returns; alpha is per bar.
+    """
+    min_periods = window if min_periods is None else min_periods
+    y = returns.to_numpy(dtype=float)
+    x = benchmark.reindex(returns.index).to_numpy(dtype=float)
+    if y.ndim == 2:
+        x = np.repeat(x[:, None], y.shape[1], axis=1)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    # Centring on the overall means keeps the differences of sums accurate;
+    # beta and R-squared do not change and alpha is shifted back below
+    count = np.maximum(valid.sum(axis=0), 1)
+    mean_x, mean_y = np.where(valid, x, 0.0).sum(axis=0) / count, np.where(valid, y, 0.0).sum(axis=0) / count
+    x, y = np.where(valid, x - mean_x, 0.0), np.where(valid, y - mean_y, 0.0)
+
+    def window_sums(values):
+        sums = np.cumsum(values, axis=0)
+        sums[window:] = sums[window:] - sums[:-window].copy()
+        return sums
+
+    n = window_sums(valid.astype(float))
+    sx, sy = window_sums(x), window_sums(y)
+    sxy, sxx, syy = window_sums(x * y), window_sums(x * x), window_sums(y * y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = sxy - sx * sy / n
+        var_x = sxx - sx * sx / n
+        var_y = syy - sy * sy / n
+        beta = cov / var_x
+        alpha = (sy - beta * sx) / n + mean_y - beta * mean_x
+        r_squared = np.clip(cov * cov / (var_x * var_y), 0.0, 1.0)
+    short = n < max(min_periods, 2)
+    results = []
+    for values in (beta, alpha, r_squared):
+        values = np.where(short, np.nan, values)
+        if values.ndim == 2:
+            results.append(pd.DataFrame(values, index=returns.index, columns=returns.columns))
+        else:
+            results.append(pd.Series(values, index=returns.index))
+    return tuple(results)
+
+
+def _merge_periods(periods, min_days, merge_days):
+    # Filter periods to only include those longer than min_days
+    periods = [[start, end] for start, end in periods if (end - start).days > min_days]
+
+    # Merge consecutive periods with the same trend that are within merge_days
+    merged = []
+    for start, end in periods:
+        if merged and start <= merged[-1][1] + pd.Timedelta(days=merge_days):
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def trend_periods(sma_values, min_days=50, merge_days=50):
+    """
+    Split an SMA series into uptrend and downtrend periods, as in trend.py.
+
+    A period starts on the bar before the SMA changes direction and ends where
+    the next one starts. Periods of min_days or less are dropped and same-trend
+    periods less than merge_days apart are merged.
+
+    :param sma_values: Series of SMA values indexed by date.
+    :return: Tuple of (uptrend_periods, downtrend_periods) as [start, end] lists.
+    """
+    values = sma_values.to_numpy(dtype=float)
+    index = sma_values.index
+    if len(values) < 2:
+        return [], []
+    direction = np.sign(np.nan_to_num(np.diff(values), nan=0.0))
+    moves = np.flatnonzero(direction)
+    if len(moves) == 0:
+        return [], []
+    move_directions = direction[moves]
+    changes = np.concatenate(([True], move_directions[1:] != move_directions[:-1]))
+    starts = moves[changes]  # period i starts at position starts[i] (bar before the change)
+    ends = np.append(starts[1:], len(values) - 1)
+    kinds = move_directions[changes]
+
+    uptrend_periods = [[index[s], index[e]] for s, e, k in zip(starts, ends, kinds) if k > 0]
+    downtrend_periods = [[index[s], index[e]] for s, e, k in zip(starts, ends, kinds) if k < 0]
+    return (_merge_periods(uptrend_periods, min_days, merge_days),
+            _merge_periods(downtrend_periods, min_days, merge_days))
+
+
+def trends(data, window=200, min_days=50, merge_days=50):
+    """Return the SMA and its merged trend periods for data."""
+    sma_values = sma(data, window)
+    uptrend_periods, downtrend_periods = trend_periods(sma_values, min_days, merge_days)
+    return {'SMA': sma_values, 'uptrend': uptrend_periods, 'downtrend': downtrend_periods}
+
+
+# Function to calculate year-over-year growth, as in AnnualGrowthRate.py
+def annual_growth_rates(prices):
+    """
+    Resample prices to the last value of each year and return the growth in percent.
+
+    :param prices: Series of prices indexed by date (any bar frequency).
+    """
+    annual_data = prices.resample('YE').last()
+    return annual_data.pct_change() * 100
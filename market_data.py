@@ -0,0 +1,534 @@
+import importlib
+import itertools
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import compact
+import compute_pool
+import incremental
+import indicators
+import precompute
+import ring_buffer
+import timing
+
+# Number of price frames / indicator results kept in the process-wide caches
+MAX_PRICE_ENTRIES = 256
+MAX_INDICATOR_ENTRIES = 1024
+
+# Byte limits of the process-wide caches and of each session's own data;
+# the least recently used entries are evicted first
+MAX_CACHE_BYTES = int(os.environ.get('PF_CACHE_MAX_BYTES', 1024 * 2 ** 20))
+MAX_SESSION_BYTES = int(os.environ.get('PF_SESSION_MAX_BYTES', 64 * 2 ** 20))
+
+# Indicator name -> function(data, **params); results are cached per price frame
+INDICATORS = {
+    'MA': indicators.moving_average,
+    'RSI': indicators.calculate_rsi,
+    'Bollinger': indicators.bollinger_bands,
+    'MACD': indicators.calculate_macd,
+    'Stochastic': indicators.calculate_stochastic,
+    'MFI': indicators.calculate_mfi,
+    'SMA': indicators.sma,
+    'Signals': indicators.signals,
+    'Trends': indicators.trends,
+}
+
+# Calendar days of prices loaded before the start of a range (about 280
+# trading days), so rolling windows and EMAs are warmed up at its first bar
+WARMUP_DAYS = 400
+
+# Indicator calls that precompute.py writes out: (name, params) -> columns.
+# Values come from the full precomputed history, the same history
+# indicator() computes other calls of a precomputed ticker on.
+P = precompute.PARAMS
+PRECOMPUTED_INDICATORS = {
+    ('MA', (('window', P['short_window']),)): 'Short_MA',
+    ('MA', (('window', P['long_window']),)): 'Long_MA',
+    ('RSI', (('window', P['rsi_window']),)): 'RSI',
+    ('Bollinger', (('num_std', P['bb_std']), ('window', P['bb_window']))): ['MA', 'BB_upper', 'BB_lower'],
+    ('MACD', ()): ('MACD', 'Signal', 'Histogram'),
+    ('Stochastic', ()): ('Stochastic_K', 'Stochastic_D'),
+    ('MFI', ()): 'MFI',
+    ('SMA', (('window', P['sma_window']),)): 'SMA_200',
+}
+
+_prices = OrderedDict()
+_indicators = OrderedDict()
+_lock = threading.RLock()
+
+# (cache id, key) -> [bytes, last use tick, hits] for both caches
+_usage = {}
+_ticks = itertools.count()
+_cache_bytes = 0
+
+
+def _arrays(obj):
+    """Yield the NumPy arrays behind a frame, series or a container of them."""
+    if isinstance(obj, pd.DataFrame):
+        for column in obj.columns.unique():
+            yield from _arrays(obj[column])
+        yield from _arrays(obj.index)
+    elif isinstance(obj, (pd.Series, pd.Index)):
+        values = obj.to_numpy() if not isinstance(obj, pd.Index) else np.asarray(obj)
+        yield values
+        if isinstance(obj, pd.Series):
+            yield np.asarray(obj.index)
+    elif isinstance(obj, dict):
+        for value in obj.values():
+            yield from _arrays(value)
+    elif isinstance(obj, (tuple, list)):
+        for value in obj:
+            yield from _arrays(value)
+
+
+def _buffers(obj):
+    """Return {(address, bytes)} of the distinct memory blocks behind obj."""
+    return {(a.__array_interface__['data'][0], a.nbytes) for a in _arrays(obj) if a.nbytes}
+
+
+def nbytes(obj):
+    """Bytes of memory behind obj, counting blocks shared between its parts once."""
+    return sum(size for _, size in _buffers(obj))
+
+
+def _read_only(obj):
+    """Return obj with its values copied into read-only arrays so it can be shared."""
+    def freeze(values):
+        values = np.array(values, copy=True)
+        values.flags.writeable = False
+        return values
+
+    if isinstance(obj, pd.DataFrame):
+        if obj.columns.has_duplicates:
+            return obj
+        return pd.DataFrame({c: freeze(obj[c].to_numpy()) for c in obj.columns}, index=obj.index, copy=False)
+    if isinstance(obj, pd.Series):
+        return pd.Series(freeze(obj.to_numpy()), index=obj.index, name=obj.name, copy=False)
+    if isinstance(obj, tuple):
+        return tuple(_read_only(value) for value in obj)
+    if isinstance(obj, dict):
+        return {name: _read_only(value) for name, value in obj.items()}
+    return obj
+
+
+def _caches():
+    return {'prices': _prices, 'indicators': _indicators}
+
+
+def _touch(cache_id, key):
+    usage = _usage.get((cache_id, key))
+    if usage is not None:
+        usage[1] = next(_ticks)
+        usage[2] += 1
+
+
+def _forget(cache_id, key):
+    global _cache_bytes
+    _caches()[cache_id].pop(key, None)
+    usage = _usage.pop((cache_id, key), None)
+    if usage is not None:
+        _cache_bytes -= usage[0]
+
+
+def _remember(cache_id, key, value, limit):
+    """Store value and evict least recently used entries over the count or byte limits."""
+    global _cache_bytes
+    cache = _caches()[cache_id]
+    _forget(cache_id, key)
+    cache[key] = value
+    size = nbytes(value)
+    _usage[(cache_id, key)] = [size, next(_ticks), 0]
+    _cache_bytes += size
+    while len(cache) > limit:
+        _forget(cache_id, next(iter(cache)))
+    # Each OrderedDict is in use order, so the least used entry overall is
+    # whichever of the two heads was used longest ago
+    while _cache_bytes > MAX_CACHE_BYTES and len(_prices) + len(_indicators) > 1:
+        heads = [(_usage[(cid, next(iter(c)))][1], cid) for cid, c in _caches().items() if c]
+        _, oldest = min(heads)
+        _forget(oldest, next(iter(_caches()[oldest])))
+
+
+def _normalise_date(value):
+    return None if value is None else str(value)
+
+
+def price_key(ticker, start=None, end=None, interval='1d'):
+    key = (ticker.upper(), _normalise_date(start), _normalise_date(end))
+    return key if interval == '1d' else key + (interval,)
+
+
+def yahoo_download(ticker, start=None, end=None, interval='1d'):
+    """Fetch OHLCV data for one ticker from Yahoo Finance."""
+    # yfinance is slow to import, so only load it once data is actually needed
+    import yfinance as yf
+
+    return yf.download(ticker, start=start, end=end, interval=interval)
+
+
+# Data provider name -> function(ticker, start, end, interval) returning OHLCV.
+# Other providers are loaded from PROVIDER_MODULES on first use: the module
+# either registers itself (replay.py) or has a download() function.
+PROVIDERS = {'yahoo': yahoo_download}
+PROVIDER_MODULES = {'replay': 'replay', 'synthetic': 'benchmarks.synthetic'}
+PROVIDER = os.environ.get('PF_DATA_PROVIDER', 'yahoo')
+
+# Provider name -> function returning its current market time, for providers
+# whose clock is not the wall clock
+CLOCKS = {}
+
+
+def register_provider(name, func, clock=None):
+    PROVIDERS[name] = func
+    if clock is not None:
+        CLOCKS[name] = clock
+
+
+def _provider():
+    func = PROVIDERS.get(PROVIDER)
+    if func is None:
+        if PROVIDER not in PROVIDER_MODULES:
+            raise ValueError(f'Unknown data provider {PROVIDER!r}')
+        module = importlib.import_module(PROVIDER_MODULES[PROVIDER])
+        func = PROVIDERS.setdefault(PROVIDER, getattr(module, 'download', None))
+    return func
+
+
+def now():
+    """Return the current market time as a naive UTC Timestamp: the wall clock or the provider's."""
+    _provider()
+    clock = CLOCKS.get(PROVIDER)
+    return clock() if clock is not None else pd.Timestamp.now('UTC').tz_localize(None)
+
+
+def set_provider(name):
+    """Switch every later download to provider name and drop data cached from the previous one."""
+    global PROVIDER
+    PROVIDER = name
+    clear()
+
+
+@timing.timed('download')
+def download(ticker, start=None, end=None, interval='1d'):
+    """Fetch OHLCV data for one ticker from the current provider (Yahoo Finance by default)."""
+    return _provider()(ticker, start=start, end=end, interval=interval)
+
+
+def precomputed(ticker, start=None, end=None):
+    """Return the precomputed table for ticker if it covers start-end, else None."""
+    # The tables are a snapshot of Yahoo Finance, so other providers skip them
+    if start is None or PROVIDER != 'yahoo' or not precompute.covers(ticker, start, end):
+        return None
+    try:
+        with timing.stage('read_precomputed'):
+            return precompute.read_precomputed(ticker, start, end)
+    except (ImportError, OSError, ValueError):
+        return None
+
+
+def enable_copy_on_write():
+    """
+    Turn on pandas copy-on-write for the process; the app entry points call it.
+
+    Shared frames are handed out as shallow copies over read-only arrays;
+    with copy-on-write a caller changing values gets its own copy instead of
+    an error. It is a process-wide pandas option, so library code and
+    scripts that import market_data keep pandas' defaults.
+    """
+    pd.set_option('mode.copy_on_write', True)
+
+
+def load_prices(ticker, start=None, end=None, interval='1d'):
+    """
+    Return OHLCV data for ticker, shared by every page and session in the process.
+
+    Reads the precomputed Parquet table when precompute.py has covered the
+    range and falls back to Yahoo Finance otherwise. The cached frame holds
+    read-only arrays; callers get a shallow copy sharing them, so adding
+    columns (or, with enable_copy_on_write, changing values) stays private to
+    the caller.
+
+    Intraday intervals (ring_buffer.INTRADAY_INTERVALS) come from the
+    ticker's ring buffer instead, topped up with any newer bars first.
+    """
+    if interval in ring_buffer.INTRADAY_INTERVALS:
+        series = ring_buffer.get_series(ticker, interval)
+        series.refresh(download, now())
+        return series.load(start, end)
+    return _shared_prices(ticker, start, end, interval).copy(deep=False)
+
+
+def _shared_prices(ticker, start=None, end=None, interval='1d'):
+    key = price_key(ticker, start, end, interval)
+    with _lock:
+        data = _prices.get(key)
+        if data is not None:
+            _prices.move_to_end(key)
+            _touch('prices', key)
+            return data
+    table = precomputed(ticker, start, end) if interval == '1d' else None
+    if table is not None:
+        table = _read_only(compact.compact(table) if compact.COMPACT else table)
+        data = table[[c for c in precompute.OHLCV_COLUMNS if c in table.columns]]
+        with _lock:
+            _remember('indicators', (key, 'precomputed'), table, MAX_INDICATOR_ENTRIES)
+    else:
+        data = download(ticker, start=start, end=end, interval=interval)
+        data = _read_only(compact.compact(data) if compact.COMPACT else data)
+    with _lock:
+        _remember('prices', key, data, MAX_PRICE_ENTRIES)
+    return data
+
+
+def history(ticker, start=None, end=None):
+    """
+    Return the daily prices that indicators of ticker between start and end are computed on.
+
+    A precomputed ticker uses its whole precomputed history, which the
+    precomputed columns were computed on; other tickers load WARMUP_DAYS
+    before start.
+    """
+    if start is None:
+        return _shared_prices(ticker, start, end)
+    if PROVIDER == 'yahoo' and precompute.covers(ticker, start, end):
+        first = precompute.covered_start(ticker)
+    else:
+        first = (pd.Timestamp(start) - pd.Timedelta(days=WARMUP_DAYS)).strftime('%Y-%m-%d')
+    return _shared_prices(ticker, first, end)
+
+
+def _clip(result, start, min_days=50):
+    # The part of an indicator result from start on; Trends periods are cut at
+    # start and, as in indicators.trend_periods, kept only if still longer than min_days
+    if isinstance(result, (pd.Series, pd.DataFrame)):
+        return result[result.index >= start]
+    if isinstance(result, tuple):
+        return tuple(_clip(part, start, min_days) for part in result)
+    if isinstance(result, dict):
+        return {k: _clip(v, start, min_days) if isinstance(v, (pd.Series, pd.DataFrame)) else
+                [[max(s, start), e] for s, e in v if (e - max(s, start)).days > min_days] for k, v in result.items()}
+    return result
+
+
+def indicator(ticker, start, end, name, interval='1d', **params):
+    """
+    Return indicator name of ticker between start and end.
+
+    Daily indicators are computed on the ticker's history() and cut to the
+    range, so they match the precomputed columns whether or not those are
+    cached. The result is shared by every session and is read-only. At intraday
+    intervals indicators with a streaming version in incremental.py are
+    updated bar by bar in the ticker's ring buffer rather than recomputed.
+
+    :param name: Key of INDICATORS.
+    :param interval: Bar interval of the prices, as for load_prices.
+    :param params: Keyword arguments passed to the indicator function.
+    """
+    if interval in ring_buffer.INTRADAY_INTERVALS:
+        series = ring_buffer.get_series(ticker, interval)
+        with timing.stage(f'indicator:{name}'):
+            if name in incremental.INCREMENTAL:
+                return series.indicator(name, start, end, **params)
+            return INDICATORS[name](series.load(start, end), **params)
+    key = (price_key(ticker, start, end), name, tuple(sorted(params.items())))
+    with _lock:
+        result = _indicators.get(key)
+        if result is not None:
+            _indicators.move_to_end(key)
+            _touch('indicators', key)
+            return result
+    _shared_prices(ticker, start, end)
+    columns = PRECOMPUTED_INDICATORS.get((name, key[2]))
+    with _lock:
+        table = _indicators.get((key[0], 'precomputed'))
+    if columns is not None and table is not None:
+        result = tuple(table[c] for c in columns) if isinstance(columns, tuple) else table[columns]
+    else:
+        data = history(ticker, start, end)
+        with timing.stage(f'indicator:{name}'):
+            # Long histories are computed in the compute pool, off the script thread
+            result = compute_pool.run(INDICATORS[name], data, key=('indicator',) + key, name=f'indicator:{name}',
+                                      label=f'Computing {name}', **params)
+            if start is not None:
+                result = _clip(result, pd.Timestamp(start), params.get('min_days', 50))
+            result = _read_only(compact.compact(result) if compact.COMPACT else result)
+    with _lock:
+        _remember('indicators', key, result, MAX_INDICATOR_ENTRIES)
+    return result
+
+
+def price_matrix(tickers, start=None, end=None, field='Adj Close', workers=16):
+    """
+    Return one field of many tickers as a dates x tickers DataFrame on the union of their dates.
+
+    Tickers are loaded concurrently through the shared price cache
+    (load_prices); tickers that fail or have no data are left out, and dates
+    a ticker has no bar for are NaN.
+
+    :param field: OHLCV column; Close is used for data without it.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+
+    def column(ticker):
+        try:
+            data = _shared_prices(ticker, start, end)
+        except Exception:
+            return None
+        if data is None or data.empty:
+            return None
+        values = data[field if field in data.columns else 'Close']
+        return pd.DatetimeIndex(data.index).as_unit('ns').asi8, values.to_numpy(dtype=float)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(tickers)))) as pool:
+        columns = dict(zip(tickers, pool.map(column, tickers)))
+    columns = {t: c for t, c in columns.items() if c is not None}
+    dates = np.unique(np.concatenate([d for d, _ in columns.values()])) if columns else np.empty(0, np.int64)
+    matrix = np.full((len(dates), len(columns)), np.nan)
+    for i, (ticker_dates, values) in enumerate(columns.values()):
+        matrix[np.searchsorted(dates, ticker_dates), i] = values
+    return pd.DataFrame(matrix, index=pd.DatetimeIndex(dates.view('M8[ns]'), name='Date'),
+                        columns=pd.Index(list(columns), name='Ticker'))
+
+
+def rolling_beta(tickers, benchmark, start, end, window=60, interval='1d'):
+    """
+    Return rolling regressions of tickers' returns on benchmark's as DataFrames of Beta, Alpha and R2.
+
+    Every ticker is regressed in one batch against the same benchmark series
+    (indicators.rolling_regression). Prices are aligned on the union of the
+    dates and carried forward, so a benchmark without a bar on a ticker's
+    date (e.g. SPY on a crypto weekend) counts as unchanged. Daily results
+    are shared per ticker like indicator().
+
+    :param tickers: One ticker, or a list of them.
+    :return: One DataFrame for a single ticker, else {ticker: DataFrame},
+        each on the ticker's own dates.
+    """
+    single = isinstance(tickers, str)
+    tickers = [tickers] if single else list(dict.fromkeys(tickers))
+    params = (('benchmark', benchmark), ('window', window))
+    keys = {ticker: (price_key(ticker, start, end, interval), 'Beta', params) for ticker in tickers}
+    results = {}
+    if interval == '1d':
+        with _lock:
+            for ticker, key in keys.items():
+                result = _indicators.get(key)
+                if result is not None:
+                    _indicators.move_to_end(key)
+                    _touch('indicators', key)
+                    results[ticker] = result
+    missing = [ticker for ticker in tickers if ticker not in results]
+    if missing:
+        def close(ticker):
+            data = load_prices(ticker, start, end, interval=interval)
+            return data['Adj Close' if 'Adj Close' in data.columns else 'Close']
+
+        with timing.stage('indicator:Beta'):
+            frames = {ticker: close(ticker) for ticker in missing}
+            prices = pd.DataFrame(frames).sort_index()
+            # Benchmark returns over the same intervals as the tickers' returns
+            market = close(benchmark)
+            market = market.reindex(prices.index.union(market.index)).ffill().reindex(prices.index)
+            returns = prices.ffill().pct_change(fill_method=None).where(prices.notna())
+            market = market.pct_change(fill_method=None)
+            beta, alpha, r_squared = indicators.rolling_regression(returns, market, window)
+        for ticker in missing:
+            index = frames[ticker].index
+            result = pd.DataFrame({'Beta': beta[ticker].reindex(index), 'Alpha': alpha[ticker].reindex(index),
+                                   'R2': r_squared[ticker].reindex(index)})
+            results[ticker] = result = _read_only(result)
+            if interval == '1d':
+                with _lock:
+                    _remember('indicators', keys[ticker], result, MAX_INDICATOR_ENTRIES)
+    return results[tickers[0]] if single else results
+
+
+class SessionStore(OrderedDict):
+    """
+    One session's own data derived from the shared frames, e.g. a working
+    frame with indicator columns. Least recently stored entries are dropped
+    once the store holds more than MAX_SESSION_BYTES.
+
+    Sizes are measured on put and trim; call trim after adding columns to
+    a stored frame so they count too.
+    """
+
+    def put(self, key, value):
+        self.pop(key, None)
+        self[key] = value
+        self.trim()
+        return value
+
+    def trim(self):
+        """Drop the least recently stored entries until the store fits MAX_SESSION_BYTES again."""
+        while len(self) > 1 and nbytes(dict(self)) > MAX_SESSION_BYTES:
+            self.popitem(last=False)
+
+
+# Session id -> SessionStore; entries disappear with the session's state
+_sessions = weakref.WeakValueDictionary()
+
+
+def register_session(session_id, store):
+    _sessions[session_id] = store
+
+
+def memory_report():
+    """
+    Return (per ticker, per session) DataFrames of memory use.
+
+    Cached bytes are the process-wide price and indicator entries of each
+    ticker. A session's own bytes exclude memory it shares with the caches.
+    """
+    with _lock:
+        entries = [(cache_id, key, list(usage)) for (cache_id, key), usage in _usage.items()]
+        cached = set()
+        for cache in _caches().values():
+            for value in cache.values():
+                cached |= _buffers(value)
+
+    tickers = {}
+    for cache_id, key, (size, _, hits) in entries:
+        ticker = key[0] if cache_id == 'prices' else key[0][0]
+        row = tickers.setdefault(ticker, {'Ticker': ticker, 'Price bytes': 0, 'Indicator bytes': 0,
+                                          'Entries': 0, 'Hits': 0})
+        row['Price bytes' if cache_id == 'prices' else 'Indicator bytes'] += size
+        row['Entries'] += 1
+        row['Hits'] += hits
+    by_ticker = pd.DataFrame(list(tickers.values()), columns=['Ticker', 'Price bytes', 'Indicator bytes', 'Entries', 'Hits'])
+    by_ticker['Total bytes'] = by_ticker['Price bytes'] + by_ticker['Indicator bytes']
+
+    sessions = []
+    for session_id, store in list(_sessions.items()):
+        buffers = _buffers(dict(store))
+        sessions.append({'Session': session_id, 'Entries': len(store),
+                         'Own bytes': sum(b[1] for b in buffers if b not in cached),
+                         'Shared bytes': sum(b[1] for b in buffers if b in cached)})
+    by_session = pd.DataFrame(sessions, columns=['Session', 'Entries', 'Own bytes', 'Shared bytes'])
+    return by_ticker.sort_values('Total bytes', ascending=False), by_session
+
+
+def invalidate(tickers):
+    """Drop the cached prices and indicators of tickers, e.g. once they have new bars."""
+    tickers = {ticker.upper() for ticker in tickers}
+    with _lock:
+        for cache_id, key in list(_usage):
+            if (key[0] if cache_id == 'prices' else key[0][0]) in tickers:
+                _forget(cache_id, key)
+
+
+def clear():
+    global _cache_bytes
+    with _lock:
+        _prices.clear()
+        _indicators.clear()
+        _usage.clear()
+        _cache_bytes = 0
+    ring_buffer.clear()
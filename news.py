@@ -0,0 +1,128 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# URL format for Yahoo Finance RSS feed; point PF_NEWS_FEED_URL at a local
+# HTTP server to exercise the fetcher without touching Yahoo.
+NEWS_FEED_URL = os.environ.get('PF_NEWS_FEED_URL', 'https://finance.yahoo.com/rss/headline?s={ticker}')
+
+# Feeds fetched more recently than this are served from memory without a request
+MIN_REFRESH_SECONDS = 60
+
+# Bounds on the in-memory cache
+MAX_FEEDS = 256
+MAX_ENTRIES_PER_FEED = 50
+# Fetches queued or running at once; beyond this callers get the cached entries
+MAX_PENDING = 64
+
+_feeds = OrderedDict()
+_pending = {}
+_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='news')
+
+
+def feed_url(ticker):
+    return NEWS_FEED_URL.format(ticker=ticker)
+
+
+def _entry_to_dict(entry):
+    return {
+        'id': entry.get('id') or entry.get('link'),
+        'title': entry.get('title', ''),
+        'link': entry.get('link', ''),
+        'published': entry.get('published', ''),
+        'summary': entry.get('summary', ''),
+    }
+
+
+def _state(ticker):
+    with _lock:
+        state = _feeds.get(ticker)
+        if state is None:
+            state = {'etag': None, 'modified': None, 'entries': [], 'fetched': 0.0}
+            _feeds[ticker] = state
+        _feeds.move_to_end(ticker)
+        while len(_feeds) > MAX_FEEDS:
+            _feeds.popitem(last=False)
+        return state
+
+
+# Function to fetch and parse RSS feed with a conditional GET
+def _fetch(ticker):
+    state = _state(ticker)
+    if time.time() - state['fetched'] < MIN_REFRESH_SECONDS:
+        return state['entries']
+
+    import feedparser
+
+    try:
+        feed = feedparser.parse(feed_url(ticker), etag=state['etag'], modified=state['modified'])
+    except Exception:
+        # A failed fetch counts as a refresh, so callers fall back to the cache
+        state['fetched'] = time.time()
+        return state['entries']
+    status = feed.get('status')
+    if status != 304 and (feed.entries or not feed.get('bozo')):
+        state['entries'] = [_entry_to_dict(e) for e in feed.entries[:MAX_ENTRIES_PER_FEED]]
+    if status is not None and status < 400:
+        state['etag'] = feed.get('etag', state['etag'])
+        state['modified'] = feed.get('modified', state['modified'])
+    state['fetched'] = time.time()
+    return state['entries']
+
+
+def _done(ticker, future):
+    with _lock:
+        if _pending.get(ticker) is future:
+            del _pending[ticker]
+
+
+def fetch_news_async(ticker):
+    """
+    Start (or join) a background fetch of the RSS feed for ticker.
+
+    A feed fetched recently, or one that would exceed MAX_PENDING fetches,
+    gets an already finished future with the cached entries.
+
+    :return: Future resolving to the list of entry dicts.
+    """
+    with _lock:
+        future = _pending.get(ticker)
+        if future is not None:
+            return future
+        if len(_pending) < MAX_PENDING:
+            state = _feeds.get(ticker)
+            if state is None or time.time() - state['fetched'] >= MIN_REFRESH_SECONDS:
+                future = _pending[ticker] = _executor.submit(_fetch, ticker)
+        if future is None:
+            future = Future()
+            state = _feeds.get(ticker)
+            if state is not None:
+                _feeds.move_to_end(ticker)
+            future.set_result(list(state['entries']) if state else [])
+            return future
+    future.add_done_callback(lambda f: _done(ticker, f))
+    return future
+
+
+def cached_news(ticker):
+    """Return the last parsed entries for ticker without doing any I/O."""
+    with _lock:
+        state = _feeds.get(ticker)
+        return list(state['entries']) if state else []
+
+
+def get_news(ticker, timeout=None):
+    """
+    Return entries for ticker, waiting at most timeout seconds for a refresh.
+
+    If the refresh does not finish in time (or fails) the cached entries are
+    returned instead.
+    """
+    future = fetch_news_async(ticker)
+    try:
+        return future.result(timeout=timeout)
+    except Exception:
+        return cached_news(ticker)
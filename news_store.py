@@ -0,0 +1,263 @@
+import glob
+import gzip
+import heapq
+import json
+import os
+import re
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+
+import news
+from cache_store import CACHE_DIR
+
+NEWS_DIR = os.environ.get('PF_NEWS_DIR', os.path.join(CACHE_DIR, 'news'))
+
+# Once there are more than MAX_SEGMENTS segments on disk, the MERGE_FACTOR
+# smallest are merged into one, so big segments are rarely rewritten
+MAX_SEGMENTS = 8
+MERGE_FACTOR = 4
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9'&.-]*[a-z0-9]|[a-z0-9]")
+_TAG_RE = re.compile(r'<[^>]+>')
+_STOPWORDS = frozenset('a an and are as at be by for from has in is it its of on or that the to was were will with'.split())
+
+
+def tokenize(text):
+    """Lower-case word tokens of text with HTML tags and stop words removed."""
+    text = _TAG_RE.sub(' ', text or '').lower()
+    return [t for t in _TOKEN_RE.findall(text) if t not in _STOPWORDS]
+
+
+def published_time(published):
+    """Seconds since the epoch of an RSS pubDate string, or 0.0 if it does not parse."""
+    try:
+        return parsedate_to_datetime(published).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return 0.0
+
+
+class NewsStore:
+    """
+    Deduplicated store of RSS entries with an inverted index over titles and summaries.
+
+    Documents are appended to gzip'd JSON-lines segments; once there are
+    more than MAX_SEGMENTS of them the smallest are merged. The index is
+    rebuilt from the segments on first use and kept in memory as arrays of
+    document numbers, with the published time of every document for
+    ordering results.
+    """
+
+    def __init__(self, path=NEWS_DIR):
+        self.path = path
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._docs = []
+        self._times = array('d')
+        self._ids = {}
+        self._terms = {}
+        self._tickers = {}
+
+    # Loading and indexing
+
+    def _segments(self):
+        return sorted(glob.glob(os.path.join(self.path, 'segment-*.jsonl.gz')))
+
+    def _load(self):
+        if self._loaded:
+            return
+        for segment in self._segments():
+            with gzip.open(segment, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    record = json.loads(line)
+                    self._apply(record)
+        self._loaded = True
+
+    def _apply(self, record):
+        key = record['id']
+        doc_number = self._ids.get(key)
+        if doc_number is None:
+            doc_number = len(self._docs)
+            self._ids[key] = doc_number
+            self._docs.append(record)
+            self._times.append(published_time(record.get('published')))
+            for term in set(tokenize(record.get('title')) + tokenize(record.get('summary'))):
+                self._terms.setdefault(term, array('I')).append(doc_number)
+            tickers = record.get('tickers', [])
+        else:
+            doc = self._docs[doc_number]
+            tickers = [t for t in record.get('tickers', []) if t not in doc['tickers']]
+            doc['tickers'] = doc['tickers'] + tickers
+        for ticker in tickers:
+            self._tickers.setdefault(ticker, array('I')).append(doc_number)
+
+    # Ingestion
+
+    def add(self, ticker, entries):
+        """
+        Ingest RSS entries for ticker, skipping links/GUIDs that are already stored.
+
+        :return: Number of new documents.
+        """
+        ticker = ticker.upper()
+        with self._lock:
+            self._load()
+            records = []
+            added = 0
+            for entry in entries:
+                key = entry.get('id') or entry.get('link')
+                if not key:
+                    continue
+                doc_number = self._ids.get(key)
+                if doc_number is not None and ticker in self._docs[doc_number]['tickers']:
+                    continue
+                if doc_number is None:
+                    added += 1
+                record = {
+                    'id': key,
+                    'tickers': [ticker],
+                    'title': entry.get('title', ''),
+                    'summary': _TAG_RE.sub(' ', entry.get('summary', '')).strip(),
+                    'link': entry.get('link', ''),
+                    'published': entry.get('published', ''),
+                }
+                self._apply(record)
+                records.append(record)
+            if records:
+                self._write_segment(records)
+            return added
+
+    def _write_segment(self, records):
+        os.makedirs(self.path, exist_ok=True)
+        segments = self._segments()
+        number = int(os.path.basename(segments[-1])[8:14]) + 1 if segments else 0
+        path = os.path.join(self.path, f'segment-{number:06d}.jsonl.gz')
+        tmp_path = f'{path}.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, separators=(',', ':')))
+                f.write('\n')
+        os.replace(tmp_path, path)
+        segments.append(path)
+        if len(segments) > MAX_SEGMENTS:
+            self.merge(sorted(segments, key=os.path.getsize)[:MERGE_FACTOR])
+
+    def merge(self, segments=None):
+        """
+        Rewrite segments (by default all of them) as one segment of merged documents.
+
+        Each document keeps the union of its tickers across the merged segments.
+        """
+        with self._lock:
+            segments = self._segments() if segments is None else sorted(segments)
+            if len(segments) <= 1:
+                return
+            merged = {}
+            for segment in segments:
+                with gzip.open(segment, 'rt', encoding='utf-8') as f:
+                    for line in f:
+                        record = json.loads(line)
+                        doc = merged.setdefault(record['id'], record)
+                        if doc is not record:
+                            doc['tickers'] = doc['tickers'] + [t for t in record['tickers'] if t not in doc['tickers']]
+            number = int(os.path.basename(self._segments()[-1])[8:14]) + 1
+            path = os.path.join(self.path, f'segment-{number:06d}.jsonl.gz')
+            tmp_path = f'{path}.tmp'
+            with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                for doc in merged.values():
+                    f.write(json.dumps(doc, separators=(',', ':')))
+                    f.write('\n')
+            os.replace(tmp_path, path)
+            # Loading deduplicates by id, so a crash before this point is harmless
+            for segment in segments:
+                os.remove(segment)
+
+    # Queries
+
+    def search(self, query='', tickers=None, limit=50):
+        """
+        Return documents matching every term in query, newest published first.
+
+        :param query: Free-text keywords; empty matches everything, while a
+            query of only stop words matches nothing.
+        :param tickers: Optional iterable of tickers to restrict to.
+        :param limit: Maximum number of documents returned.
+        """
+        with self._lock:
+            self._load()
+            terms = list(dict.fromkeys(tokenize(query)))
+            if not terms and query.strip():
+                return []
+            postings = [self._terms.get(term, ()) for term in terms]
+            matches = None
+            if postings:
+                postings.sort(key=len)
+                matches = set(postings[0])
+                for posting in postings[1:]:
+                    if not matches:
+                        break
+                    matches.intersection_update(posting)
+            if tickers:
+                wanted = {ticker.upper() for ticker in tickers}
+                if matches is None:
+                    matches = set()
+                    for ticker in wanted:
+                        matches.update(self._tickers.get(ticker, ()))
+                else:
+                    # Term postings are usually far shorter than ticker postings
+                    matches = {n for n in matches if not wanted.isdisjoint(self._docs[n]['tickers'])}
+            if matches is None:
+                matches = range(len(self._docs))
+            # Entries without a parseable date fall back to ingestion order
+            newest = heapq.nlargest(limit, matches, key=lambda n: (self._times[n], n))
+            return [self._docs[n] for n in newest]
+
+    def __len__(self):
+        with self._lock:
+            self._load()
+            return len(self._docs)
+
+
+_store = None
+_store_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='news-ingest')
+
+
+def get_store():
+    """Return the process-wide NewsStore."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = NewsStore()
+        return _store
+
+
+def ingest_watchlist(tickers, timeout=None):
+    """
+    Fetch the feeds of every ticker in the watchlist and add new entries to the store.
+
+    :return: Number of new documents.
+    """
+    store = get_store()
+    futures = {ticker: news.fetch_news_async(ticker) for ticker in tickers}
+    added = 0
+    for ticker, future in futures.items():
+        try:
+            entries = future.result(timeout=timeout)
+        except Exception:
+            continue
+        added += store.add(ticker, entries)
+    return added
+
+
+_ingesting = None
+
+
+def ingest_watchlist_async(tickers):
+    """Run ingest_watchlist on the background ingestion thread, unless an ingestion is still running."""
+    global _ingesting
+    with _store_lock:
+        if _ingesting is None or _ingesting.done():
+            _ingesting = _executor.submit(ingest_watchlist, list(tickers))
+        return _ingesting
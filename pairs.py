@@ -0,0 +1,323 @@
+"""
+Pairs-trading scan: Engle-Granger cointegration of every ticker pair in a universe.
+
+    python pairs.py --universe tickers.txt --start 2019-01-01 --workers 8
+    python pairs.py --synthetic 500 --min-correlation -1 --workers 8    # time all 124,750 pairs
+
+Every pair of tickers is first pre-filtered on the correlation of daily
+returns (correlation.pairwise), which drops most of the O(N^2) pairs. For
+each remaining pair, log prices of one ticker are regressed on the other and
+an augmented Dickey-Fuller test is run on the residual spread. The direction
+is fixed before testing: the ticker whose log prices vary more is the
+dependent one. Keeping the better statistic of both directions would test
+twice against single-test critical values and reject too often. The regressions of a batch
+of pairs are computed together with masked sums and batched normal
+equations, so missing bars are handled per pair.
+
+Candidate pairs are split into chunks that run as compute pool jobs. The log
+price matrix is placed in shared memory once and every worker maps it
+instead of receiving a copy. The result is a table ranked by the ADF
+statistic, with hedge ratio, half-life of mean reversion and the z-score of
+the latest spread.
+"""
+import argparse
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+import compute_pool
+import correlation
+import market_data
+
+MIN_CORRELATION = 0.6
+ADF_LAGS = 1
+SIGNIFICANCE = 0.05
+MIN_PERIODS = 250
+
+# Pairs per compute pool job and per vectorized batch inside a job
+CHUNK_PAIRS = 4096
+BATCH_PAIRS = 256
+
+# MacKinnon (2010) response surface for the Engle-Granger test with two
+# variables and a constant: critical value = b0 + b1 / T + b2 / T^2
+CRITICAL_VALUES = {
+    0.01: (-3.89644, -10.9519, -33.527),
+    0.05: (-3.33613, -6.1101, -6.823),
+    0.10: (-3.04445, -4.2412, -2.720),
+}
+
+MAX_RESULTS = 8
+
+COLUMNS = ['Ticker 1', 'Ticker 2', 'Correlation', 'Hedge ratio', 'Intercept', 'ADF stat', 'Critical value',
+           'Cointegrated', 'Half-life', 'Z-score', 'Observations']
+
+
+def critical_value(observations, level=SIGNIFICANCE):
+    """Engle-Granger critical value of the ADF statistic for a sample of observations."""
+    b0, b1, b2 = CRITICAL_VALUES[level]
+    observations = np.asarray(observations, dtype=float)
+    return b0 + b1 / observations + b2 / observations ** 2
+
+
+def engle_granger(y, x, lags=ADF_LAGS):
+    """
+    Regress each column of y on the same column of x and test the residual spread for a unit root.
+
+    :param y: Log prices, dates x pairs, NaN where missing.
+    :param x: Log prices of the other leg, same shape.
+    :param lags: Lagged spread differences in the ADF regression.
+    :return: Dict of arrays with one value per pair: beta, alpha, stat (ADF
+        t-statistic), half_life (bars), zscore (latest spread) and n.
+    """
+    valid = ~(np.isnan(y) | np.isnan(x))
+    n = valid.sum(axis=0)
+    count = np.maximum(n, 1)
+    y0, x0 = np.where(valid, y, 0.0), np.where(valid, x, 0.0)
+    mean_x, mean_y = x0.sum(axis=0) / count, y0.sum(axis=0) / count
+    dx, dy = np.where(valid, x - mean_x, 0.0), np.where(valid, y - mean_y, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        beta = (dx * dy).sum(axis=0) / (dx * dx).sum(axis=0)
+    alpha = mean_y - beta * mean_x
+    spread = np.where(valid, y - alpha - beta * x, np.nan)
+
+    # ADF regression: diff(e)_t = c + gamma * e_(t-1) + sum_k phi_k * diff(e)_(t-k)
+    diff = np.diff(spread, axis=0)
+    target = diff[lags:]
+    regressors = [np.ones_like(target), spread[lags:-1]] + [diff[lags - k:-k] for k in range(1, lags + 1)]
+    design = np.stack(regressors, axis=-1)  # rows x pairs x parameters
+    rows = ~np.isnan(target) & ~np.isnan(design).any(axis=-1)
+    design = np.where(rows[..., None], design, 0.0)
+    target = np.where(rows, target, 0.0)
+    n_rows = rows.sum(axis=0)
+    gram = np.einsum('tbi,tbj->bij', design, design)
+    moment = np.einsum('tbi,tb->bi', design, target)
+    # Pairs with too few rows get an identity system; their statistics are masked below
+    n_parameters = design.shape[-1]
+    singular = n_rows <= n_parameters + 1
+    gram[singular] = np.eye(n_parameters)
+    try:
+        inverse = np.linalg.inv(gram)
+    except np.linalg.LinAlgError:
+        inverse = np.linalg.pinv(gram)
+    coefficients = np.einsum('bij,bj->bi', inverse, moment)
+    residuals = target - np.einsum('tbi,bi->tb', design, coefficients)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma2 = (np.where(rows, residuals, 0.0) ** 2).sum(axis=0) / (n_rows - n_parameters)
+        gamma = coefficients[:, 1]
+        stat = gamma / np.sqrt(sigma2 * inverse[:, 1, 1])
+        half_life = np.where((gamma < 0) & (gamma > -1), -np.log(2) / np.log1p(gamma), np.inf)
+        # Latest spread in standard deviations of the spread over the whole window
+        std = np.sqrt(np.nansum(spread ** 2, axis=0) / np.maximum(n - 2, 1))
+        last = _last_valid(spread)
+        zscore = last / std
+    stat[singular] = np.nan
+    return {'beta': beta, 'alpha': alpha, 'stat': stat, 'half_life': half_life, 'zscore': zscore, 'n': n}
+
+
+def _last_valid(values):
+    # Last non-NaN value of each column
+    valid = ~np.isnan(values)
+    last = len(values) - 1 - np.argmax(valid[::-1], axis=0)
+    result = values[last, np.arange(values.shape[1])]
+    return np.where(valid.any(axis=0), result, np.nan)
+
+
+def _variance(values, valid):
+    # Variance of each column over the rows where valid
+    count = valid.sum(axis=0)
+    mean = np.where(valid, values, 0.0).sum(axis=0) / count
+    return (np.where(valid, values - mean, 0.0) ** 2).sum(axis=0) / count
+
+
+def scan_chunk(source, first, second, lags=ADF_LAGS):
+    """
+    Run engle_granger on the pairs (first[k], second[k]) of a log price matrix.
+
+    :param source: The matrix, or (shared memory name, shape) of one.
+    :return: Dict of arrays as engle_granger, with first regressed on
+        second unless second's log prices have the larger variance over the
+        pair's common bars, plus a swapped flag.
+    """
+    block = None
+    if isinstance(source, tuple):
+        name, shape = source
+        # Spawned workers share the parent's resource tracker, which unlinks
+        # the block if the parent dies; attaching registers nothing new
+        block = shared_memory.SharedMemory(name=name)
+        matrix = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+    else:
+        matrix = source
+    try:
+        parts = []
+        for start in range(0, len(first), BATCH_PAIRS):
+            compute_pool.report(start / max(len(first), 1))
+            i, j = first[start:start + BATCH_PAIRS], second[start:start + BATCH_PAIRS]
+            y, x = matrix[:, i], matrix[:, j]
+            valid = ~(np.isnan(y) | np.isnan(x))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                swapped = _variance(x, valid) > _variance(y, valid)
+            parts.append(engle_granger(np.where(swapped, x, y), np.where(swapped, y, x), lags))
+            parts[-1]['swapped'] = swapped
+        keys = ['beta', 'alpha', 'stat', 'half_life', 'zscore', 'n', 'swapped']
+        return {key: np.concatenate([p[key] for p in parts]) if parts else np.empty(0) for key in keys}
+    finally:
+        del matrix
+        if block is not None:
+            block.close()
+
+
+def candidate_pairs(matrix, min_correlation=MIN_CORRELATION):
+    """Return (first, second, correlation) arrays of the pairs i < j with correlation >= min_correlation."""
+    values = matrix.to_numpy()
+    first, second = np.triu_indices(len(values), k=1)
+    correlations = values[first, second]
+    keep = correlations >= min_correlation
+    return first[keep], second[keep], correlations[keep]
+
+
+def scan_prices(prices, min_correlation=MIN_CORRELATION, lags=ADF_LAGS, level=SIGNIFICANCE,
+                min_periods=MIN_PERIODS, pool=None, chunk=CHUNK_PAIRS):
+    """
+    Scan every pair of columns of a dates x tickers price matrix; return the ranked pairs.
+
+    :param pool: compute_pool.ComputePool to run the chunks in (default: the
+        process-wide pool); chunks run inline without workers.
+    """
+    prices = prices.loc[:, prices.notna().sum() >= min_periods]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logs = np.log(prices.where(prices > 0)).to_numpy(dtype=np.float64)
+    matrix = correlation.pairwise(correlation.returns(prices), min_periods)
+    first, second, correlations = candidate_pairs(matrix, min_correlation)
+
+    pool = pool or compute_pool.get_pool()
+    chunks = [(first[k:k + chunk], second[k:k + chunk]) for k in range(0, len(first), chunk)]
+    # Small scans are not worth shipping to workers
+    inline = pool.runs_inline(scan_chunk, len(first) * len(logs))
+    block = None
+    if not inline and len(chunks):
+        block = shared_memory.SharedMemory(create=True, size=logs.nbytes)
+        np.ndarray(logs.shape, dtype=np.float64, buffer=block.buf)[:] = logs
+        source = (block.name, logs.shape)
+    else:
+        source = logs
+    try:
+        jobs = [pool.submit(scan_chunk, source, i, j, lags, name=f'pairs:{k}', inline=inline,
+                            rows=len(i) * len(logs))
+                for k, (i, j) in enumerate(chunks)]
+        results = []
+        try:
+            for k, job in enumerate(jobs):
+                results.append(compute_pool.wait(job, f'Testing {len(first):,} pairs ({k + 1} of {len(jobs)} chunks)'))
+        except BaseException:
+            # A superseded run drops the chunks still queued as well
+            for job in jobs:
+                pool.release(job, compute_pool.current_owner())
+            raise
+    finally:
+        if block is not None:
+            block.close()
+            block.unlink()
+
+    keys = ['beta', 'alpha', 'stat', 'half_life', 'zscore', 'n', 'swapped']
+    merged = {key: np.concatenate([r[key] for r in results]) if results else np.empty(0) for key in keys}
+    swapped = merged['swapped'].astype(bool)
+    tickers = prices.columns.to_numpy()
+    critical = critical_value(merged['n'], level)
+    table = pd.DataFrame({
+        'Ticker 1': np.where(swapped, tickers[second], tickers[first]),
+        'Ticker 2': np.where(swapped, tickers[first], tickers[second]),
+        'Correlation': correlations,
+        'Hedge ratio': merged['beta'],
+        'Intercept': merged['alpha'],
+        'ADF stat': merged['stat'],
+        'Critical value': critical,
+        'Cointegrated': merged['stat'] < critical,
+        'Half-life': merged['half_life'],
+        'Z-score': merged['zscore'],
+        'Observations': merged['n'].astype(int),
+    }, columns=COLUMNS)
+    table = table.dropna(subset=['ADF stat']).sort_values('ADF stat', kind='stable')
+    return table.reset_index(drop=True)
+
+
+def spread(y, x, beta, alpha):
+    """Return the spread log(y) - alpha - beta * log(x) of two price series."""
+    return np.log(y) - alpha - beta * np.log(x)
+
+
+_results = OrderedDict()
+_lock = threading.Lock()
+
+
+def scan(tickers, start=None, end=None, min_correlation=MIN_CORRELATION, lags=ADF_LAGS, level=SIGNIFICANCE,
+         min_periods=MIN_PERIODS, field='Adj Close'):
+    """Return the cached scan_prices of tickers' prices between start and end."""
+    key = (tuple(t.upper() for t in tickers), None if start is None else str(start), None if end is None else str(end),
+           min_correlation, lags, level, min_periods, field)
+    with _lock:
+        result = _results.get(key)
+        if result is not None:
+            _results.move_to_end(key)
+            return result
+    prices = market_data.price_matrix(tickers, start, end, field)
+    result = scan_prices(prices, min_correlation, lags, level, min_periods)
+    with _lock:
+        _results[key] = result
+        while len(_results) > MAX_RESULTS:
+            _results.popitem(last=False)
+    return result
+
+
+def synthetic_prices(n_tickers, n_bars=1260, seed=0):
+    # Random walks driven by a few common factors, with every tenth ticker
+    # cointegrated with the one before it
+    rng = np.random.default_rng(seed)
+    factors = np.cumsum(rng.normal(0, 0.01, (n_bars, 5)), axis=0)
+    logs = factors @ rng.normal(0, 1, (5, n_tickers)) * 0.5 + np.cumsum(rng.normal(0, 0.012, (n_bars, n_tickers)), axis=0)
+    for i in range(1, n_tickers, 10):
+        noise = np.zeros(n_bars)
+        for t in range(1, n_bars):
+            noise[t] = 0.9 * noise[t - 1] + rng.normal(0, 0.01)
+        logs[:, i] = 0.8 * logs[:, i - 1] + noise
+    index = pd.bdate_range('2019-01-01', periods=n_bars, name='Date')
+    return pd.DataFrame(100 * np.exp(logs), index=index, columns=[f'T{i:04d}' for i in range(n_tickers)])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scan every ticker pair for cointegration.')
+    parser.add_argument('--universe', help='File of tickers (default: dashboard dictionaries and trend.py tickers)')
+    parser.add_argument('--start', default='2019-01-01')
+    parser.add_argument('--end')
+    parser.add_argument('--min-correlation', type=float, default=MIN_CORRELATION)
+    parser.add_argument('--lags', type=int, default=ADF_LAGS)
+    parser.add_argument('--level', type=float, choices=sorted(CRITICAL_VALUES), default=SIGNIFICANCE)
+    parser.add_argument('--workers', type=int, default=compute_pool.WORKERS)
+    parser.add_argument('--synthetic', type=int, metavar='TICKERS', help='Scan synthetic prices instead')
+    parser.add_argument('--top', type=int, default=25)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        prices = synthetic_prices(args.synthetic)
+    else:
+        import precompute
+        from assets import universe
+
+        prices = market_data.price_matrix(precompute.read_universe(args.universe) if args.universe else universe(),
+                                          args.start, args.end)
+    # Workers unpickle scan_chunk by module name, which must not be __main__
+    import pairs
+
+    pool = compute_pool.ComputePool(workers=args.workers, per_owner=max(args.workers, 1))
+    started = time.perf_counter()
+    try:
+        table = pairs.scan_prices(prices, args.min_correlation, args.lags, args.level, pool=pool)
+    finally:
+        pool.shutdown()
+    seconds = time.perf_counter() - started
+    print(table.head(args.top).to_string(float_format=lambda v: f'{v:.3f}'))
+    print(f"{len(table):,} pairs tested of {prices.shape[1] * (prices.shape[1] - 1) // 2:,}, "
+          f"{int(table['Cointegrated'].sum()):,} cointegrated at {args.level:.0%}, in {seconds:.1f}s")
@@ -0,0 +1,233 @@
+"""
+Nightly batch job that precomputes every dashboard indicator to Parquet.
+
+    python precompute.py                      # dashboards + trend.py universe
+    python precompute.py --universe tickers.txt --workers 8
+
+Output is partitioned per ticker (precomputed/ticker=AAPL/data.parquet) and
+a manifest records a hash of each ticker's inputs, so reruns resume where a
+previous run stopped and skip tickers whose data has not changed.
+"""
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import compact
+import indicators
+from assets import universe
+
+PRECOMPUTED_DIR = os.environ.get('PF_PRECOMPUTED_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'precomputed'))
+MANIFEST = '_manifest.json'
+DEFAULT_START = '2019-01-01'
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
+
+# Parameters of the precomputed columns; part of the input hash so changing
+# them forces a full recompute
+PARAMS = {
+    'short_window': 20,
+    'long_window': 100,
+    'rsi_window': 14,
+    'bb_window': 20,
+    'bb_std': 2,
+    'sma_window': 200,
+    'rsi_buy_level': 30,
+    'rsi_sell_level': 70,
+}
+
+
+def partition_path(out_dir, ticker):
+    return os.path.join(out_dir, f'ticker={ticker}', 'data.parquet')
+
+
+def read_universe(path):
+    """Read tickers from a file, one per line or comma separated; # starts a comment."""
+    tickers = []
+    with open(path) as f:
+        for line in f:
+            line = line.split('#', 1)[0]
+            tickers.extend(t.strip().upper() for t in line.split(',') if t.strip())
+    return list(dict.fromkeys(tickers))
+
+
+def input_hash(data):
+    digest = hashlib.sha256(json.dumps(PARAMS, sort_keys=True).encode())
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def compute_indicator_table(data):
+    """Return data with every dashboard indicator added as columns."""
+    table = data.copy()
+    table['Short_MA'] = indicators.moving_average(data, PARAMS['short_window'])
+    table['Long_MA'] = indicators.moving_average(data, PARAMS['long_window'])
+    table['RSI'] = indicators.calculate_rsi(data, PARAMS['rsi_window'])
+    bands = indicators.bollinger_bands(data, PARAMS['bb_window'], PARAMS['bb_std'])
+    table[bands.columns] = bands
+    table['MACD'], table['Signal'], table['Histogram'] = indicators.calculate_macd(data)
+    table['Stochastic_K'], table['Stochastic_D'] = indicators.calculate_stochastic(data)
+    table['MFI'] = indicators.calculate_mfi(data)
+    indicators.generate_signals(table, PARAMS['rsi_buy_level'], PARAMS['rsi_sell_level'])
+
+    # 200-day SMA and its trend: 1 inside an uptrend period, -1 inside a downtrend
+    trends = indicators.trends(data, PARAMS['sma_window'])
+    table['SMA_200'] = trends['SMA']
+    trend = np.zeros(len(table), dtype='int8')
+    for kind, value in (('uptrend', 1), ('downtrend', -1)):
+        for start, end in trends[kind]:
+            trend[(table.index >= start) & (table.index <= end)] = value
+    table['Trend'] = trend
+    return table
+
+
+def process_ticker(ticker, start, end, out_dir, previous_hash=None, force=False):
+    """
+    Download one ticker, and recompute and write its table if the inputs changed.
+
+    :return: Tuple of (ticker, status, input hash) where status is
+        'written', 'unchanged' or 'empty'.
+    """
+    import events
+    import market_data
+
+    data = market_data.download(ticker, start=start, end=end)
+    if data is None or data.empty:
+        return ticker, 'empty', previous_hash
+    data = data[[c for c in OHLCV_COLUMNS if c in data.columns]]
+    digest = input_hash(data)
+    path = partition_path(out_dir, ticker)
+    if not force and digest == previous_hash and os.path.exists(path):
+        return ticker, 'unchanged', digest
+
+    table = compute_indicator_table(data)
+    if compact.COMPACT:
+        table = compact.compact(table)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    table.to_parquet(tmp_path, engine='pyarrow', compression='zstd')
+    os.replace(tmp_path, path)
+    events.write_events(table, ticker, out_dir)
+    return ticker, 'written', digest
+
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def run(tickers, start=DEFAULT_START, end=None, out_dir=PRECOMPUTED_DIR, workers=None, force=False):
+    """
+    Precompute tickers across a process pool, then rebuild the event index.
+
+    The manifest is saved after every finished ticker so an interrupted run
+    can simply be started again.
+
+    :return: Dict of status -> number of tickers.
+    """
+    import events
+
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = load_manifest(out_dir)
+    counts = {'written': 0, 'unchanged': 0, 'empty': 0, 'failed': 0}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(process_ticker, ticker, start, end, out_dir, manifest.get(ticker, {}).get('hash'), force): ticker
+            for ticker in tickers
+        }
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                _, status, digest = future.result()
+            except Exception as e:
+                print(f'{ticker}: failed ({e})')
+                counts['failed'] += 1
+                continue
+            counts[status] += 1
+            print(f'{ticker}: {status}')
+            if status == 'written':
+                manifest[ticker] = {'hash': digest, 'start': start, 'end': end,
+                                    'updated': pd.Timestamp.now(tz='UTC').isoformat()}
+                save_manifest(out_dir, manifest)
+    print(f'Indexed {events.build(out_dir):,} events')
+    return counts
+
+
+_manifest_cache = {}
+
+
+def _manifest_entry(ticker, out_dir):
+    path = os.path.join(out_dir, MANIFEST)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    if _manifest_cache.get(path, (None,))[0] != mtime:
+        _manifest_cache[path] = (mtime, load_manifest(out_dir))
+    return _manifest_cache[path][1].get(ticker.upper())
+
+
+def covered_start(ticker, out_dir=PRECOMPUTED_DIR):
+    """First date of the last precompute run for ticker, or None if it has not been precomputed."""
+    entry = _manifest_entry(ticker, out_dir)
+    return entry['start'] if entry is not None else None
+
+
+def covers(ticker, start, end=None, out_dir=PRECOMPUTED_DIR):
+    """Whether the last precompute run for ticker covers the dates start-end."""
+    entry = _manifest_entry(ticker, out_dir)
+    if entry is None:
+        return False
+    # A run without --end covers everything up to the day it ran
+    covered_end = pd.Timestamp(entry['end']) if entry['end'] else pd.Timestamp(entry['updated'][:10])
+    requested_end = pd.Timestamp(end) if end is not None else pd.Timestamp.now().normalize()
+    return pd.Timestamp(entry['start']) <= pd.Timestamp(start) and requested_end <= covered_end
+
+
+def read_precomputed(ticker, start=None, end=None, columns=None, out_dir=PRECOMPUTED_DIR):
+    """
+    Read a ticker's precomputed table, or None if it has not been precomputed.
+
+    :param start: Optional first date (inclusive).
+    :param end: Optional last date (exclusive, like yf.download).
+    :param columns: Optional list of columns to read.
+    """
+    path = partition_path(out_dir, ticker.upper())
+    if not os.path.exists(path):
+        return None
+    table = pd.read_parquet(path, columns=columns)
+    if start is not None:
+        table = table[table.index >= pd.Timestamp(start)]
+    if end is not None:
+        table = table[table.index < pd.Timestamp(end)]
+    return table
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Precompute dashboard indicators to partitioned Parquet.')
+    parser.add_argument('--universe', help='File of tickers (default: dashboard dictionaries and trend.py tickers)')
+    parser.add_argument('--start', default=DEFAULT_START)
+    parser.add_argument('--end', default=None)
+    parser.add_argument('--out', default=PRECOMPUTED_DIR)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--force', action='store_true', help='Recompute even if the inputs did not change')
+    args = parser.parse_args()
+
+    tickers = read_universe(args.universe) if args.universe else universe()
+    counts = run(tickers, args.start, args.end, args.out, args.workers, args.force)
+    print(', '.join(f'{status}: {count}' for status, count in counts.items()))
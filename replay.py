@@ -0,0 +1,415 @@
+"""
+Replay stored OHLCV bars as if they were arriving live.
+
+    python replay.py --interval 5m --speed 60 AAPL MSFT      # one hour per minute
+    python replay.py --speed max --source precomputed         # as fast as possible
+
+Bars of every ticker are merged into one stream in timestamp order (ties in
+ticker order, so runs are deterministic) and emitted at real time (speed 1),
+accelerated (speed N) or as fast as possible (speed None), with pause,
+resume and seek. Subscribers get each timestamp's bars together.
+
+Setting PF_DATA_PROVIDER=replay runs a process-wide replay behind
+market_data.download, so the dashboards see only bars up to the replay clock
+and go through their usual code paths: market_data caches are invalidated as
+bars arrive and intraday bars are appended to the ring buffers, updating
+their streaming indicators. It is configured with PF_REPLAY_INTERVAL (1d),
+PF_REPLAY_SPEED (1, or max), PF_REPLAY_MAX_GAP (seconds, default none),
+PF_REPLAY_SOURCE (history or precomputed), PF_REPLAY_TICKERS (default: every
+stored ticker) and PF_REPLAY_START.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import incremental
+import market_data
+import precompute
+import ring_buffer
+from history_store import HISTORY_DIR, HistoryStore
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+INTERVALS = ['1d'] + list(ring_buffer.INTRADAY_INTERVALS)
+
+
+def source_store(interval):
+    """Return the HistoryStore holding stored bars at interval."""
+    if interval == '1d':
+        return HistoryStore(HISTORY_DIR)
+    return HistoryStore(os.path.join(HISTORY_DIR, 'intraday', interval))
+
+
+def load_stored(tickers=None, interval='1d', source='history', start=None, end=None):
+    """
+    Read stored OHLCV for tickers into {ticker: DataFrame}, skipping tickers without data.
+
+    :param tickers: Tickers to load; by default every ticker in the source.
+    :param source: 'history' for the history store (any interval) or
+        'precomputed' for the Parquet tables of precompute.py (daily only).
+    """
+    frames = {}
+    if source == 'precomputed':
+        if interval != '1d':
+            raise ValueError('precomputed tables only hold daily bars')
+        manifest = precompute.load_manifest(precompute.PRECOMPUTED_DIR)
+        for ticker in tickers or sorted(manifest):
+            try:
+                frames[ticker.upper()] = precompute.read_precomputed(ticker, start, end, precompute.OHLCV_COLUMNS)
+            except (OSError, ValueError):
+                continue
+    else:
+        store = source_store(interval)
+        for ticker in tickers or store.tickers():
+            data = store.load(ticker, start, end)
+            if len(data):
+                frames[ticker.upper()] = data
+    return {ticker: frame for ticker, frame in frames.items() if len(frame)}
+
+
+def resample(data, interval):
+    """Aggregate OHLCV bars to a coarser interval, e.g. 5m bars to 1d."""
+    rule = {'1d': '1D', '1h': '1h', '15m': '15min', '5m': '5min', '1m': '1min'}[interval]
+    columns = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Adj Close': 'last', 'Volume': 'sum'}
+    bars = data.resample(rule).agg({c: f for c, f in columns.items() if c in data.columns})
+    return bars.dropna(subset=['Close'])
+
+
+class Replay:
+    """Deterministic, pausable stream of stored bars across tickers."""
+
+    def __init__(self, frames, interval='1d', speed=None, max_gap=None):
+        """
+        :param frames: {ticker: OHLCV DataFrame indexed by date}.
+        :param speed: Market seconds per wall-clock second; None replays as
+            fast as possible.
+        :param max_gap: Optional market seconds that longer gaps between bars
+            (nights, weekends) are shortened to when pacing.
+        """
+        self.interval = interval
+        self.speed = speed
+        self.max_gap = max_gap
+        self.tickers = sorted(frames)
+        self.frames = {}
+        self._dates = {}
+        self._columns = {}
+        stamps, owners, rows = [], [], []
+        for i, ticker in enumerate(self.tickers):
+            frame = frames[ticker]
+            index = frame.index.tz_convert(None) if getattr(frame.index, 'tz', None) else frame.index
+            frame = frame.set_axis(pd.DatetimeIndex(index).as_unit('ns'))
+            self.frames[ticker] = frame
+            self._dates[ticker] = frame.index.asi8
+            self._columns[ticker] = {c: frame[c].to_numpy(dtype=float) for c in OHLCV_COLUMNS if c in frame.columns}
+            stamps.append(self._dates[ticker])
+            owners.append(np.full(len(frame), i, dtype=np.int32))
+            rows.append(np.arange(len(frame)))
+        stamps = np.concatenate(stamps) if stamps else np.empty(0, dtype=np.int64)
+        owners = np.concatenate(owners) if owners else np.empty(0, dtype=np.int32)
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+        # Merge every ticker's bars by timestamp, then ticker
+        order = np.lexsort((owners, stamps))
+        self.timestamps = stamps[order]
+        self._owners = owners[order]
+        self._rows = rows[order]
+
+        self.cursor = 0  # position of the next bar to emit
+        self.emitted = 0
+        self._condition = threading.Condition()
+        self._paused = False
+        self._stopped = False
+        self._anchor = None  # (wall clock, market timestamp) that pacing is measured from
+        self._thread = None
+        self._subscribers = []
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def subscribe(self, on_bars, on_seek=None):
+        """
+        Call on_bars(timestamp, {ticker: bar}) for each timestamp emitted and
+        on_seek(timestamp) whenever the replay jumps.
+        """
+        self._subscribers.append((on_bars, on_seek))
+
+    def clock(self):
+        """Return the timestamp of the latest emitted bar, or None before the first."""
+        with self._condition:
+            return pd.Timestamp(int(self.timestamps[self.cursor - 1])) if self.cursor else None
+
+    def bars(self, ticker, start=None, end=None, interval=None):
+        """
+        Return the bars of ticker emitted so far with start <= date < end.
+
+        Intervals coarser than the replay's are aggregated from its bars.
+        """
+        ticker = ticker.upper()
+        frame = self.frames.get(ticker)
+        if frame is None:
+            return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], name='Date'))
+        clock = self.clock()
+        dates = self._dates[ticker]
+        last = 0 if clock is None else int(np.searchsorted(dates, clock.value, side='right'))
+        first = 0 if start is None else int(np.searchsorted(dates, pd.Timestamp(start).value, side='left'))
+        if end is not None:
+            last = min(last, int(np.searchsorted(dates, pd.Timestamp(end).value, side='left')))
+        data = frame.iloc[first:max(first, last)]
+        if interval is not None and interval != self.interval:
+            data = resample(data, interval)
+        return data
+
+    def _emit(self):
+        """Emit every bar at the next timestamp; return that timestamp."""
+        with self._condition:
+            first = self.cursor
+            timestamp = int(self.timestamps[first])
+            last = int(np.searchsorted(self.timestamps, timestamp, side='right'))
+            bars = {}
+            for owner, row in zip(self._owners[first:last], self._rows[first:last]):
+                ticker = self.tickers[owner]
+                bars[ticker] = {c: values[row] for c, values in self._columns[ticker].items()}
+            self.cursor = last
+            self.emitted += last - first
+        for on_bars, _ in self._subscribers:
+            on_bars(timestamp, bars)
+        return timestamp
+
+    def step(self):
+        """Emit the next timestamp's bars immediately; return False once the replay is over."""
+        if self.cursor >= len(self.timestamps):
+            return False
+        self._emit()
+        return True
+
+    def run(self, until=None):
+        """
+        Emit bars at the replay speed until the end, stop() or market time until.
+
+        Blocks; see start() to run in the background.
+        """
+        until = None if until is None else pd.Timestamp(until).value
+        with self._condition:
+            self._stopped = False
+            self._anchor = None
+        while True:
+            with self._condition:
+                while self._paused and not self._stopped:
+                    self._condition.wait()
+                if self._stopped or self.cursor >= len(self.timestamps):
+                    return
+                timestamp = int(self.timestamps[self.cursor])
+                if until is not None and timestamp > until:
+                    return
+                if self.speed:
+                    if self._anchor is None:
+                        self._anchor = (time.monotonic(), timestamp)
+                    wall, market = self._anchor
+                    delay = wall + (timestamp - market) / 1e9 / self.speed - time.monotonic()
+                    if delay > 0:
+                        # Woken early by pause, seek or stop, which all re-check the loop
+                        self._condition.wait(delay)
+                        continue
+            self._emit()
+            with self._condition:
+                self._shorten_gap()
+
+    def _shorten_gap(self):
+        # Pace a gap longer than max_gap before the next bar as if it were max_gap long
+        if self._anchor is None or self.max_gap is None or not 0 < self.cursor < len(self.timestamps):
+            return
+        gap = int(self.timestamps[self.cursor]) - int(self.timestamps[self.cursor - 1])
+        excess = gap - int(self.max_gap * 1e9)
+        if excess > 0:
+            self._anchor = (self._anchor[0], self._anchor[1] + excess)
+
+    def start(self, until=None):
+        """Run the replay in a daemon thread."""
+        self._thread = threading.Thread(target=self.run, args=(until,), daemon=True, name='replay')
+        self._thread.start()
+        return self._thread
+
+    def pause(self):
+        with self._condition:
+            self._paused = True
+            self._condition.notify_all()
+
+    def resume(self):
+        with self._condition:
+            self._paused = False
+            self._anchor = None
+            self._condition.notify_all()
+
+    @property
+    def paused(self):
+        return self._paused
+
+    def set_speed(self, speed):
+        with self._condition:
+            self.speed = speed
+            self._anchor = None
+            self._condition.notify_all()
+
+    def seek(self, timestamp):
+        """Move the replay so the next bar emitted is the first at or after timestamp."""
+        timestamp = pd.Timestamp(timestamp)
+        with self._condition:
+            self.cursor = int(np.searchsorted(self.timestamps, timestamp.value, side='left'))
+            self._anchor = None
+            self._condition.notify_all()
+        for _, on_seek in self._subscribers:
+            if on_seek is not None:
+                on_seek(timestamp)
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+
+class MarketDataFeed:
+    """
+    Replay subscriber pushing bars through market_data.
+
+    Cached prices and indicators of tickers with new bars are dropped so the
+    next rerun reloads them from the replay, and intraday bars are appended to
+    any ring buffer already open for them. Rings spill to a scratch directory,
+    which is replaced on every seek.
+    """
+
+    def __init__(self, replay):
+        self.replay = replay
+        self.scratch = tempfile.mkdtemp(prefix='pf-replay-')
+        self.seeks = 0
+        self._reset_rings()
+
+    def _reset_rings(self):
+        ring_buffer.SPILL_DIR = os.path.join(self.scratch, str(self.seeks))
+        ring_buffer.clear()
+
+    def on_bars(self, timestamp, bars):
+        if self.replay.interval in ring_buffer.INTRADAY_INTERVALS:
+            for ticker, bar in bars.items():
+                series = ring_buffer.find_series(ticker, self.replay.interval)
+                if series is not None and (series.ring.last_timestamp() or 0) < timestamp:
+                    series.append_bar(timestamp, bar)
+        market_data.invalidate(bars)
+
+    def on_seek(self, timestamp):
+        # Rings and caches may hold bars past the new clock, so start them over
+        self.seeks += 1
+        self._reset_rings()
+        market_data.clear()
+
+
+def speed_from(value):
+    """Parse a speed option: 'max' (or 0) for as fast as possible, else a number."""
+    if value in (None, '', 'max'):
+        return None
+    return float(value) or None
+
+
+_replay = None
+_replay_lock = threading.Lock()
+
+
+def get_replay():
+    """Return the process-wide replay configured from the PF_REPLAY_* variables, starting it once."""
+    global _replay
+    with _replay_lock:
+        if _replay is None:
+            tickers = [t.strip().upper() for t in os.environ.get('PF_REPLAY_TICKERS', '').split(',') if t.strip()]
+            interval = os.environ.get('PF_REPLAY_INTERVAL', '1d')
+            frames = load_stored(tickers or None, interval, os.environ.get('PF_REPLAY_SOURCE', 'history'))
+            max_gap = float(os.environ['PF_REPLAY_MAX_GAP']) if os.environ.get('PF_REPLAY_MAX_GAP') else None
+            _replay = Replay(frames, interval, speed_from(os.environ.get('PF_REPLAY_SPEED', '1')), max_gap)
+            feed = MarketDataFeed(_replay)
+            _replay.subscribe(feed.on_bars, feed.on_seek)
+            if os.environ.get('PF_REPLAY_START'):
+                _replay.seek(os.environ['PF_REPLAY_START'])
+            _replay.start()
+        return _replay
+
+
+def replay_download(ticker, start=None, end=None, interval='1d'):
+    """market_data provider returning the bars the process-wide replay has emitted so far."""
+    return get_replay().bars(ticker, start, end, interval)
+
+
+def replay_clock():
+    """The process-wide replay's clock, or its first bar before anything is emitted."""
+    replay = get_replay()
+    clock = replay.clock()
+    if clock is None and len(replay):
+        clock = pd.Timestamp(int(replay.timestamps[0]))
+    return clock if clock is not None else pd.Timestamp.now('UTC').tz_localize(None)
+
+
+market_data.register_provider('replay', replay_download, clock=replay_clock)
+
+
+# Function to show pause/resume, speed and seek controls in the sidebar when replaying
+def render_controls():
+    import streamlit as st
+
+    replay = get_replay()
+    st.sidebar.header('Replay')
+    clock = replay.clock()
+    st.sidebar.write(f"Clock: {clock if clock is not None else 'not started'} "
+                     f"({replay.cursor:,} of {len(replay):,} bars)")
+    col1, col2 = st.sidebar.columns(2)
+    if col1.button('Resume' if replay.paused else 'Pause', key='replay_pause'):
+        replay.resume() if replay.paused else replay.pause()
+    speed = col2.text_input('Speed', 'max' if replay.speed is None else f'{replay.speed:g}', key='replay_speed')
+    try:
+        if speed_from(speed) != replay.speed:
+            replay.set_speed(speed_from(speed))
+    except ValueError:
+        st.sidebar.error('Speed must be a number or max')
+    if len(replay):
+        first, last = pd.Timestamp(int(replay.timestamps[0])), pd.Timestamp(int(replay.timestamps[-1]))
+        target = st.sidebar.date_input('Seek to', (clock or first).date(), min_value=first.date(),
+                                       max_value=last.date(), key='replay_seek_date')
+        if st.sidebar.button('Seek', key='replay_seek'):
+            replay.seek(target)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay stored OHLCV bars in timestamp order.')
+    parser.add_argument('tickers', nargs='*', help='Tickers to replay (default: all stored)')
+    parser.add_argument('--interval', choices=INTERVALS, default='1d')
+    parser.add_argument('--source', choices=['history', 'precomputed'], default='history')
+    parser.add_argument('--start', help='First date to replay')
+    parser.add_argument('--end', help='Stop after this date')
+    parser.add_argument('--speed', default='max', help='Market seconds per second, or max')
+    parser.add_argument('--max-gap', type=float, help='Shorten gaps between bars to this many market seconds')
+    parser.add_argument('--indicators', action='store_true',
+                        help='Feed the bars to streaming indicators as the dashboards would')
+    args = parser.parse_args()
+
+    frames = load_stored([t.upper() for t in args.tickers] or None, args.interval, args.source)
+    replay = Replay(frames, args.interval, speed_from(args.speed), args.max_gap)
+    if args.indicators:
+        states = {ticker: [incremental.MovingAverage(20), incremental.RSI(), incremental.Bollinger(),
+                           incremental.MACD(), incremental.Stochastic(), incremental.MFI()]
+                  for ticker in replay.tickers}
+
+        def update(timestamp, bars):
+            for ticker, bar in bars.items():
+                for state in states[ticker]:
+                    state.update(bar)
+
+        replay.subscribe(update)
+    if args.start:
+        replay.seek(args.start)
+    started = time.perf_counter()
+    replay.run(until=args.end)
+    seconds = time.perf_counter() - started
+    print(f'Replayed {replay.emitted:,} bars of {len(replay.tickers)} tickers in {seconds:.2f}s '
+          f'({replay.emitted / max(seconds, 1e-9):,.0f} bars/s), clock {replay.clock()}')
@@ -0,0 +1,303 @@
+"""
+Recent intraday bars per ticker in fixed-capacity ring buffers.
+
+Each (ticker, interval) series keeps its latest RING_CAPACITY bars in
+preallocated NumPy columns. When the ring is full the oldest quarter is
+spilled to a history_store.HistoryStore under SPILL_DIR/<interval> and its
+slots are reused, so memory per series stays fixed however long the
+process runs. Loads older than the ring read the spilled bars back from disk.
+
+Indicators requested for a series are kept as streaming states from
+incremental.py: each appended bar updates them in O(1) and their values are
+stored in extra ring columns, instead of recomputing the whole window.
+
+The newest bar of a fetch may still be forming. It is kept as partial, with
+a copy of the indicator states from before it, and later fetches replace it
+(rolling the states back first) until a newer bar arrives.
+"""
+import copy
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import incremental
+from history_store import FIELDS, HISTORY_DIR, HistoryStore
+
+INTRADAY_INTERVALS = ('1m', '5m', '15m', '1h')
+
+# How far back Yahoo Finance serves each interval
+LOOKBACK_DAYS = {'1m': 7, '5m': 60, '15m': 60, '1h': 730}
+
+INTERVAL_SECONDS = {'1m': 60, '5m': 300, '15m': 900, '1h': 3600}
+
+# While the last bar may still be forming it is fetched again this often
+PARTIAL_REFRESH_SECONDS = 60
+
+RING_CAPACITY = int(os.environ.get('PF_RING_CAPACITY', 20000))
+
+# Bars evicted from the rings go to SPILL_DIR/<interval>; replay.py points
+# this at a scratch directory so replayed bars never mix with real ones
+SPILL_DIR = os.path.join(HISTORY_DIR, 'intraday')
+
+
+class RingBuffer:
+    """Fixed-capacity columnar buffer of the most recent bars, oldest first."""
+
+    def __init__(self, capacity, columns, spill=None):
+        """
+        :param capacity: Number of bars kept in memory.
+        :param columns: Names of the float columns.
+        :param spill: Optional function called with a DataFrame of the bars
+            evicted when the buffer is full.
+        """
+        self.capacity = capacity
+        self.dates = np.zeros(capacity, dtype=np.int64)
+        self.columns = {name: np.full(capacity, np.nan) for name in columns}
+        self.spill = spill
+        self.head = 0  # slot of the oldest bar
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add_column(self, name, values=None):
+        """Add a column, optionally filled with one value per stored bar (oldest first)."""
+        column = self.columns[name] = np.full(self.capacity, np.nan)
+        if values is not None:
+            column[self._slots()] = values
+
+    def _slots(self, first=0, last=None):
+        last = self.size if last is None else last
+        return (self.head + np.arange(first, last)) % self.capacity
+
+    def append(self, timestamp, values):
+        """Append one bar; return its slot. values maps column names to numbers."""
+        if self.size == self.capacity:
+            self._evict(max(1, self.capacity // 4))
+        slot = (self.head + self.size) % self.capacity
+        self.dates[slot] = timestamp
+        for name, column in self.columns.items():
+            column[slot] = values.get(name, np.nan)
+        self.size += 1
+        return slot
+
+    def replace_last(self, values):
+        """Overwrite the columns of the newest bar; return its slot."""
+        slot = (self.head + self.size - 1) % self.capacity
+        for name, column in self.columns.items():
+            column[slot] = values.get(name, np.nan)
+        return slot
+
+    def _evict(self, count):
+        if self.spill is not None:
+            self.spill(self.frame(0, count))
+        self.head = (self.head + count) % self.capacity
+        self.size -= count
+
+    def first_timestamp(self):
+        return int(self.dates[self.head]) if self.size else None
+
+    def last_timestamp(self):
+        return int(self.dates[(self.head + self.size - 1) % self.capacity]) if self.size else None
+
+    def search(self, start=None, end=None):
+        """Return the row range [first, last) of bars with start <= date < end."""
+        dates = self.dates[self._slots()]
+        first = 0 if start is None else int(np.searchsorted(dates, pd.Timestamp(start).value, side='left'))
+        last = self.size if end is None else int(np.searchsorted(dates, pd.Timestamp(end).value, side='left'))
+        return first, max(first, last)
+
+    def frame(self, first=0, last=None, columns=None):
+        """Return rows [first, last) as a new DataFrame indexed by date."""
+        slots = self._slots(first, last)
+        index = pd.DatetimeIndex(self.dates[slots].view('M8[ns]'), name='Date')
+        return pd.DataFrame({name: self.columns[name][slots] for name in columns or self.columns}, index=index)
+
+
+class IntradaySeries:
+    """Ring-buffered bars of one ticker at one intraday interval, plus their streaming indicators."""
+
+    def __init__(self, ticker, interval, capacity=RING_CAPACITY, store=None):
+        self.ticker = ticker.upper()
+        self.interval = interval
+        self.store = store or HistoryStore(os.path.join(SPILL_DIR, interval))
+        self.ring = RingBuffer(capacity, FIELDS, spill=self._spill)
+        self.lock = threading.RLock()
+        self.fetched = 0.0
+        self._indicators = {}  # (name, params) -> (state, ring column names)
+        # (name, params) -> state before the last bar, while that bar is partial
+        self._rollback = None
+
+    def _spill(self, bars):
+        self.store.append(self.ticker, bars[[f for f in FIELDS if f in bars.columns]])
+
+    def append_bar(self, timestamp, bar, partial=False):
+        """
+        Append one bar and update every registered indicator with it.
+
+        A bar at the timestamp of a partial last bar replaces it instead,
+        after rolling the indicator states back to before that bar.
+
+        :param partial: Whether the bar may still change, so the states from
+            before it are kept for a replacement.
+        :return: Whether the bar was stored.
+        """
+        with self.lock:
+            replace = self.ring.size and timestamp == self.ring.last_timestamp()
+            if replace:
+                if self._rollback is None:
+                    return False
+                for key, state in self._rollback.items():
+                    self._indicators[key] = (state, self._indicators[key][1])
+            self._rollback = {key: copy.deepcopy(state) for key, (state, _) in self._indicators.items()} \
+                if partial else None
+            values = dict(bar)
+            for state, columns in self._indicators.values():
+                result = state.update(bar)
+                values.update(zip(columns, result if isinstance(result, tuple) else (result,)))
+            if replace:
+                self.ring.replace_last(values)
+            else:
+                self.ring.append(timestamp, values)
+            return True
+
+    def append_frame(self, data):
+        """
+        Append the bars of an OHLCV DataFrame newer than the last stored bar; return how many were stored.
+
+        The newest bar is appended as partial, and a partial last bar is
+        replaced by the frame's bar at the same timestamp.
+        """
+        if data is None or data.empty:
+            return 0
+        index = data.index.tz_convert(None) if getattr(data.index, 'tz', None) else data.index
+        dates = pd.DatetimeIndex(index).as_unit('ns').asi8
+        fields = {f: data[f].to_numpy(dtype=float) for f in FIELDS if f in data.columns}
+        with self.lock:
+            last = self.ring.last_timestamp()
+            if last is not None:
+                new = np.flatnonzero(dates >= last)
+            else:
+                last = self.store.last_date(self.ticker)
+                new = np.flatnonzero(dates > last.value) if last is not None else np.arange(len(dates))
+            new = new[np.argsort(dates[new], kind='stable')]
+            stored = 0
+            for n, i in enumerate(new):
+                if self.ring.size and dates[i] < self.ring.last_timestamp():
+                    continue
+                stored += self.append_bar(int(dates[i]), {f: values[i] for f, values in fields.items()},
+                                          partial=n == len(new) - 1)
+            return stored
+
+    def refresh(self, download, market_now=None):
+        """
+        Fetch the last bar again and any newer ones, at most once every bar
+        interval, or every PARTIAL_REFRESH_SECONDS while the last bar may
+        still be forming.
+
+        :param download: Function(ticker, start=, interval=) returning OHLCV.
+        :param market_now: Current market time (default: now), which the
+            first fetch goes back LOOKBACK_DAYS from.
+        """
+        with self.lock:
+            last = self.ring.last_timestamp()
+            market_now = pd.Timestamp.now('UTC').tz_localize(None) if market_now is None else pd.Timestamp(market_now)
+            period = INTERVAL_SECONDS[self.interval]
+            if self._rollback is not None and last is not None and last + period * 10 ** 9 > market_now.value:
+                period = min(period, PARTIAL_REFRESH_SECONDS)
+            if time.time() - self.fetched < period:
+                return 0
+            self.fetched = time.time()
+            oldest = market_now.normalize() - pd.Timedelta(days=LOOKBACK_DAYS[self.interval] - 1)
+            start = oldest if last is None else max(oldest, pd.Timestamp(last).normalize())
+        data = download(self.ticker, start=start.strftime('%Y-%m-%d'), interval=self.interval)
+        return self.append_frame(data)
+
+    def load(self, start=None, end=None):
+        """Return OHLCV bars with start <= date < end, from disk where older than the ring."""
+        with self.lock:
+            first, last = self.ring.search(start, end)
+            data = self.ring.frame(first, last, FIELDS)
+            ring_start = self.ring.first_timestamp()
+        if ring_start is not None and (start is None or pd.Timestamp(start).value < ring_start):
+            end_on_disk = pd.Timestamp(ring_start) if end is None else min(pd.Timestamp(end), pd.Timestamp(ring_start))
+            older = self.store.load(self.ticker, start, end_on_disk)
+            if len(older):
+                data = pd.concat([older.astype(float), data])
+        return data
+
+    def indicator(self, name, start=None, end=None, **params):
+        """
+        Return indicator name over start-end in the same shape as indicators.py.
+
+        The first request for a (name, params) replays the ring to build its
+        streaming state; later bars only update it. Ranges reaching into the
+        spilled bars are computed from the loaded bars instead.
+        """
+        key = (name, tuple(sorted(params.items())))
+        state_class = incremental.INCREMENTAL[name]
+        with self.lock:
+            if key not in self._indicators:
+                state = state_class(**params)
+                columns = tuple(f'{name}{key[1]}:{c}' for c in state_class.columns)
+                bars = self.ring.frame(columns=FIELDS)
+                if self._rollback is not None:
+                    # Keep this state's rollback for the partial last bar too
+                    values = incremental.replay(state, bars.iloc[:-1])
+                    self._rollback[key] = copy.deepcopy(state)
+                    values = np.vstack([values, incremental.replay(state, bars.iloc[-1:])])
+                else:
+                    values = incremental.replay(state, bars)
+                for i, column in enumerate(columns):
+                    self.ring.add_column(column, values[:, i])
+                self._indicators[key] = (state, columns)
+            columns = self._indicators[key][1]
+            ring_start = self.ring.first_timestamp()
+            if ring_start is None or start is None or pd.Timestamp(start).value < ring_start:
+                result = None
+            else:
+                first, last = self.ring.search(start, end)
+                result = self.ring.frame(first, last, columns)
+                result.columns = list(state_class.columns)
+        if result is None:
+            data = self.load(start, end)
+            result = pd.DataFrame(incremental.replay(state_class(**params), data),
+                                  index=data.index, columns=list(state_class.columns))
+        return _shape(name, result)
+
+
+def _shape(name, result):
+    # Match the return types of the batch functions in indicators.py
+    if name == 'Bollinger':
+        return result
+    if len(result.columns) == 1:
+        return result.iloc[:, 0].rename(None)
+    return tuple(result[c].rename(None) for c in result.columns)
+
+
+_series = {}
+_series_lock = threading.Lock()
+
+
+def get_series(ticker, interval):
+    """Return the process-wide IntradaySeries for ticker and interval."""
+    key = (ticker.upper(), interval)
+    with _series_lock:
+        series = _series.get(key)
+        if series is None:
+            series = _series[key] = IntradaySeries(ticker, interval)
+        return series
+
+
+def find_series(ticker, interval):
+    """Return the IntradaySeries for ticker and interval if one has been created, else None."""
+    with _series_lock:
+        return _series.get((ticker.upper(), interval))
+
+
+def clear():
+    with _series_lock:
+        _series.clear()
@@ -0,0 +1,203 @@
+"""
+Risk and return metrics of many tickers at once.
+
+    table = risk.risk_table(TREND_TICKERS, '2019-01-01', '2024-01-01', benchmark='SPY')
+    python risk.py AAPL MSFT NVDA --years 5
+    python risk.py --synthetic 500                      # time a 500-ticker table
+
+metrics() works on a dates x tickers matrix of daily returns, each ticker's
+on its own trading dates, and computes every column in the same NumPy
+operations: CAGR, annualised
+volatility, maximum drawdown (from the running maximum of the growth of one
+dollar) and its longest duration, Sharpe, Sortino and Calmar ratios,
+historical VaR and CVaR, and beta against a benchmark. Beta uses returns
+over the benchmark's dates, so a ticker that trades on other days (e.g.
+crypto against SPY) is compared over the same periods.
+
+risk_table() caches one row per ticker, window and parameters, so adding a
+ticker to a table only computes that ticker.
+"""
+import argparse
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import market_data
+
+TRADING_DAYS = 252
+BENCHMARK = 'SPY'
+VAR_LEVEL = 0.95
+
+# Ticker rows kept in the cache
+MAX_ROWS = 8192
+
+COLUMNS = ['CAGR', 'Volatility', 'Max drawdown', 'Drawdown days', 'Sharpe', 'Sortino', 'Calmar', 'VaR', 'CVaR',
+           'Beta', 'Days']
+
+
+def metrics(returns, benchmark=None, risk_free=0.0, level=VAR_LEVEL, periods=TRADING_DAYS, aligned=None):
+    """
+    Return the risk and return metrics of every column of a returns matrix.
+
+    :param returns: DataFrame of simple returns, dates x tickers, NaN where a
+        ticker has no return (e.g. before it listed).
+    :param benchmark: Series of benchmark returns on the same dates, for Beta.
+    :param risk_free: Annual risk-free rate for Sharpe and Sortino.
+    :param level: Confidence level of VaR and CVaR; both are daily losses as
+        positive fractions.
+    :param periods: Bars per year.
+    :param aligned: Returns of the same tickers on the benchmark's dates,
+        for Beta (default: returns).
+    :return: DataFrame indexed by ticker with COLUMNS. Returns, volatility
+        and drawdowns are fractions; Drawdown days counts the ticker's bars
+        from a peak to the recovery of that peak (or the last bar).
+    """
+    values = returns.to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    days = valid.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = filled.sum(axis=0) / days
+        deviation = np.where(valid, values - mean, 0.0)
+        std = np.sqrt((deviation ** 2).sum(axis=0) / (days - 1))
+        excess = mean - risk_free / periods
+        downside = np.sqrt((np.minimum(filled - np.where(valid, risk_free / periods, 0.0), 0.0) ** 2).sum(axis=0) / days)
+
+        # Growth of one dollar; missing returns leave it unchanged
+        wealth = np.cumprod(1 + filled, axis=0)
+        cagr = wealth[-1] ** (periods / days) - 1 if len(wealth) else np.full(values.shape[1], np.nan)
+        peak = np.maximum.accumulate(wealth, axis=0)
+        drawdown = wealth / peak - 1
+        max_drawdown = drawdown.min(axis=0) if len(wealth) else np.full(values.shape[1], np.nan)
+        # Bars of the ticker since its last peak, at every row
+        bars = np.cumsum(valid, axis=0)
+        last_peak = np.maximum.accumulate(np.where(drawdown >= 0, bars, 0), axis=0)
+        duration = (bars - last_peak).max(axis=0) if len(wealth) else np.zeros(values.shape[1], dtype=int)
+
+        # Historical VaR is the loss at the (1 - level) quantile, CVaR the mean loss beyond it
+        quantile = np.nanquantile(values, 1 - level, axis=0) if len(values) else np.full(values.shape[1], np.nan)
+        tail = valid & (values <= quantile)
+        var = -quantile
+        cvar = -np.where(tail, values, 0.0).sum(axis=0) / tail.sum(axis=0)
+
+        beta = np.full(values.shape[1], np.nan)
+        if benchmark is not None:
+            aligned = returns if aligned is None else aligned.reindex(columns=returns.columns)
+            paired = aligned.to_numpy(dtype=float)
+            market = benchmark.reindex(aligned.index).to_numpy(dtype=float)
+            both = ~np.isnan(paired) & ~np.isnan(market)[:, None]
+            count = both.sum(axis=0)
+            x = np.where(both, market[:, None], 0.0)
+            y = np.where(both, paired, 0.0)
+            mean_x, mean_y = x.sum(axis=0) / count, y.sum(axis=0) / count
+            covariance = (x * y).sum(axis=0) / count - mean_x * mean_y
+            variance = (x * x).sum(axis=0) / count - mean_x ** 2
+            beta = np.where(count > 1, covariance / variance, np.nan)
+
+        table = pd.DataFrame({
+            'CAGR': cagr,
+            'Volatility': std * np.sqrt(periods),
+            'Max drawdown': max_drawdown,
+            'Drawdown days': duration,
+            'Sharpe': excess / std * np.sqrt(periods),
+            'Sortino': excess / downside * np.sqrt(periods),
+            'Calmar': cagr / -max_drawdown,
+            'VaR': var,
+            'CVaR': cvar,
+            'Beta': beta,
+            'Days': days,
+        }, index=returns.columns, columns=COLUMNS)
+    # Ratios over a zero denominator (no drawdown, no losses) are undefined
+    table = table.replace([np.inf, -np.inf], np.nan)
+    table.loc[days < 2] = np.nan
+    table['Days'] = days
+    return table
+
+
+def daily_returns(prices):
+    """
+    Return daily simple returns of a dates x tickers price matrix, each ticker's on its own dates.
+
+    A return is NaN on dates without a price for the ticker and otherwise
+    runs from its previous price, so dates only other tickers trade on (e.g.
+    weekends of crypto next to stocks) add no zero returns.
+    """
+    return prices.ffill().pct_change(fill_method=None).where(prices.notna()).iloc[1:]
+
+
+_rows = OrderedDict()
+_lock = threading.Lock()
+
+
+def risk_table(tickers, start=None, end=None, benchmark=BENCHMARK, risk_free=0.0, level=VAR_LEVEL):
+    """
+    Return the metrics of the daily returns of tickers between start and end, one row per ticker.
+
+    Rows are cached per ticker and parameters; only tickers without a cached
+    row are loaded and computed, in one batch. Tickers without prices are
+    left out.
+    """
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    params = (None if start is None else str(start), None if end is None else str(end), benchmark, risk_free, level)
+    with _lock:
+        cached = {t: _rows[(t,) + params] for t in tickers if (t,) + params in _rows}
+        for t in cached:
+            _rows.move_to_end((t,) + params)
+    missing = [t for t in tickers if t not in cached]
+    if missing:
+        load = missing + ([benchmark] if benchmark and benchmark not in missing else [])
+        prices = market_data.price_matrix(load, start, end)
+        returns = daily_returns(prices)
+        market = aligned = None
+        if benchmark in prices.columns:
+            aligned = daily_returns(prices[prices[benchmark].notna()])
+            market = aligned[benchmark]
+        computed = metrics(returns[[t for t in missing if t in returns.columns]], market, risk_free, level,
+                           aligned=aligned)
+        with _lock:
+            for t, row in computed.iterrows():
+                _rows[(t,) + params] = cached[t] = row
+            while len(_rows) > MAX_ROWS:
+                _rows.popitem(last=False)
+    rows = [cached[t] for t in tickers if t in cached]
+    return pd.DataFrame(rows, columns=COLUMNS).rename_axis('Ticker') if rows else \
+        pd.DataFrame(columns=COLUMNS).rename_axis('Ticker')
+
+
+def _synthetic_table(n_tickers, n_bars=1260):
+    # Time metrics() on n_tickers synthetic return series
+    from benchmarks.synthetic import ohlcv
+
+    closes = np.stack([ohlcv(n_bars, seed=i)['Close'].to_numpy() for i in range(n_tickers)], axis=1)
+    tickers = [f'T{i:04d}' for i in range(n_tickers - 1)] + [BENCHMARK]
+    prices = pd.DataFrame(closes, index=pd.bdate_range('2000-01-03', periods=n_bars, name='Date'), columns=tickers)
+    started = time.perf_counter()
+    returns = daily_returns(prices)
+    table = metrics(returns, returns[BENCHMARK])
+    seconds = time.perf_counter() - started
+    print(table.head(10).to_string(float_format=lambda v: f'{v:.3f}'))
+    print(f'{n_tickers} tickers x {n_bars} bars: {seconds * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Risk and return metrics of tickers.')
+    parser.add_argument('tickers', nargs='*', help='Tickers (default: dashboard dictionaries and trend.py tickers)')
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--benchmark', default=BENCHMARK)
+    parser.add_argument('--risk-free', type=float, default=0.0, help='Annual risk-free rate, e.g. 0.04')
+    parser.add_argument('--synthetic', type=int, metavar='TICKERS', help='Time a table of synthetic tickers')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        _synthetic_table(args.synthetic)
+        raise SystemExit(0)
+
+    from assets import universe
+
+    end = pd.Timestamp.today().strftime('%Y-%m-%d')
+    start = (pd.Timestamp.today() - pd.DateOffset(years=args.years)).strftime('%Y-%m-%d')
+    table = risk_table(args.tickers or universe(), start, end, args.benchmark, args.risk_free)
+    print(table.to_string(float_format=lambda v: f'{v:.3f}'))
@@ -0,0 +1,241 @@
+"""
+Cross-sectional relative-strength screener.
+
+    table = screener.screen(TREND_TICKERS)               # ranked, refreshed once a day
+    python screener.py AAPL MSFT NVDA --benchmark QQQ
+    python screener.py --synthetic 1000                  # time the full pass and a daily update
+
+For every ticker of a universe the screener measures, from one aligned
+price matrix:
+
+- the return over each lookback of LOOKBACKS (1, 3, 6 and 12 months),
+- the same returns relative to a benchmark (SPY by default),
+- the distance of the price from its 200-day SMA,
+- the distance from its 52-week high.
+
+Each measure is turned into a cross-sectional percentile rank, and the
+tickers are ranked by the mean percentile of the benchmark-relative returns,
+the SMA distance and the high proximity.
+
+A Screener only keeps the last year of prices. After the first load each
+refresh fetches the bars since the last one and shifts them in, so the
+daily update does not reload the history; the measures are recomputed in
+one vectorized pass over the kept window, which takes milliseconds for a
+thousand tickers.
+"""
+import argparse
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import market_data
+
+BENCHMARK = 'SPY'
+
+# Lookbacks in trading days
+LOOKBACKS = {'1M': 21, '3M': 63, '6M': 126, '12M': 252}
+
+SMA_WINDOW = 200
+HIGH_WINDOW = 252
+
+# Screeners (universe and benchmark) kept in memory
+MAX_SCREENERS = 8
+
+
+def strength(prices, tickers, benchmark=None, lookbacks=LOOKBACKS, sma_window=SMA_WINDOW, high_window=HIGH_WINDOW):
+    """
+    Return the relative-strength measures and ranks of the latest row of a price matrix.
+
+    :param prices: Forward-filled prices, dates x tickers, oldest first, as a
+        NumPy array; NaN before a ticker's first price.
+    :param tickers: Column names of prices.
+    :param benchmark: Column the relative returns are measured against, or None.
+    :return: DataFrame indexed by ticker, strongest first. Returns and
+        distances are fractions (0.05 is 5%); Score is the mean percentile
+        rank (0-100) and Rank 1 is the strongest ticker.
+    """
+    prices = np.asarray(prices, dtype=float)
+    last = prices[-1]
+    measures = {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for label, days in lookbacks.items():
+            base = prices[-1 - days] if len(prices) > days else np.full_like(last, np.nan)
+            measures[f'Return {label}'] = last / base - 1
+        if benchmark is not None:
+            column = list(tickers).index(benchmark)
+            for label in lookbacks:
+                ticker_return = measures[f'Return {label}']
+                measures[f'vs {benchmark} {label}'] = (1 + ticker_return) / (1 + ticker_return[column]) - 1
+        # Only full windows count, as for rolling(window).mean()
+        window = prices[-sma_window:]
+        full = (len(window) == sma_window) & ~np.isnan(window).any(axis=0)
+        measures[f'vs SMA {sma_window}'] = np.where(full, last / window.mean(axis=0) - 1, np.nan)
+        high = np.fmax.reduce(prices[-high_window:], axis=0)
+        measures['vs 52w high'] = last / high - 1
+    table = pd.DataFrame(measures, index=pd.Index(list(tickers), name='Ticker'))
+    table.insert(0, 'Price', last)
+
+    ranked = [f'vs {benchmark} {label}' for label in lookbacks] if benchmark is not None else \
+        [f'Return {label}' for label in lookbacks]
+    ranked += [f'vs SMA {sma_window}', 'vs 52w high']
+    table['Score'] = table[ranked].rank(pct=True).mean(axis=1) * 100
+    table['Rank'] = table['Score'].rank(ascending=False, method='min').astype('Int64')
+    return table.sort_values('Score', ascending=False, na_position='last')
+
+
+class Screener:
+    def __init__(self, tickers, benchmark=BENCHMARK, lookbacks=LOOKBACKS, sma_window=SMA_WINDOW,
+                 high_window=HIGH_WINDOW, field='Adj Close'):
+        self.tickers = list(dict.fromkeys(t.upper() for t in tickers))
+        self.benchmark = benchmark.upper() if benchmark else None
+        self.columns = self.tickers + ([self.benchmark] if self.benchmark and self.benchmark not in self.tickers else [])
+        self.position = {ticker: i for i, ticker in enumerate(self.columns)}
+        self.lookbacks = dict(lookbacks)
+        self.sma_window = sma_window
+        self.high_window = high_window
+        self.field = field
+        # The window of rows the measures need, newest last; rows below
+        # filled are not loaded yet
+        self.rows = max(max(self.lookbacks.values()) + 1, sma_window, high_window)
+        self.prices = np.full((self.rows, len(self.columns)), np.nan)
+        self.dates = np.zeros(self.rows, dtype=np.int64)
+        self.filled = 0
+        self.refreshed = None
+        self.lock = threading.Lock()
+        self._table = None
+
+    @property
+    def last_date(self):
+        return pd.Timestamp(self.dates[-1]) if self.filled else None
+
+    def warm_up(self, prices):
+        """Load the last rows of a dates x tickers price DataFrame (e.g. from market_data.price_matrix)."""
+        prices = prices.reindex(columns=self.columns).ffill().iloc[-self.rows:]
+        self.filled = len(prices)
+        self.prices[:] = np.nan
+        if self.filled:
+            self.prices[-self.filled:] = prices.to_numpy(dtype=float)
+            self.dates[-self.filled:] = pd.DatetimeIndex(prices.index).as_unit('ns').asi8
+        self._table = None
+
+    def _price(self, bar):
+        if isinstance(bar, dict):
+            return bar.get(self.field, bar.get('Close'))
+        return bar
+
+    def on_bars(self, timestamp, bars):
+        """
+        Add one date's bars ({ticker: price or OHLCV dict}) to the window.
+
+        A newer date shifts the window by a row, carrying forward the prices
+        of tickers without a bar; the latest date again replaces its prices
+        (e.g. a partial bar that has since closed); older dates are ignored.
+        """
+        timestamp = pd.Timestamp(timestamp).value
+        if self.filled and timestamp < self.dates[-1]:
+            return
+        if not self.filled or timestamp > self.dates[-1]:
+            self.prices[:-1] = self.prices[1:]
+            self.dates[:-1] = self.dates[1:]
+            self.dates[-1] = timestamp
+            self.filled = min(self.filled + 1, self.rows)
+        for ticker, bar in bars.items():
+            column = self.position.get(ticker.upper())
+            price = self._price(bar)
+            if column is not None and price is not None and not np.isnan(price):
+                self.prices[-1, column] = price
+        self._table = None
+
+    def refresh(self, start=None):
+        """Fetch the bars since the last refresh from market_data, or the whole window the first time."""
+        if not self.filled:
+            # Calendar days covering the window of trading days, with room
+            # for a year of market holidays
+            start = start or (market_data.now().normalize() - pd.Timedelta(days=self.rows * 7 // 5 + 30))
+            self.warm_up(market_data.price_matrix(self.columns, start.strftime('%Y-%m-%d'), field=self.field))
+        else:
+            new = market_data.price_matrix(self.columns, self.last_date.strftime('%Y-%m-%d'), field=self.field)
+            for date, row in zip(new.index, new.to_numpy()):
+                self.on_bars(date, {ticker: price for ticker, price in zip(new.columns, row) if not np.isnan(price)})
+        self.refreshed = market_data.now().normalize()
+
+    def table(self):
+        """Return the ranked strength table of the tickers (see strength); cached until new bars arrive."""
+        if not self.filled:
+            return pd.DataFrame(index=pd.Index([], name='Ticker'))
+        if self._table is None:
+            table = strength(self.prices[self.rows - self.filled:], self.columns, self.benchmark, self.lookbacks,
+                             self.sma_window, self.high_window)
+            self._table = table.loc[[t for t in table.index if t in set(self.tickers)]]
+        return self._table
+
+
+_screeners = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_screener(tickers, benchmark=BENCHMARK):
+    """Return the shared Screener of tickers against benchmark, creating it (empty) if needed."""
+    key = (tuple(t.upper() for t in tickers), benchmark)
+    with _lock:
+        screener = _screeners.get(key)
+        if screener is None:
+            screener = _screeners[key] = Screener(tickers, benchmark)
+            while len(_screeners) > MAX_SCREENERS:
+                _screeners.popitem(last=False)
+        _screeners.move_to_end(key)
+    return screener
+
+
+def screen(tickers, benchmark=BENCHMARK):
+    """Return the ranked strength table of tickers, refreshing its prices at most once a day."""
+    screener = get_screener(tickers, benchmark)
+    with screener.lock:
+        if screener.refreshed is None or screener.refreshed < market_data.now().normalize():
+            screener.refresh()
+        return screener.table()
+
+
+def _synthetic_update(n_tickers, n_days=20):
+    # Time the first full pass over n_tickers synthetic tickers and then daily updates
+    from benchmarks.synthetic import ohlcv
+
+    rows = max(LOOKBACKS.values()) + 1 + n_days
+    closes = np.stack([ohlcv(rows, seed=i)['Close'].to_numpy() for i in range(n_tickers)], axis=1)
+    tickers = [f'T{i:04d}' for i in range(n_tickers - 1)] + [BENCHMARK]
+    prices = pd.DataFrame(closes, index=pd.bdate_range('2000-01-03', periods=rows, name='Date'), columns=tickers)
+    screener = Screener(tickers)
+    started = time.perf_counter()
+    screener.warm_up(prices.iloc[:-n_days])
+    table = screener.table()
+    full = time.perf_counter() - started
+    updates = []
+    for date, row in prices.iloc[-n_days:].iterrows():
+        started = time.perf_counter()
+        screener.on_bars(date, row.to_dict())
+        table = screener.table()
+        updates.append(time.perf_counter() - started)
+    print(table.head(10).to_string(float_format=lambda v: f'{v:.3f}'))
+    print(f'{n_tickers} tickers: full pass {full * 1000:.1f} ms, daily update median '
+          f'{np.median(updates) * 1000:.1f} ms, max {max(updates) * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rank tickers by relative strength.')
+    parser.add_argument('tickers', nargs='*', help='Universe (default: dashboard dictionaries and trend.py tickers)')
+    parser.add_argument('--benchmark', default=BENCHMARK)
+    parser.add_argument('--top', type=int, default=25)
+    parser.add_argument('--synthetic', type=int, metavar='TICKERS', help='Time a screen of synthetic tickers')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        _synthetic_update(args.synthetic)
+        raise SystemExit(0)
+
+    from assets import universe
+
+    table = screen(args.tickers or universe(), args.benchmark)
+    print(table.head(args.top).to_string(float_format=lambda v: f'{v:.3f}'))
@@ -0,0 +1,103 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from cache_store import get_cache
+
+# Finance-flavoured word list; scores range from -3 (very negative) to +3
+LEXICON = {
+    'beat': 2, 'beats': 2, 'surge': 2, 'surges': 2, 'soar': 3, 'soars': 3, 'jump': 2, 'jumps': 2,
+    'rally': 2, 'rallies': 2, 'gain': 1, 'gains': 1, 'rise': 1, 'rises': 1, 'climb': 1, 'climbs': 1,
+    'record': 1, 'high': 1, 'highs': 1, 'strong': 2, 'stronger': 2, 'growth': 1, 'profit': 1,
+    'profits': 1, 'upgrade': 2, 'upgrades': 2, 'upgraded': 2, 'outperform': 2, 'bullish': 2,
+    'buy': 1, 'boost': 2, 'boosts': 2, 'raise': 1, 'raises': 1, 'raised': 1, 'win': 2, 'wins': 2,
+    'approval': 2, 'approved': 2, 'breakthrough': 3, 'expands': 1, 'expansion': 1, 'optimistic': 2,
+    'positive': 2, 'recovery': 1, 'rebound': 2, 'rebounds': 2, 'top': 1, 'tops': 1, 'dividend': 1,
+    'miss': -2, 'misses': -2, 'missed': -2, 'plunge': -3, 'plunges': -3, 'crash': -3, 'crashes': -3,
+    'fall': -1, 'falls': -1, 'drop': -1, 'drops': -1, 'slump': -2, 'slumps': -2, 'sink': -2,
+    'sinks': -2, 'tumble': -2, 'tumbles': -2, 'low': -1, 'lows': -1, 'weak': -2, 'weaker': -2,
+    'loss': -2, 'losses': -2, 'downgrade': -2, 'downgrades': -2, 'downgraded': -2, 'underperform': -2,
+    'bearish': -2, 'sell': -1, 'selloff': -2, 'cut': -1, 'cuts': -1, 'lawsuit': -2, 'probe': -2,
+    'investigation': -2, 'fraud': -3, 'recall': -2, 'layoffs': -2, 'warning': -2, 'warns': -2,
+    'risk': -1, 'risks': -1, 'concern': -1, 'concerns': -1, 'fears': -2, 'recession': -2,
+    'bankruptcy': -3, 'default': -2, 'negative': -2, 'decline': -1, 'declines': -1, 'halt': -2,
+}
+
+NEGATIONS = frozenset(['not', 'no', 'never', "isn't", "doesn't", "didn't", "won't", 'without'])
+
+# Normalisation constant: score = total / sqrt(total**2 + ALPHA), in (-1, 1)
+ALPHA = 15
+
+# Scores kept in the cache: room for several large watchlist batches, since
+# every headline is a small float and none should be scored twice
+MAX_SCORES = int(os.environ.get('PF_SENTIMENT_MAX_ENTRIES', 500000))
+
+_cache = get_cache('sentiment', max_entries=MAX_SCORES)
+
+
+def _headline_keys(headlines):
+    return pd.util.hash_array(headlines.to_numpy(dtype=object))
+
+
+def _score_uncached(headlines):
+    tokens = headlines.str.lower().str.findall(r"[a-z']+").explode()
+    values = tokens.map(LEXICON)
+    negated = tokens.groupby(level=0).shift(1).isin(NEGATIONS)
+    values = values.where(~negated, -values)
+    total = values.groupby(level=0).sum().reindex(headlines.index, fill_value=0).to_numpy(dtype=float)
+    return total / np.sqrt(total * total + ALPHA)
+
+
+def score_headlines(headlines):
+    """
+    Score headlines in one vectorized pass, reusing cached scores by headline hash.
+
+    :param headlines: Iterable of headline strings.
+    :return: Series of scores in (-1, 1) aligned with the input order.
+    """
+    headlines = pd.Series(list(headlines), dtype=object).fillna('').astype(str)
+    keys = _headline_keys(headlines)
+    key_list = keys.tolist()
+    cached = _cache.get_many(key_list)
+    scores = np.fromiter((cached.get(key, np.nan) for key in key_list), dtype=float, count=len(key_list))
+
+    todo = np.isnan(scores)
+    if todo.any():
+        new = headlines[todo].reset_index(drop=True)
+        new_scores = _score_uncached(new)
+        scores[todo] = new_scores
+        _cache.set_many(dict(zip(keys[todo].tolist(), new_scores.tolist())))
+
+    return pd.Series(scores, index=headlines.index, name='Sentiment')
+
+
+def sentiment_label(score, threshold=0.05):
+    if score >= threshold:
+        return 'Positive'
+    if score <= -threshold:
+        return 'Negative'
+    return 'Neutral'
+
+
+def daily_sentiment(entries):
+    """
+    Aggregate headline scores per ticker per day.
+
+    :param entries: Iterable of dicts with 'title', 'published' and 'tickers'
+        (or 'ticker') keys, such as news_store documents.
+    :return: DataFrame with Ticker, Date, Sentiment (mean) and Headlines (count).
+    """
+    frame = pd.DataFrame(list(entries), columns=['title', 'published', 'tickers', 'ticker'])
+    if frame.empty:
+        return pd.DataFrame(columns=['Ticker', 'Date', 'Sentiment', 'Headlines'])
+    frame['Sentiment'] = score_headlines(frame['title']).to_numpy()
+    frame['Ticker'] = [t if isinstance(t, list) else [s] for t, s in zip(frame['tickers'], frame['ticker'])]
+    frame = frame.explode('Ticker')
+    published = pd.to_datetime(frame['published'], errors='coerce', utc=True, format='mixed')
+    frame['Date'] = published.dt.tz_localize(None).dt.normalize()
+    daily = (frame.dropna(subset=['Date'])
+             .groupby(['Ticker', 'Date'])['Sentiment']
+             .agg(Sentiment='mean', Headlines='size')
+             .reset_index())
+    return daily
@@ -0,0 +1,40 @@
+"""alerts.py: ticker case and partial bars replaced by later polls."""
+import pandas as pd
+
+import alerts
+from benchmarks.synthetic import ohlcv
+
+# Recent enough for the first poll's warm-up window
+BARS = ohlcv(400, seed='ALRT', start=pd.Timestamp.now().normalize() - pd.Timedelta(days=500))
+
+
+def _states(scanner):
+    state = scanner.states['ALRT']
+    return state.signal, state.trend, state.last_sma, state.rsi.update({'Close': 100.0})
+
+
+def test_ticker_case_is_normalized():
+    scanner = alerts.Scanner(['alrt'], log_path=None)
+    scanner.warm_up('Alrt', BARS.iloc[:300])
+    scanner.on_bars(BARS.index[300], {'alrt': BARS.iloc[300]})
+    assert list(scanner.states) == ['ALRT']
+    assert scanner.states['ALRT'].last_timestamp == BARS.index[300].value
+
+
+def test_poll_replaces_partial_bar():
+    feed = {'data': BARS.iloc[:350].copy()}
+    feed['data'].iloc[-1, feed['data'].columns.get_loc('Close')] *= 0.8
+
+    def download(ticker, start=None, interval='1d'):
+        data = feed['data']
+        return data[data.index >= pd.Timestamp(start)]
+
+    streamed = alerts.Scanner(['ALRT'], log_path=None)
+    streamed.poll(download)
+    feed['data'] = BARS.iloc[:351]
+    streamed.poll(download)
+    assert streamed.states['ALRT'].rollback is not None
+
+    final = alerts.Scanner(['ALRT'], log_path=None)
+    final.warm_up('ALRT', BARS.iloc[:351])
+    assert _states(streamed) == _states(final)
@@ -0,0 +1,52 @@
+"""compute_pool.py: cancelling jobs that never report, shutdown and the inline cost model."""
+import operator
+import time
+
+import pytest
+
+import compute_pool
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(compute_pool, 'CANCEL_GRACE_SECONDS', 0.2)
+    pool = compute_pool.ComputePool(workers=1, per_owner=1)
+    yield pool
+    pool.shutdown()
+
+
+def wait_for(condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def test_cancel_terminates_a_job_that_never_reports(pool):
+    job = pool.submit(time.sleep, 60, owner='a')
+    wait_for(lambda: pool._pids[0])
+    job.cancel()
+    with pytest.raises(compute_pool.Cancelled):
+        job.result()
+    # The slot comes back with a fresh worker long before the sleep would end
+    assert pool.submit(operator.add, 1, 2, owner='a').result(timeout=30) == 3
+    assert pool.stats()['running'] == 0
+
+
+def test_shutdown_drops_queued_jobs(pool):
+    running = pool.submit(time.sleep, 60, owner='a')
+    queued = pool.submit(time.sleep, 60, owner='a', name='second')
+    assert pool.stats()['queued'] == 1
+    pool.shutdown()
+    assert running.state == queued.state == 'cancelled'
+    wait_for(lambda: pool.stats()['running'] == 0)
+    assert pool.stats()['queued'] == 0
+    # Later jobs run inline
+    assert pool.submit(operator.add, 1, 2).result(timeout=0) == 3
+
+
+def test_inline_threshold_follows_measured_cost(pool):
+    assert not pool.runs_inline(sorted, compute_pool.MIN_ROWS)
+    pool.submit(sorted, list(range(1000)), inline=True, rows=1000).result()
+    assert pool.runs_inline(sorted, compute_pool.MIN_ROWS)
+    assert not pool.runs_inline(sorted, 10 ** 12)
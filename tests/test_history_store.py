@@ -0,0 +1,51 @@
+"""history_store.py updates: replaced partial bars and rebuilds after adjustments."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import history_store
+import market_data
+from benchmarks.synthetic import ohlcv
+
+FULL = ohlcv(300, seed='X', start='2023-01-02')
+
+
+@pytest.fixture
+def feed(monkeypatch):
+    state = {'data': FULL.iloc[:200].copy()}
+
+    def download(ticker, start=None, end=None, interval='1d'):
+        data = state['data']
+        return data[data.index >= pd.Timestamp(start)].copy() if start else data.copy()
+
+    monkeypatch.setattr(market_data, 'download', download)
+    return state
+
+
+def test_partial_bar_is_replaced(tmp_path, feed):
+    store = history_store.HistoryStore(str(tmp_path))
+    assert store.update('X') == 200
+    partial = FULL.iloc[:201].copy()
+    partial.iloc[-1, partial.columns.get_indexer(['Close', 'Adj Close'])] += 1
+    feed['data'] = partial
+    assert store.update('X', refresh_seconds=0) == 1
+    assert store.load('X')['Close'].iloc[-1] == FULL['Close'].iloc[200] + 1
+
+    feed['data'] = FULL.iloc[:205].copy()
+    assert store.update('X', refresh_seconds=0) == 4
+    pd.testing.assert_series_equal(store.load('X')['Close'], FULL['Close'].iloc[:205], check_freq=False)
+    assert store.meta('X')['generation'] == 0
+
+
+def test_adjusted_history_is_rebuilt(tmp_path, feed):
+    store = history_store.HistoryStore(str(tmp_path))
+    store.update('X')
+    old = store.load('X')
+    adjusted = FULL.iloc[:207].copy()
+    adjusted['Adj Close'] *= 0.99
+    feed['data'] = adjusted
+    assert store.update('X', refresh_seconds=0) == 207
+    assert store.meta('X')['generation'] == 1
+    np.testing.assert_allclose(store.load('X')['Adj Close'], adjusted['Adj Close'])
+    # Frames loaded before the rebuild keep the old values
+    np.testing.assert_allclose(old['Adj Close'], FULL['Adj Close'].iloc[:200])
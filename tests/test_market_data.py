@@ -0,0 +1,81 @@
+"""market_data.py indicators on precomputed and freshly computed paths."""
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import ohlcv
+
+PRICES = ohlcv(2000, seed='TEST', start='2016-01-01')
+
+
+def fake_download(ticker, start=None, end=None, interval='1d'):
+    data = PRICES
+    if start is not None:
+        data = data[data.index >= pd.Timestamp(start)]
+    if end is not None:
+        data = data[data.index < pd.Timestamp(end)]
+    return data.copy()
+
+
+@pytest.fixture
+def market_data(tmp_path, monkeypatch):
+    monkeypatch.setenv('PF_PRECOMPUTED_DIR', str(tmp_path))
+    import precompute
+    importlib.reload(precompute)
+    import market_data
+    monkeypatch.setattr(market_data, 'PROVIDER', 'yahoo')
+    monkeypatch.setitem(market_data.PROVIDERS, 'yahoo', fake_download)
+    market_data.clear()
+    _, status, digest = precompute.process_ticker('TEST', '2019-01-01', '2023-06-01', str(tmp_path))
+    assert status == 'written'
+    precompute.save_manifest(str(tmp_path), {'TEST': {'hash': digest, 'start': '2019-01-01', 'end': '2023-06-01',
+                                                      'updated': '2023-06-01T00:00:00+00:00'}})
+    yield market_data
+    market_data.clear()
+    monkeypatch.undo()
+    importlib.reload(precompute)
+
+
+CALLS = [('MA', {'window': 20}), ('RSI', {'window': 14}), ('Bollinger', {'window': 20, 'num_std': 2}),
+         ('MACD', {}), ('Stochastic', {}), ('MFI', {}), ('SMA', {'window': 200})]
+
+
+@pytest.mark.parametrize('name, params', CALLS)
+def test_precomputed_and_computed_agree(market_data, name, params):
+    start, end = '2022-01-03', '2023-01-01'
+    cached = market_data.indicator('TEST', start, end, name, **params)
+
+    # Evict the precomputed table and the result, as the LRU would
+    key = market_data.price_key('TEST', start, end)
+    market_data._forget('indicators', (key, 'precomputed'))
+    market_data._forget('indicators', (key, name, tuple(sorted(params.items()))))
+    computed = market_data.indicator('TEST', start, end, name, **params)
+
+    for a, b in zip(cached if isinstance(cached, tuple) else [cached],
+                    computed if isinstance(computed, tuple) else [computed]):
+        pd.testing.assert_index_equal(a.index, b.index)
+        np.testing.assert_allclose(np.asarray(a, dtype=float), np.asarray(b, dtype=float), rtol=1e-9)
+
+
+def test_warm_up_without_precomputed_table(market_data):
+    # Not covered by the precompute run, so WARMUP_DAYS of earlier prices are
+    # loaded; what is left of the EMAs' start is far below display precision
+    start, end = '2017-06-01', '2018-01-01'
+    ema = market_data.indicator('TEST', start, end, 'MACD')[0]
+    assert ema.index[0] >= pd.Timestamp(start)
+    assert len(ema) == len(fake_download('TEST', start, end))
+    full = market_data.INDICATORS['MACD'](fake_download('TEST', None, end))[0]
+    np.testing.assert_allclose(ema.to_numpy(), full[full.index >= start].to_numpy(), atol=1e-6)
+
+
+def test_clipped_trend_periods_keep_min_days(market_data):
+    # Periods that began before start are cut at start; stubs are dropped as trend_periods would
+    stubs = 0
+    for start in pd.date_range('2020-01-01', '2021-12-01', freq='MS'):
+        trends = market_data.indicator('TEST', start, '2023-01-01', 'Trends')
+        for kind in ('uptrend', 'downtrend'):
+            assert all(s >= start and (e - s).days > 50 for s, e in trends[kind])
+        stubs += sum(s == start for kind in ('uptrend', 'downtrend') for s, _ in trends[kind])
+    assert stubs
@@ -0,0 +1,101 @@
+"""news.py against a local HTTP stand-in for the Yahoo Finance RSS feed."""
+import importlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+FEED = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>{ticker} headlines</title>
+<item><title>{ticker} beats estimates</title><link>https://example.com/{ticker}/1</link>
+<guid>{ticker}-1</guid><pubDate>Mon, 02 Sep 2024 13:00:00 GMT</pubDate><description>Quarterly results</description></item>
+<item><title>{ticker} announces buyback</title><link>https://example.com/{ticker}/2</link>
+<guid>{ticker}-2</guid><pubDate>Sun, 01 Sep 2024 09:30:00 GMT</pubDate><description>Capital return</description></item>
+</channel></rss>"""
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        ticker = self.path.strip('/')
+        etag = f'"{ticker}-v1"'
+        self.requests.append((ticker, self.headers.get('If-None-Match')))
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = FEED.format(ticker=ticker).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/rss+xml')
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def news(monkeypatch):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FeedHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    FeedHandler.requests = []
+    monkeypatch.setenv('PF_NEWS_FEED_URL', f'http://127.0.0.1:{server.server_port}/{{ticker}}')
+    import news
+
+    module = importlib.reload(news)
+    yield module
+    server.shutdown()
+    server.server_close()
+
+
+def test_feed_url_comes_from_environment(news):
+    assert news.feed_url('AAPL').startswith('http://127.0.0.1:')
+    assert news.feed_url('AAPL').endswith('/AAPL')
+
+
+def test_parses_entries(news):
+    entries = news.get_news('AAPL', timeout=10)
+    assert [e['title'] for e in entries] == ['AAPL beats estimates', 'AAPL announces buyback']
+    assert entries[0]['id'].endswith('AAPL-1')
+    assert entries[0]['link'] == 'https://example.com/AAPL/1'
+    assert entries[0]['summary'] == 'Quarterly results'
+    assert entries[0]['published']
+    assert news.cached_news('AAPL') == entries
+
+
+def test_conditional_get_keeps_entries_on_304(news, monkeypatch):
+    first = news.get_news('MSFT', timeout=10)
+    # Within MIN_REFRESH_SECONDS the feed is served from memory
+    assert news.get_news('MSFT', timeout=10) == first
+    assert len(FeedHandler.requests) == 1
+
+    monkeypatch.setattr(news, 'MIN_REFRESH_SECONDS', 0)
+    assert news.get_news('MSFT', timeout=10) == first
+    assert FeedHandler.requests == [('MSFT', None), ('MSFT', '"MSFT-v1"')]
+
+
+def test_least_recently_used_feeds_are_evicted(news, monkeypatch):
+    monkeypatch.setattr(news, 'MAX_FEEDS', 2)
+    for ticker in ['A', 'B', 'C']:
+        news.get_news(ticker, timeout=10)
+    assert news.cached_news('A') == []
+    assert [e['title'] for e in news.cached_news('C')][0] == 'C beats estimates'
+
+    # Touching B makes C the oldest
+    news.get_news('B', timeout=10)
+    news.get_news('D', timeout=10)
+    assert news.cached_news('C') == []
+    assert news.cached_news('B') and news.cached_news('D')
+
+
+def test_pending_fetches_are_bounded(news, monkeypatch):
+    news.get_news('AAPL', timeout=10)
+    assert news._pending == {}
+    monkeypatch.setattr(news, 'MAX_PENDING', 0)
+    future = news.fetch_news_async('NVDA')
+    assert future.done() and future.result() == []
+    assert len(FeedHandler.requests) == 1
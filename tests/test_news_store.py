@@ -0,0 +1,40 @@
+"""news_store.py ordering, queries and segment merging."""
+import email.utils
+
+import news_store
+
+
+def entry(n, hours, title='apple news'):
+    return {'id': f'id{n}', 'title': f'{title} {n}', 'link': f'https://example.com/{n}',
+            'published': email.utils.formatdate(1_700_000_000 + hours * 3600, usegmt=True)}
+
+
+def test_newest_published_first(tmp_path):
+    store = news_store.NewsStore(str(tmp_path))
+    store.add('AAPL', [entry(0, 5), entry(1, 1), entry(2, 9)])
+    store.add('AAPL', [entry(3, 3)])
+    assert [d['id'] for d in store.search('apple')] == ['id2', 'id0', 'id3', 'id1']
+    assert [d['id'] for d in store.search(tickers=['aapl'], limit=2)] == ['id2', 'id0']
+
+
+def test_stop_words_match_nothing(tmp_path):
+    store = news_store.NewsStore(str(tmp_path))
+    store.add('AAPL', [entry(0, 0)])
+    assert store.search('the of and') == []
+    assert len(store.search('')) == 1
+
+
+def test_merge_only_small_segments(tmp_path, monkeypatch):
+    monkeypatch.setattr(news_store, 'MAX_SEGMENTS', 3)
+    monkeypatch.setattr(news_store, 'MERGE_FACTOR', 2)
+    store = news_store.NewsStore(str(tmp_path))
+    store.add('AAPL', [entry(n, n) for n in range(50)])
+    big = store._segments()[0]
+    for n in range(50, 60):
+        store.add('MSFT' if n % 2 else 'AAPL', [entry(n, n), entry(0, 0)])
+        assert len(store._segments()) <= 3
+    assert big in store._segments()
+
+    reloaded = news_store.NewsStore(str(tmp_path))
+    assert len(reloaded) == 60
+    assert sorted(reloaded.search('apple 0')[0]['tickers']) == ['AAPL', 'MSFT']
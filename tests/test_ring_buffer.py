@@ -0,0 +1,28 @@
+"""ring_buffer.py: partial last bars are replaced and indicator states rolled back."""
+import numpy as np
+import pandas as pd
+
+import market_data
+import ring_buffer
+from benchmarks.synthetic import ohlcv
+
+BARS = ohlcv(120, seed='RING', freq='min')
+
+
+def test_partial_bar_is_replaced(tmp_path):
+    series = ring_buffer.IntradaySeries('RING', '1m', store=ring_buffer.HistoryStore(str(tmp_path)))
+    series.indicator('MACD')
+    partial = BARS.iloc[:100].copy()
+    partial.iloc[-1, partial.columns.get_indexer(['High', 'Close'])] *= 1.01
+    assert series.append_frame(partial) == 100
+    series.indicator('RSI')
+
+    # The same bar again, now final, and a newer one
+    assert series.append_frame(BARS.iloc[95:101]) == 2
+    pd.testing.assert_frame_equal(series.load(), BARS.iloc[:101][ring_buffer.FIELDS], check_freq=False, check_dtype=False)
+    for name in ('MACD', 'RSI'):
+        streamed = series.indicator(name, BARS.index[0])
+        batch = market_data.INDICATORS[name](BARS.iloc[:101])
+        np.testing.assert_allclose(np.column_stack(streamed if isinstance(streamed, tuple) else [streamed]),
+                                   np.column_stack(batch if isinstance(batch, tuple) else [batch]),
+                                   rtol=1e-9, equal_nan=True)
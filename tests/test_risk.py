@@ -0,0 +1,32 @@
+"""risk.py: each ticker's returns are taken on its own dates."""
+import numpy as np
+import pandas as pd
+
+import market_data
+import risk
+from benchmarks.synthetic import ohlcv
+
+STOCK = ohlcv(500, seed='STK', start='2022-01-03')['Close']
+SPY = ohlcv(500, seed='SPY', start='2022-01-03')['Close']
+COIN = ohlcv(700, seed='COIN', start='2022-01-03', freq='D')['Close']
+
+
+def test_other_tickers_dates_do_not_change_metrics(monkeypatch):
+    series = {'STK': STOCK, 'SPY': SPY, 'COIN': COIN}
+
+    def price_matrix(tickers, start=None, end=None, field='Adj Close'):
+        return pd.DataFrame({t: series[t] for t in tickers}).sort_index()
+
+    monkeypatch.setattr(market_data, 'price_matrix', price_matrix)
+    monkeypatch.setattr(risk, '_rows', risk.OrderedDict())
+    alone = risk.risk_table(['STK'])
+    risk._rows.clear()
+    mixed = risk.risk_table(['COIN', 'STK'])
+    pd.testing.assert_series_equal(mixed.loc['STK'], alone.loc['STK'])
+    assert alone.loc['STK', 'Days'] == len(STOCK) - 1
+
+    # Beta of the crypto ticker over the benchmark's periods (Friday to Monday included)
+    returns = COIN.reindex(SPY.index).pct_change().iloc[1:]
+    market = SPY.pct_change().iloc[1:]
+    expected = np.cov(returns, market, bias=True)[0, 1] / market.var(ddof=0)
+    assert np.isclose(mixed.loc['COIN', 'Beta'], expected)
@@ -0,0 +1,21 @@
+"""sentiment.py: batches larger than the default cache size are not scored again."""
+import cache_store
+import sentiment
+
+
+def test_large_batch_is_not_rescored(tmp_path, monkeypatch):
+    monkeypatch.setattr(sentiment._cache, 'path', str(tmp_path / 'sentiment.bin'))
+    monkeypatch.setattr(sentiment._cache, '_entries', {})
+    headlines = [f'Shares of company {i} surge after record profit' for i in range(2 * cache_store.MAX_ENTRIES)]
+    first = sentiment.score_headlines(headlines)
+    monkeypatch.setattr(sentiment, '_score_uncached', lambda new: (_ for _ in ()).throw(AssertionError(len(new))))
+    assert sentiment.score_headlines(headlines).equals(first)
+
+
+def test_full_cache_prunes_below_its_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_store, 'CACHE_DIR', str(tmp_path))
+    cache = cache_store.PersistentCache('prune', max_entries=100)
+    for i in range(101):
+        cache.set(i, i)
+    assert len(cache.keys()) == int(100 * (1 - cache_store.PRUNE_FRACTION))
+    assert 100 in cache and 0 not in cache
@@ -0,0 +1,205 @@
+"""
+Lightweight per-stage timing for the Streamlit scripts and the API.
+
+    timing.begin_rerun('IAC8')
+    with timing.stage('download'):
+        data = market_data.load_prices(...)
+    ...
+    timing.finish_rerun()
+
+Every stage feeds process-wide Prometheus-style histograms (see
+prometheus_text) and, inside a rerun, the rerun's timeline. finish_rerun logs
+the timeline as one JSON record on the 'personal_finance.timing' logger and
+draws a waterfall in the sidebar when PF_DEBUG_TIMING=1 or the page URL has
+?debug=timing. Set PF_METRICS_PORT to serve /metrics from the Streamlit
+process as well. It listens on 127.0.0.1 only; set PF_METRICS_HOST (e.g. to
+0.0.0.0) to expose it to other machines.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+logger = logging.getLogger('personal_finance.timing')
+
+DEBUG_TIMING = os.environ.get('PF_DEBUG_TIMING', '') == '1'
+METRICS_PORT = int(os.environ.get('PF_METRICS_PORT', 0))
+METRICS_HOST = os.environ.get('PF_METRICS_HOST', '127.0.0.1')
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+
+_local = threading.local()
+_lock = threading.Lock()
+_histograms = {}
+_metrics_server = None
+
+
+def observe(page, name, seconds):
+    """Record one timing of stage name on page."""
+    key = (page, name)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {'buckets': [0] * len(BUCKETS), 'sum': 0.0, 'count': 0}
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                histogram['buckets'][i] += 1
+        histogram['sum'] += seconds
+        histogram['count'] += 1
+
+
+def _timeline():
+    return getattr(_local, 'timeline', None)
+
+
+def current_page():
+    timeline = _timeline()
+    return timeline['page'] if timeline else getattr(_local, 'page', 'background')
+
+
+@contextmanager
+def stage(name):
+    """Time the enclosed block as stage name of the current rerun."""
+    timeline = _timeline()
+    started = time.perf_counter()
+    depth = getattr(_local, 'depth', 0)
+    _local.depth = depth + 1
+    try:
+        yield
+    finally:
+        _local.depth = depth
+        seconds = time.perf_counter() - started
+        observe(current_page(), name, seconds)
+        if timeline is not None:
+            timeline['stages'].append({'stage': name, 'start': started - timeline['started'],
+                                       'seconds': seconds, 'depth': depth})
+
+
+def timed(name=None):
+    """Decorator timing every call of a function as a stage (default: its name)."""
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(stage_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def set_page(page):
+    """Label stages timed on this thread outside a rerun, e.g. 'api'."""
+    _local.page = page
+
+
+def begin_rerun(page):
+    """Start the timeline of one script run; call at the top of the script."""
+    if METRICS_PORT:
+        serve_metrics(METRICS_PORT, METRICS_HOST)
+    _local.timeline = {'page': page, 'started': time.perf_counter(), 'stages': []}
+    _local.depth = 0
+
+
+def finish_rerun():
+    """Close the current timeline, log it and draw the debug panel if enabled."""
+    timeline = _timeline()
+    if timeline is None:
+        return None
+    _local.timeline = None
+    total = time.perf_counter() - timeline['started']
+    observe(timeline['page'], 'rerun', total)
+    record = {'event': 'rerun', 'page': timeline['page'], 'seconds': round(total, 6),
+              'stages': [dict(s, start=round(s['start'], 6), seconds=round(s['seconds'], 6)) for s in timeline['stages']]}
+    logger.info(json.dumps(record))
+    if debug_enabled():
+        render_waterfall(record)
+    return record
+
+
+def debug_enabled():
+    if DEBUG_TIMING:
+        return True
+    import streamlit as st
+
+    try:
+        return st.query_params.get('debug') == 'timing'
+    except Exception:
+        return False
+
+
+def render_waterfall(record):
+    """Draw the stages of one rerun as a waterfall in the sidebar."""
+    import plotly.graph_objects as go
+    import streamlit as st
+
+    stages = record['stages']
+    labels = [f"{'  ' * s['depth']}{s['stage']} #{i}" for i, s in enumerate(stages)]
+    fig = go.Figure(go.Bar(
+        y=labels, x=[s['seconds'] * 1000 for s in stages], base=[s['start'] * 1000 for s in stages],
+        orientation='h', marker_color=['#636efa' if s['depth'] == 0 else '#00cc96' for s in stages],
+        hovertemplate='%{y}: %{x:.1f} ms<extra></extra>'))
+    fig.update_layout(height=120 + 22 * len(stages), margin=dict(l=0, r=0, t=30, b=0),
+                      title=f"Rerun {record['seconds'] * 1000:.0f} ms", xaxis_title='ms',
+                      yaxis=dict(autorange='reversed'))
+    st.sidebar.header('Timing')
+    st.sidebar.plotly_chart(fig, use_container_width=True)
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def prometheus_text():
+    """Return the stage histograms in the Prometheus text exposition format."""
+    lines = ['# HELP pf_stage_seconds Time spent per page and stage.', '# TYPE pf_stage_seconds histogram']
+    with _lock:
+        items = sorted((key, {'buckets': list(h['buckets']), 'sum': h['sum'], 'count': h['count']})
+                       for key, h in _histograms.items())
+    for (page, name), histogram in items:
+        labels = f'page="{_label(page)}",stage="{_label(name)}"'
+        for bound, count in zip(BUCKETS, histogram['buckets']):
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'pf_stage_seconds_bucket{{{labels},le="{le}"}} {count}')
+        lines.append(f'pf_stage_seconds_sum{{{labels}}} {histogram["sum"]:.6f}')
+        lines.append(f'pf_stage_seconds_count{{{labels}}} {histogram["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def serve_metrics(port=METRICS_PORT, host='127.0.0.1'):
+    """Serve prometheus_text() on http://host:port/metrics from a daemon thread, once per process."""
+    global _metrics_server
+    with _lock:
+        if _metrics_server is not None:
+            return _metrics_server
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = prometheus_text().encode()
+                self.send_response(200 if self.path == '/metrics' else 404)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            _metrics_server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            logger.warning('metrics server not started on port %s: %s', port, e)
+            _metrics_server = False
+            return None
+        threading.Thread(target=_metrics_server.serve_forever, daemon=True, name='metrics').start()
+        return _metrics_server
+
+
+def reset():
+    with _lock:
+        _histograms.clear()